@@ -1,60 +1,267 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.contrib.admin.utils import unquote
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import path, reverse
+from django.utils.cache import patch_cache_control
+from django.utils.functional import cached_property
 from django.utils.html import format_html
-from .models import AboutPage
 
-@admin.register(AboutPage)
-class AboutPageAdmin(admin.ModelAdmin):
-    list_display = ('title', 'image_tag')
-    readonly_fields = ('image_tag',)
+from . import catalog_export, profiling, search, thumbnails
+from .cache import versions_signature
+from .models import AboutPage, RequestProfile
+
+COUNT_CACHE_KEY = 'bar:admincount:{}:{}'
+
+
+class CappedCountPaginator(Paginator):
+    """
+    Paginator changelist-а без повного COUNT(*) великих таблиць: кількість рядків
+    без фільтрів кешується під версією моделі (bar/cache.py), а з фільтрами чи
+    пошуком рахується не далі ADMIN_COUNT_CAP — сторінок тоді показується не
+    більше, ніж вміщує межа.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        model = queryset.model
+        if not queryset.query.has_filters():
+            key = COUNT_CACHE_KEY.format(versions_signature(model), model._meta.label_lower)
+            count = cache.get(key)
+            if count is None:
+                count = queryset.count()
+                cache.set(key, count, None)
+            return count
+        cap = getattr(settings, 'ADMIN_COUNT_CAP', 10000)
+        return queryset.order_by()[:cap].count()
+
+
+class ScalableAdminMixin:
+    """Changelist без повних COUNT: обмежений paginator і без "показати всі N"."""
+    paginator = CappedCountPaginator
+    show_full_result_count = False
+
+
+class FullTextSearchAdminMixin:
+    """
+    Пошук changelist-а через FTS5-індекс (bar/search.py) замість LIKE '%...%' по
+    search_fields; search_fields лишаються для поля пошуку і як запасний варіант без FTS5.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search.filter_queryset(queryset, self.search_kind, search_term, fallback_fields=self.search_fields), False
+
+
+class ThumbnailAdminMixin:
+    """
+    Колонка image_tag з мініатюрою замість оригіналу (див. bar/thumbnails.py).
+    Мініатюра генерується при першому зверненні через thumbnail_view.
+    """
+    thumbnail_width = 100
 
     def image_tag(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="150" />', obj.image.url)
-        return "-"
+        if not obj.image:
+            return "-"
+        width = self.thumbnail_width * thumbnails.get_scale()
+        src = thumbnails.url(obj.image.name, width)
+        if src is None:
+            info = self.opts.app_label, self.opts.model_name
+            src = reverse('admin:%s_%s_thumbnail' % info, args=[obj.pk])
+            src += f'?v={thumbnails.source_version(obj.image.name)}'
+        return format_html(
+            '<img src="{}" width="{}" loading="lazy" decoding="async" alt="" />', src, self.thumbnail_width,
+        )
     image_tag.short_description = 'Зображення'
 
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('<path:object_id>/thumbnail/', self.admin_site.admin_view(self.thumbnail_view),
+                 name='%s_%s_thumbnail' % info),
+        ] + super().get_urls()
+
+    def thumbnail_view(self, request, object_id):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None or not obj.image or not self.has_view_or_change_permission(request, obj):
+            raise Http404
+        try:
+            target = thumbnails.generate(obj.image.name, self.thumbnail_width * thumbnails.get_scale())
+        except (OSError, ValueError):
+            raise Http404('Оригінал зображення недоступний')
+        response = FileResponse(open(target, 'rb'), content_type='image/webp')
+        # URL містить ?v=<версія оригіналу>, тож кешувати можна довго
+        patch_cache_control(response, private=True, max_age=7 * 24 * 3600)
+        return response
+
+
+class CatalogExportAdminMixin:
+    """Дії "Експорт у CSV/JSONL" для вибраних об'єктів — потоком, див. bar/catalog_export.py."""
+    export_kind = None
+    actions = ('export_csv', 'export_jsonl')
+
+    def export_response(self, queryset, fmt):
+        content_type, extension = catalog_export.FORMATS[fmt]
+        response = StreamingHttpResponse(catalog_export.stream(self.export_kind, fmt, queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.export_kind}s.{extension}"'
+        return response
+
+    @admin.action(description='Експортувати вибрані в CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return self.export_response(queryset, 'csv')
+
+    @admin.action(description='Експортувати вибрані в JSON Lines', permissions=['view'])
+    def export_jsonl(self, request, queryset):
+        return self.export_response(queryset, 'jsonl')
+
+
+@admin.register(AboutPage)
+class AboutPageAdmin(ThumbnailAdminMixin, admin.ModelAdmin):
+    thumbnail_width = 150
+    list_display = ('title', 'image_tag')
+    readonly_fields = ('image_tag',)
+
 from .models import Product
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ScalableAdminMixin, FullTextSearchAdminMixin, CatalogExportAdminMixin, ThumbnailAdminMixin, admin.ModelAdmin):
+    export_kind = 'product'
+    search_kind = 'product'
     list_display = ('name', 'category', 'abv', 'volume', 'is_kosher', 'is_limited', 'image_tag')
     list_filter = ('category', 'is_kosher', 'is_limited')
     search_fields = ('name', 'description')
     readonly_fields = ('image_tag',)
 
-    def image_tag(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="100" />', obj.image.url)
-        return "-"
-    image_tag.short_description = 'Зображення'
-
 from .models import Cocktail, Ingredient, CocktailIngredient
 
+class IngredientAutocompleteSelect(AutocompleteSelect):
+    """
+    Автодоповнення інгредієнта, що бере підпис вибраного значення з рядка inline:
+    get_queryset тягне ingredient через select_related, а CocktailIngredientForm
+    кладе його назву в labels. Стандартний віджет робить окремий SELECT на кожен
+    рядок; тут запит (один, за pk) лишається лише для невідомих значень, напр.
+    у формі з помилкою після POST.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.labels = {}
+
+    def optgroups(self, name, value, attr=None):
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        labels = {str(pk): label for pk, label in self.labels.items()}
+        missing = [pk for pk in selected if pk not in labels and pk.isdigit()]
+        if missing:
+            labels.update(
+                (str(pk), label)
+                for pk, label in self.choices.queryset.using(self.db).filter(pk__in=missing).values_list('pk', 'name')
+            )
+        for pk in selected:
+            if pk in labels:
+                default[1].append(self.create_option(name, int(pk), labels[pk], True, len(default[1])))
+        return [default]
+
+
+class CocktailIngredientForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = getattr(self.fields['ingredient'].widget, 'widget', self.fields['ingredient'].widget)
+        if isinstance(widget, IngredientAutocompleteSelect) and CocktailIngredient.ingredient.is_cached(self.instance):
+            ingredient = self.instance.ingredient
+            widget.labels = {ingredient.pk: ingredient.name}
+
+
 class CocktailIngredientInline(admin.TabularInline):
     model = CocktailIngredient
+    form = CocktailIngredientForm
     extra = 1
+    # Замість <select> з усіма інгредієнтами в кожному рядку — пошук через IngredientAdmin
+    autocomplete_fields = ('ingredient',)
+
+    def get_queryset(self, request):
+        # __str__ рядка звертається до cocktail та ingredient — тягнемо їх одним JOIN
+        return super().get_queryset(request).select_related('cocktail', 'ingredient')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'ingredient':
+            kwargs['widget'] = IngredientAutocompleteSelect(db_field, self.admin_site, using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 @admin.register(Cocktail)
-class CocktailAdmin(admin.ModelAdmin):
+class CocktailAdmin(ScalableAdminMixin, FullTextSearchAdminMixin, CatalogExportAdminMixin, ThumbnailAdminMixin, admin.ModelAdmin):
+    export_kind = 'cocktail'
+    search_kind = 'cocktail'
     list_display = ('name', 'image_tag')
     search_fields = ('name', 'description')
     inlines = [CocktailIngredientInline]
     readonly_fields = ('image_tag',)
 
-    def image_tag(self, obj):
-        if obj.image:
-            return format_html('<img src="{}" width="100" />', obj.image.url)
-        return "-"
-    image_tag.short_description = 'Зображення'
-
 @admin.register(Ingredient)
-class IngredientAdmin(admin.ModelAdmin):
+class IngredientAdmin(ScalableAdminMixin, FullTextSearchAdminMixin, admin.ModelAdmin):
+    # Пошук і автодоповнення в рецептах — через FTS-індекс зі згорнутими назвами:
+    # "лайм" знайде і "Лайм", і "laim"
+    search_kind = 'ingredient'
     list_display = ('name',)
     search_fields = ('name',)
+    ordering = ('name',)
 
 from .models import ContactInfo
 
 @admin.register(ContactInfo)
 class ContactInfoAdmin(admin.ModelAdmin):
     list_display = ('address', 'phone', 'email')
-    search_fields = ('address', 'email')
\ No newline at end of file
+    search_fields = ('address', 'email')
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Профілі запитів (bar/profiling.py): лише перегляд, завантаження файлу й видалення."""
+    list_display = (
+        'created_at', 'method', 'path', 'route', 'status_code', 'duration_ms', 'sql_queries', 'samples',
+        'trigger', 'user', 'download_link',
+    )
+    list_filter = ('trigger', 'format', 'status_code')
+    search_fields = ('path', 'route')
+    list_select_related = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def download_link(self, obj):
+        info = self.opts.app_label, self.opts.model_name
+        return format_html('<a href="{}">{}</a>', reverse('admin:%s_%s_download' % info, args=[obj.pk]), obj.file)
+    download_link.short_description = 'Файл'
+
+    def get_urls(self):
+        info = self.opts.app_label, self.opts.model_name
+        return [
+            path('<path:object_id>/download/', self.admin_site.admin_view(self.download_view),
+                 name='%s_%s_download' % info),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id):
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None or not self.has_view_permission(request, obj):
+            raise Http404
+        target = profiling.path(obj.file)
+        try:
+            handle = open(target, 'rb') if target else None
+        except OSError:
+            handle = None
+        if handle is None:
+            raise Http404('Файл профілю недоступний')
+        content_type = 'application/json' if obj.format == 'speedscope' else 'text/plain; charset=utf-8'
+        return FileResponse(handle, as_attachment=True, filename=obj.file, content_type=content_type)
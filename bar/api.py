@@ -0,0 +1,257 @@
+"""
+Read-only JSON API каталогу.
+
+    /api/products/        /api/products/<pk>/
+    /api/cocktails/       /api/cocktails/<pk>/    (з вкладеними інгредієнтами)
+    /api/ingredients/     /api/ingredients/<pk>/
+
+Параметри:
+  fields=id,name,abv — лише ці поля; у SELECT потрапляють лише їхні колонки;
+  limit, cursor      — keyset-пагінація (bar/pagination.py): cursor береться з поля next;
+  фільтри продуктів  — ті самі, що в каталозі (ProductFilter: category, abv_min, q, sort...);
+  q                  — повнотекстовий пошук коктейлів, як на /cocktails/; name — інгредієнтів.
+
+Списки віддаються StreamingHttpResponse: рядки читаються .iterator() частинами
+по CHUNK_SIZE і серіалізуються по одному, тож пам'ять не залежить від limit.
+Інгредієнти коктейлів підвантажуються prefetch на кожну частину — два запити на
+частину замість N+1. ETag і Last-Modified — ті самі, що в HTML-сторінок
+(bar/conditional.py), тож повторний запит без змін у даних отримує 304.
+"""
+import json
+from collections import namedtuple
+from operator import attrgetter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+
+from .conditional import conditional_page, object_validators, table_validators
+from .filters import ProductFilter
+from .models import Cocktail, CocktailIngredient, Ingredient, Product
+from .pagecache import cache_page_versioned
+from .pagination import KeysetPaginator
+from .querybudget import query_budget
+from . import search
+
+CHUNK_SIZE = 500
+
+# columns — колонки моделі для only(); get(obj) — значення; prefetch(queryset) — що дозавантажити
+Field = namedtuple('Field', 'columns get prefetch', defaults=(None,))
+
+
+def get_default_limit():
+    return getattr(settings, 'API_DEFAULT_LIMIT', 100)
+
+
+def get_max_limit():
+    return getattr(settings, 'API_MAX_LIMIT', 1000)
+
+
+def _column(name):
+    return Field((name,), attrgetter(name))
+
+
+def _image_url(obj):
+    return obj.image.url if obj.image else None
+
+
+def _image_variants(obj):
+    """Похідні з bar/images.py: {'webp': [{'width', 'url'}], 'jpeg': [...]}; {} — поки їх немає."""
+    variants = obj.image_variants or {}
+    if not obj.image or variants.get('source') != obj.image.name:
+        return {}
+    return {
+        fmt: [{'width': width, 'url': default_storage.url(name)} for width, name in variants.get(fmt, [])]
+        for fmt in ('webp', 'jpeg')
+    }
+
+
+def _cocktail_ingredients(cocktail):
+    return [
+        {'id': item.ingredient_id, 'name': item.ingredient.name, 'quantity': item.quantity}
+        for item in cocktail.cocktailingredient_set.all()
+    ]
+
+
+PRODUCT_FIELDS = {
+    'id': Field(('id',), attrgetter('pk')),
+    'name': _column('name'),
+    'description': _column('description'),
+    'category': _column('category'),
+    'category_label': Field(('category',), lambda product: product.get_category_display()),
+    'abv': _column('abv'),
+    'volume': _column('volume'),
+    'volume_litres': _column('volume_litres'),
+    'is_kosher': _column('is_kosher'),
+    'is_limited': _column('is_limited'),
+    'image': Field(('image',), _image_url),
+    'images': Field(('image', 'image_variants'), _image_variants),
+    'updated_at': _column('updated_at'),
+    'url': Field(('id',), lambda product: reverse('bar:product_detail', args=[product.pk])),
+}
+
+COCKTAIL_FIELDS = {
+    'id': Field(('id',), attrgetter('pk')),
+    'name': _column('name'),
+    'description': _column('description'),
+    'image': Field(('image',), _image_url),
+    'images': Field(('image', 'image_variants'), _image_variants),
+    'ingredients': Field((), _cocktail_ingredients, lambda queryset: queryset.with_ingredients()),
+    'updated_at': _column('updated_at'),
+    'url': Field(('id',), lambda cocktail: reverse('bar:cocktail_detail', args=[cocktail.pk])),
+}
+
+INGREDIENT_FIELDS = {
+    'id': Field(('id',), attrgetter('pk')),
+    'name': _column('name'),
+    'updated_at': _column('updated_at'),
+}
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def select_fields(request, available):
+    """Поля з ?fields= у порядку запиту (за замовчуванням усі); ValueError — невідоме поле."""
+    names = [name.strip() for value in request.GET.getlist('fields') for name in value.split(',') if name.strip()]
+    if not names:
+        return available
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Невідомі поля: {', '.join(unknown)}. Доступні: {', '.join(available)}")
+    return {name: available[name] for name in dict.fromkeys(names)}
+
+
+def prepare(queryset, fields, extra=()):
+    """only() з колонками вибраних полів (+ extra, напр. ключ сортування) і їхні prefetch."""
+    concrete = {field.name for field in queryset.model._meta.concrete_fields}
+    columns = {'id'} | {column for field in fields.values() for column in field.columns}
+    columns |= {column for column in extra if column in concrete}
+    queryset = queryset.only(*sorted(columns))
+    for field in fields.values():
+        if field.prefetch is not None:
+            queryset = field.prefetch(queryset)
+    return queryset
+
+
+def serialize(obj, fields):
+    return {name: field.get(obj) for name, field in fields.items()}
+
+
+def stream_list(request, queryset, ordering, available):
+    """{"results": [...], "next": URL наступної сторінки або null} потоком."""
+    try:
+        fields = select_fields(request, available)
+    except ValueError as exc:
+        return _error(str(exc))
+    try:
+        limit = int(request.GET.get('limit', get_default_limit()))
+    except ValueError:
+        return _error('limit має бути цілим числом')
+    limit = min(max(1, limit), get_max_limit())
+
+    paginator = KeysetPaginator(queryset, ordering, limit)
+    rows = paginator.rows_after(request.GET.get('cursor'))
+    if rows is None:
+        return _error('Недійсний cursor')
+    rows = prepare(rows, fields, extra=(paginator.field,))[:limit + 1]
+    # Потік читається вже після view — фіксуємо базу, вибрану для цього запиту (bar/routers.py)
+    rows = rows.using(rows.db)
+
+    def generate():
+        yield '{"results":['
+        last = None
+        has_next = False
+        for count, obj in enumerate(rows.iterator(chunk_size=min(CHUNK_SIZE, limit + 1))):
+            if count == limit:
+                has_next = True
+                break
+            yield (',' if count else '') + _dumps(serialize(obj, fields))
+            last = obj
+        next_url = None
+        if has_next:
+            params = request.GET.copy()
+            params['cursor'] = paginator.encode_cursor(last, 'next')
+            next_url = f'{request.path}?{params.urlencode()}'
+        yield f'],"next":{_dumps(next_url)}}}'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+def detail(request, queryset, pk, available):
+    try:
+        fields = select_fields(request, available)
+    except ValueError as exc:
+        return _error(str(exc))
+    obj = prepare(queryset, fields).filter(pk=pk).first()
+    if obj is None:
+        return _error('Не знайдено', status=404)
+    return JsonResponse(serialize(obj, fields), json_dumps_params={'ensure_ascii': False})
+
+
+# Бюджет списків — ETag-агрегат + рядки + prefetch на частину; запити потоку
+# виконуються вже після view, тож їх перевіряють тести (assertNumQueries).
+
+# --- Product ---
+@query_budget(3)
+@conditional_page(table_validators(Product))
+def product_list(request):
+    # Ті самі фільтри й сортування, що й у ProductListView
+    product_filter = ProductFilter(request.GET)
+    queryset = product_filter.apply(Product.objects.all())
+    return stream_list(request, queryset, product_filter.ordering, PRODUCT_FIELDS)
+
+
+@query_budget(2)
+@conditional_page(object_validators(Product))
+@cache_page_versioned(Product, name='api_product_detail', query_params=('fields',), multi_params=('fields',))
+def product_detail(request, pk):
+    return detail(request, Product.objects.all(), pk, PRODUCT_FIELDS)
+
+
+# --- Cocktail ---
+@query_budget(3)
+@conditional_page(table_validators(Cocktail, CocktailIngredient, Ingredient))
+def cocktail_list(request):
+    queryset = Cocktail.objects.all()
+    ordering = 'name'
+    query = request.GET.get('q')
+    if query:
+        queryset = search.filter_queryset(queryset, 'cocktail', query)
+        ordering = 'search_rank'
+    return stream_list(request, queryset, ordering, COCKTAIL_FIELDS)
+
+
+@query_budget(3)
+@conditional_page(object_validators(Cocktail, 'cocktailingredient', 'cocktailingredient__ingredient'))
+@cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='api_cocktail_detail', query_params=('fields',), multi_params=('fields',))
+def cocktail_detail(request, pk):
+    return detail(request, Cocktail.objects.all(), pk, COCKTAIL_FIELDS)
+
+
+# --- Ingredient ---
+@query_budget(3)
+@conditional_page(table_validators(Ingredient))
+def ingredient_list(request):
+    queryset = Ingredient.objects.all()
+    ordering = 'name'
+    name = request.GET.get('name', '').strip()
+    if name:
+        # FTS-індекс назв (міграція 0008): "лайм" знайде і "Лайм", і "laim"
+        queryset = search.filter_queryset(queryset, 'ingredient', name)
+        ordering = 'search_rank'
+    return stream_list(request, queryset, ordering, INGREDIENT_FIELDS)
+
+
+@query_budget(2)
+@conditional_page(object_validators(Ingredient))
+@cache_page_versioned(Ingredient, name='api_ingredient_detail', query_params=('fields',), multi_params=('fields',))
+def ingredient_detail(request, pk):
+    return detail(request, Ingredient.objects.all(), pk, INGREDIENT_FIELDS)
@@ -0,0 +1,125 @@
+"""
+Статика: збірка і віддача.
+
+Збірка — це звичайний `collectstatic` з BuildStaticStorage:
+  * імена файлів отримують хеш вмісту (ManifestStaticFilesStorage), посилання
+    в CSS (url(...) на шрифти) переписуються на хешовані;
+  * для текстових файлів поруч пишуться .gz і .br (brotli, якщо встановлений).
+Стилі сторінок лежать у bar/static/bar/css, Bootstrap і Roboto — у bar/static/vendor,
+тож сторінки не ходять на сторонні CDN.
+
+serve() віддає зібране з STATIC_ROOT: стиснений варіант за Accept-Encoding,
+хешовані імена — з Cache-Control: immutable на рік. За nginx STATIC_ROOT краще
+віддавати напряму (gzip_static/brotli_static), тоді ця view не викликається.
+"""
+import gzip
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.utils._os import safe_join
+
+from .mediafiles import IMMUTABLE, file_response
+
+try:
+    import brotli
+except ImportError:  # brotli необов'язковий: тоді лише gzip
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.html', '.xml', '.ico', '.ttf')
+MIN_SIZE = 256
+# Кодування в порядку переваги: (токен Accept-Encoding, розширення)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data, quality=11)
+
+
+def precompress(path):
+    """Пише path.gz і path.br, якщо це зменшує файл; повертає список створених файлів."""
+    if not path.endswith(COMPRESSIBLE) or os.path.getsize(path) < MIN_SIZE:
+        return []
+    created = []
+    mtime = os.path.getmtime(path)
+    data = None
+    for extension, compress in _compressors():
+        target = path + extension
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        compressed = compress(data)
+        if len(compressed) < len(data) * 0.95:
+            with open(target, 'wb') as f:
+                f.write(compressed)
+            created.append(target)
+        elif os.path.exists(target):
+            os.remove(target)
+    return created
+
+
+class BuildStaticStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage + попереднє стискання в post_process.
+    Поки collectstatic не запускали (тести, розробка), {% static %} дає звичайні
+    імена замість помилки про відсутній manifest.
+    """
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in set(paths) | set(self.hashed_files.values()):
+            precompress(self.path(name))
+
+
+def _hashed_names():
+    return set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def _accepted(request):
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        token, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def serve(request, path):
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+    content_type = None
+    content_encoding = None
+    vary = None
+    if full_path.endswith(COMPRESSIBLE):
+        vary = 'Accept-Encoding'
+        accepted = _accepted(request)
+        for token, extension in ENCODINGS:
+            if token in accepted and os.path.isfile(full_path + extension):
+                content_type, _ = mimetypes.guess_type(full_path)
+                content_encoding = token
+                full_path += extension
+                break
+    cache_control = IMMUTABLE if path in _hashed_names() else f"public, max-age={getattr(settings, 'MEDIA_MAX_AGE', 3600)}"
+    return file_response(
+        request, full_path, cache_control,
+        content_type=content_type, content_encoding=content_encoding, vary=vary,
+    )
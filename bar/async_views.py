@@ -0,0 +1,100 @@
+"""
+Async-версії списків і деталей каталогу для ASGI (djangoProject2/asgi.py).
+
+Під ASGI синхронна view виконується в потоці й тримає його весь запит. Ці view
+читають дані async ORM (aget, async for), а кеш сторінок, ETag/304 і бюджети
+запитів дають ті самі декоратори, що й у bar/views.py (вони розпізнають
+корутини). Поки запит чекає на блокування SQLite чи на повільного клієнта,
+uvicorn-воркер обслуговує інші з'єднання.
+
+Сторінки рендеряться тими самими шаблонами в потоці (sync_to_async), коли всі
+дані вже завантажені, тож HTML збігається з синхронними view. Під WSGI
+bar/urls.py підключає bar/views.py, див. налаштування ASYNC_VIEWS.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
+
+from . import facets, search
+from .conditional import conditional_page, object_validators, table_validators
+from .filters import ProductFilter
+from .models import Cocktail, CocktailIngredient, Ingredient, Product
+from .pagecache import cache_page_versioned
+from .pagination import KeysetPaginationMixin, KeysetPaginator
+from .querybudget import query_budget
+from .views import SORT_OPTIONS
+
+PAGE_SIZE = KeysetPaginationMixin.paginate_by
+
+
+async def _render(request, template_name, context):
+    # Контекст-процесори (bar.context_processors.site) і шаблонні теги синхронні
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _get_or_404(queryset, pk):
+    try:
+        return await queryset.aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        raise Http404(f'{queryset.model._meta.verbose_name} не знайдено')
+
+
+async def _list_context(request, queryset, ordering, context_object_name):
+    """Те саме, що ListView + KeysetPaginationMixin кладуть у контекст."""
+    paginator = KeysetPaginator(queryset, ordering, PAGE_SIZE)
+    page = await paginator.apage(request.GET.get('cursor'))
+    return {
+        'paginator': paginator,
+        'page_obj': page,
+        'is_paginated': page.has_other_pages(),
+        'object_list': page.object_list,
+        context_object_name: page.object_list,
+    }
+
+
+# --- Product ---
+@query_budget(3)
+@conditional_page(table_validators(Product))
+@cache_page_versioned(Product, name='product_list', query_params=ProductFilter.PARAMS + ('cursor',))
+async def product_list(request):
+    product_filter = ProductFilter(request.GET)
+    # Чи є FTS5-таблиці, перевіряється один раз на процес запитом до схеми
+    await sync_to_async(search.is_available)()
+    queryset = product_filter.apply(Product.objects.all())
+    context = await _list_context(request, queryset, product_filter.ordering, 'products')
+    context['facets'] = await sync_to_async(facets.build)(product_filter, request.GET)
+    context['sort_options'] = SORT_OPTIONS
+    return await _render(request, 'bar/products.html', context)
+
+
+@query_budget(2)
+@conditional_page(object_validators(Product))
+@cache_page_versioned(Product, name='product_detail', query_params=())
+async def product_detail(request, pk):
+    product = await _get_or_404(Product.objects.all(), pk)
+    return await _render(request, 'bar/product_detail.html', {'object': product, 'product': product})
+
+
+# --- Cocktail ---
+@query_budget(3)
+@conditional_page(table_validators(Cocktail, CocktailIngredient, Ingredient))
+@cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='cocktail_list', query_params=('q', 'cursor'))
+async def cocktail_list(request):
+    queryset = Cocktail.objects.with_ingredients()
+    ordering = 'name'
+    query = request.GET.get('q')
+    if query:
+        await sync_to_async(search.is_available)()
+        queryset = search.filter_queryset(queryset, 'cocktail', query)
+        ordering = 'search_rank'
+    context = await _list_context(request, queryset, ordering, 'cocktails')
+    return await _render(request, 'bar/cocktails.html', context)
+
+
+@query_budget(3)
+@conditional_page(object_validators(Cocktail, 'cocktailingredient', 'cocktailingredient__ingredient'))
+@cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='cocktail_detail', query_params=())
+async def cocktail_detail(request, pk):
+    # aget() виконує і prefetch інгредієнтів — два запити, як у CocktailDetailView
+    cocktail = await _get_or_404(Cocktail.objects.with_ingredients(), pk)
+    return await _render(request, 'bar/cocktail_detail.html', {'object': cocktail, 'cocktail': cocktail})
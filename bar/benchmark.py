@@ -0,0 +1,264 @@
+"""
+Бенчмарк усіх маршрутів bar.urls і головної сторінки (manage.py bench).
+
+Прогін іде на окремій базі: prepare() застосовує міграції, переносить
+Initial_Data.json (сторінки "Про нас", контакти, зображення) і додає
+синтетичний каталог заданого розміру (bar/generator.py) — з FTS-індексом
+і версіями кешів.
+
+scenarios() — суміш запитів з вагами: списки з фільтрами, сортуванням і
+пошуком, деталі випадкових об'єктів, API, "що я можу приготувати". Ваги
+задають частку сценарію в навантаженні; test_bench_covers_every_route
+стежить, щоб новий маршрут у bar.urls не лишився поза бенчмарком.
+
+measure() рахує SQL-запити й послідовну латентність кожного сценарію в
+процесі (тестовий Client, CaptureQueriesContext), client_levels() — req/s і
+перцентилі під конкурентним навантаженням з потоків того самого процесу.
+Проти gunicorn навантаження дає bar/loadtest.py; запити рахуються однаково.
+
+compare() порівнює результат із збереженою базовою лінією (JSON).
+"""
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+
+from . import loadtest
+
+FIXTURE = 'Initial_Data.json'
+
+def prepare(products, cocktails, ingredients, seed=0):
+    """Міграції, Initial_Data.json і синтетичний каталог у базі поточного процесу; повертає розміри таблиць."""
+    from django.core.management import call_command
+    from django.db.models.signals import post_save
+
+    from .generator import CatalogGenerator
+    from .models import Cocktail, CocktailIngredient, Ingredient, Product
+    from .signals import schedule_image_derivatives
+
+    # Похідні зображень для бенчмарку не потрібні, а пул процесів писав би файли в MEDIA_ROOT
+    for model in (Product, Cocktail):
+        post_save.disconnect(schedule_image_derivatives, sender=model)
+    call_command('migrate', verbosity=0, interactive=False)
+    call_command('loaddata', os.path.join(settings.BASE_DIR, FIXTURE), verbosity=0)
+    CatalogGenerator(seed=seed).generate(products=products, cocktails=cocktails, ingredients=ingredients)
+    return {
+        'products': Product.objects.count(),
+        'cocktails': Cocktail.objects.count(),
+        'ingredients': Ingredient.objects.count(),
+        'cocktail_ingredients': CocktailIngredient.objects.count(),
+    }
+
+
+# --- Сценарії ---
+DETAIL_SAMPLE = 20  # скільки різних об'єктів відкривають сценарії деталей
+
+
+def _word(rng, names):
+    """Слово з випадкової назви — для пошуку, що щось знаходить."""
+    words = [word for name in names for word in name.split() if len(word) > 3 and not word.startswith('№')]
+    return rng.choice(words) if words else 'горілка'
+
+
+def scenarios(seed=0):
+    """
+    Сценарії навантаження: [{'name', 'route', 'paths', 'weight'}]; route — ім'я
+    маршруту (bar:... або index). Шляхи залежать лише від даних і seed.
+    """
+    from django.urls import reverse
+
+    from .models import Cocktail, Ingredient, Product
+
+    rng = random.Random(seed)
+
+    def sample(model):
+        pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+        return sorted(rng.sample(pks, min(DETAIL_SAMPLE, len(pks))))
+
+    def path(route, *args, **params):
+        url = reverse(route, args=args)
+        return f'{url}?{urlencode(params)}' if params else url
+
+    product_pks, cocktail_pks, ingredient_pks = sample(Product), sample(Cocktail), sample(Ingredient)
+    product_word = _word(rng, Product.objects.filter(pk__in=product_pks).values_list('name', flat=True))
+    cocktail_word = _word(rng, Cocktail.objects.filter(pk__in=cocktail_pks).values_list('name', flat=True))
+    ingredient_word = _word(rng, Ingredient.objects.filter(pk__in=ingredient_pks).values_list('name', flat=True))[:4]
+    category = rng.choice([key for key, _ in Product.CATEGORY_CHOICES])
+    pantry = ','.join(str(pk) for pk in ingredient_pks[:5])
+
+    table = [
+        ('index', 'index', [path('index')], 3),
+        ('about', 'bar:about', [path('bar:about')], 1),
+        ('contacts', 'bar:contacts', [path('bar:contacts')], 1),
+        ('product_list', 'bar:product_list', [path('bar:product_list')], 6),
+        ('product_list:category', 'bar:product_list', [path('bar:product_list', category=category)], 3),
+        ('product_list:abv', 'bar:product_list', [path('bar:product_list', abv_min=35, abv_max=45)], 2),
+        ('product_list:kosher_sort', 'bar:product_list', [path('bar:product_list', is_kosher='true', sort='-abv')], 1),
+        ('product_list:volume', 'bar:product_list', [path('bar:product_list', volume='0.5', sort='volume')], 1),
+        ('product_list:search', 'bar:product_list', [path('bar:product_list', q=product_word)], 2),
+        ('product_list:name', 'bar:product_list', [path('bar:product_list', name=product_word, category=category)], 1),
+        ('product_detail', 'bar:product_detail', [path('bar:product_detail', pk) for pk in product_pks], 4),
+        ('cocktail_list', 'bar:cocktail_list', [path('bar:cocktail_list')], 4),
+        ('cocktail_list:search', 'bar:cocktail_list', [path('bar:cocktail_list', q=cocktail_word)], 2),
+        ('cocktail_detail', 'bar:cocktail_detail', [path('bar:cocktail_detail', pk) for pk in cocktail_pks], 3),
+        ('cocktail_makeable', 'bar:cocktail_makeable', [path('bar:cocktail_makeable', ingredients=pantry, missing=1)], 1),
+        ('api_product_list', 'bar:api_product_list', [path('bar:api_product_list', category=category, limit=50)], 2),
+        ('api_product_detail', 'bar:api_product_detail', [path('bar:api_product_detail', pk) for pk in product_pks], 1),
+        ('api_cocktail_list', 'bar:api_cocktail_list', [path('bar:api_cocktail_list', q=cocktail_word)], 1),
+        ('api_cocktail_detail', 'bar:api_cocktail_detail', [path('bar:api_cocktail_detail', pk) for pk in cocktail_pks], 1),
+        ('api_ingredient_list', 'bar:api_ingredient_list', [path('bar:api_ingredient_list', name=ingredient_word)], 1),
+        ('api_ingredient_detail', 'bar:api_ingredient_detail', [path('bar:api_ingredient_detail', pk) for pk in ingredient_pks], 1),
+    ]
+    return [
+        {'name': name, 'route': route, 'paths': paths, 'weight': weight}
+        for name, route, paths, weight in table if paths
+    ]
+
+
+def mix(scenario_list, seed=0):
+    """
+    Шляхи навантаження, перемішані: у кожному раунді сценарій дає weight шляхів,
+    деталі — наступні об'єкти вибірки; раундів стільки, щоб пройти всю вибірку.
+    """
+    objects = [itertools.cycle(scenario['paths']) for scenario in scenario_list]
+    rounds = max((len(scenario['paths']) for scenario in scenario_list), default=0)
+    paths = [
+        next(cycle)
+        for _ in range(rounds)
+        for scenario, cycle in zip(scenario_list, objects)
+        for _ in range(scenario['weight'])
+    ]
+    random.Random(seed).shuffle(paths)
+    return paths
+
+
+# --- Виміри в процесі ---
+def _get(client, path):
+    """GET із дочитуванням потокової відповіді (API), бо її запити виконуються під час читання; повертає статус."""
+    response = client.get(path)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+    return response.status_code
+
+
+def measure(scenario_list, repeat=5):
+    """
+    SQL-запити й латентність кожного сценарію послідовно, після одного запиту
+    прогріву (кеші процесу, FTS). queries — найбільше за виміряні запити.
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(raise_request_exception=False)
+    results = []
+    for scenario in scenario_list:
+        paths = scenario['paths']
+        _get(client, paths[0])
+        queries, latencies, errors = [], [], 0
+        for path in itertools.islice(itertools.cycle(paths), max(repeat, 1)):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as captured:
+                status = _get(client, path)
+            elapsed = time.perf_counter() - started
+            if 200 <= status < 400:
+                latencies.append(elapsed)
+                queries.append(len(captured))
+            else:
+                errors += 1
+        summary = loadtest.summarize(latencies, errors, sum(latencies))
+        results.append({
+            'name': scenario['name'], 'route': scenario['route'], 'path': paths[0], 'weight': scenario['weight'],
+            'queries': max(queries) if queries else None,
+            'p50': summary['p50'], 'p95': summary['p95'], 'errors': errors,
+        })
+    return results
+
+
+def client_drive(paths, concurrency, requests):
+    """requests запитів тестовим Client з concurrency потоків; повертає summarize()."""
+    from django.db import OperationalError, connections
+    from django.test import Client
+
+    queue = itertools.cycle(paths)
+    lock = threading.Lock()
+    remaining = requests
+
+    def worker():
+        nonlocal remaining
+        client = Client(raise_request_exception=False)
+        latencies, errors = [], 0
+        try:
+            while True:
+                with lock:
+                    if remaining <= 0:
+                        break
+                    remaining -= 1
+                    path = next(queue)
+                started = time.perf_counter()
+                try:
+                    status = _get(client, path)
+                except OperationalError:
+                    status = 0
+                if 200 <= status < 400:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+        finally:
+            connections.close_all()  # з'єднання цього потоку
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: worker(), range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for worker_latencies, _ in results for latency in worker_latencies]
+    return loadtest.summarize(latencies, sum(errors for _, errors in results), elapsed)
+
+
+def client_levels(paths, levels, requests, warmup=0):
+    """client_drive() на кожному рівні конкурентності: [{'concurrency', ...summarize()}]."""
+    if warmup:
+        client_drive(paths, 1, warmup)
+    return [{'concurrency': level, **client_drive(paths, level, requests)} for level in levels]
+
+
+# --- Порівняння з базовою лінією ---
+def _change(old, new):
+    return f'{(new - old) / old * 100:+.0f}%' if old else 'n/a'
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Регресії current відносно baseline (список рядків, порожній — усе гаразд):
+    req/s упали або p95 зросла більш ніж на threshold (частка), з'явились нові
+    помилки, сценарій виконує більше SQL-запитів, ніж раніше.
+    """
+    regressions = []
+    base_levels = {row['concurrency']: row for row in baseline.get('levels', ())}
+    for row in current.get('levels', ()):
+        base = base_levels.get(row['concurrency'])
+        if base is None:
+            continue
+        label = f"{row['concurrency']} клієнтів"
+        if base['rps'] and row['rps'] < base['rps'] * (1 - threshold):
+            regressions.append(f"{label}: req/s {base['rps']} → {row['rps']} ({_change(base['rps'], row['rps'])})")
+        if base['p95'] and row['p95'] and row['p95'] > base['p95'] * (1 + threshold):
+            regressions.append(f"{label}: p95 {base['p95']} → {row['p95']} мс ({_change(base['p95'], row['p95'])})")
+        if row['errors'] > base['errors']:
+            regressions.append(f"{label}: помилок {base['errors']} → {row['errors']}")
+    base_scenarios = {row['name']: row for row in baseline.get('scenarios', ())}
+    for row in current.get('scenarios', ()):
+        base = base_scenarios.get(row['name'])
+        if base is None or base['queries'] is None or row['queries'] is None:
+            continue
+        if row['queries'] > base['queries']:
+            regressions.append(f"{row['name']}: SQL-запитів {base['queries']} → {row['queries']}")
+    return regressions
@@ -0,0 +1,87 @@
+"""
+Версії моделей для інвалідації кешів.
+
+Кожна модель має лічильник у кеші; save/delete (див. signals.py) його збільшує.
+Ключі кешу включають версії моделей, від яких залежать, тож старі записи просто
+перестають читатися і з часом витісняються. Щоб інвалідація працювала між
+воркерами gunicorn, CACHES має вказувати на спільний бекенд (за замовчуванням
+FileBasedCache у BASE_DIR/cache).
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'bar:version:{}'
+# Час останньої зміни будь-якої моделі — за ним bar/routers.py тримає читання на primary
+LAST_WRITE_KEY = 'bar:lastwrite'
+# Версії, записані цим процесом: {(ключ, нова версія): попередня}; див. local_chain()
+_bumped = {}
+_bumped_lock = threading.Lock()
+MAX_BUMPED = 1024
+
+
+def _key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def _initial():
+    # Якщо ключ версії витіснили, нове значення не повинне збігтися зі старим
+    return int(time.time() * 1000)
+
+
+def model_version(model):
+    key = _key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    """
+    Нова версія — поточний час у наносекундах, а не incr(): FileBasedCache
+    збільшує значення через get + set, і два одночасні bump у різних воркерах
+    записали б однакову версію.
+    """
+    cache.set(LAST_WRITE_KEY, time.time(), timeout=None)
+    key = _key(model)
+    previous = cache.get(key)
+    version = max(time.time_ns(), (previous or 0) + 1)
+    cache.set(key, version, timeout=None)
+    with _bumped_lock:
+        _bumped[key, version] = previous
+        while len(_bumped) > MAX_BUMPED:
+            del _bumped[next(iter(_bumped))]
+    return version
+
+
+def local_chain(model, since, version):
+    """
+    Чи всі зміни версії моделі від since до version зробив цей процес. Тоді кеш
+    процесу, зібраний під since і оновлений власними змінами, відповідає version;
+    інакше між ними є зміна іншого воркера, яку він не бачив.
+    """
+    key = _key(model)
+    with _bumped_lock:
+        while version != since:
+            if (key, version) not in _bumped:
+                return False
+            version = _bumped[key, version]
+    return True
+
+
+def last_write():
+    """time.time() останнього bump_version або None."""
+    return cache.get(LAST_WRITE_KEY)
+
+
+def versions_signature(*models):
+    """Напр. 'product.17-cocktail.4' — частина ключа кешу, що змінюється з будь-якою з моделей."""
+    keys = {_key(model): model for model in models}
+    values = cache.get_many(keys)
+    missing = [key for key in keys if key not in values]
+    for key in missing:
+        values[key] = model_version(keys[key])
+    return '-'.join(f'{keys[key]._meta.model_name}.{values[key]}' for key in sorted(keys))
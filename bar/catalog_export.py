@@ -0,0 +1,101 @@
+"""
+Потоковий експорт каталогу в CSV або JSON Lines (дія в адмінці та manage.py export_catalog).
+
+Формат збігається з тим, що читає import_catalog (bar/importer.py): CSV — колонки
+полів і для коктейлів колонка ingredients "Горілка: 40 мл; Лайм: 1 шт"; JSONL —
+{"type": "cocktail", ..., "ingredients": [{"name", "quantity"}]}.
+
+Рядки читаються .iterator() частинами по CHUNK_SIZE (на PostgreSQL — серверним
+курсором), інгредієнти коктейлів — одним запитом на частину. Генератор віддає
+текст рядок за рядком, тож StreamingHttpResponse починає надсилати байти одразу,
+а пам'ять не залежить від кількості рядків.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Cocktail, CocktailIngredient, Product
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+COLUMNS = {
+    'product': ('name', 'description', 'category', 'abv', 'volume', 'image', 'is_kosher', 'is_limited'),
+    'cocktail': ('name', 'description', 'image', 'ingredients'),
+}
+MODELS = {'product': Product, 'cocktail': Cocktail}
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def records(kind, queryset=None, chunk_size=CHUNK_SIZE):
+    """Словники з колонками COLUMNS[kind] для кожного об'єкта queryset у порядку pk."""
+    columns = COLUMNS[kind]
+    queryset = MODELS[kind].objects.all() if queryset is None else queryset
+    fields = [column for column in columns if column != 'ingredients']
+    rows = queryset.order_by('pk').values_list('pk', *fields).iterator(chunk_size=chunk_size)
+    for chunk in _chunks(rows, chunk_size):
+        recipes = {}
+        if 'ingredients' in columns:
+            ingredient_rows = (
+                CocktailIngredient.objects.using(queryset.db)
+                .filter(cocktail_id__in=[row[0] for row in chunk])
+                .order_by('pk').values_list('cocktail_id', 'ingredient__name', 'quantity')
+            )
+            for cocktail_id, name, quantity in ingredient_rows:
+                recipes.setdefault(cocktail_id, []).append({'name': name, 'quantity': quantity})
+        for row in chunk:
+            record = dict(zip(fields, row[1:]))
+            if 'ingredients' in columns:
+                record['ingredients'] = recipes.get(row[0], [])
+            yield record
+
+
+class _Echo:
+    """csv.writer пише в цей "файл", а ми забираємо рядок одразу."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, list):
+        return '; '.join(f"{item['name']}: {item['quantity']}" if item['quantity'] else item['name'] for item in value)
+    return value
+
+
+def csv_lines(kind, rows):
+    writer = csv.writer(_Echo())
+    columns = COLUMNS[kind]
+    yield writer.writerow(columns)
+    for record in rows:
+        yield writer.writerow([_csv_value(record[column]) for column in columns])
+
+
+def jsonl_lines(kind, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for record in rows:
+        yield encoder.encode({'type': kind, **record}) + '\n'
+
+
+def stream(kind, fmt, queryset=None, chunk_size=CHUNK_SIZE):
+    """Генератор рядків експорту (str) у форматі 'csv' або 'jsonl'."""
+    if queryset is not None:
+        # Генератор читається вже після view — фіксуємо базу, вибрану для запиту (bar/routers.py)
+        queryset = queryset.using(queryset.db)
+    rows = records(kind, queryset, chunk_size)
+    return csv_lines(kind, rows) if fmt == 'csv' else jsonl_lines(kind, rows)
@@ -0,0 +1,166 @@
+"""
+Умовні GET-запити (ETag / Last-Modified / 304) для сторінок каталогу.
+
+Валідатори рахуються не з завантажених об'єктів, а з одного агрегату
+(max(updated_at), count) по таблицях, від яких залежить сторінка. count
+потрібен, щоб помітити видалення: max(updated_at) від нього не змінюється.
+Результат агрегату кешується під версіями моделей (bar/cache.py), тож поки
+дані не змінились, перевірка If-None-Match не робить жодного SQL-запиту.
+Кеш спільний для воркерів (див. bar/pagecache.py), тож зміна в одному воркері
+одразу дає новий ETag в усіх, а не через CACHE_TIMEOUT.
+
+Last-Modified видалень не бачить, але браузери й проксі, отримавши ETag,
+надсилають If-None-Match, а він має пріоритет над If-Modified-Since.
+"""
+import hashlib
+from datetime import timezone as dt_timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count, Max
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition
+
+from . import singletons
+from .cache import versions_signature
+
+CACHE_KEY = 'bar:state:{}:{}'
+CACHE_TIMEOUT = 3600
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def tables_state(*models, using='default'):
+    """
+    [(max updated_at, count)] для кожної моделі — одним запитом з підзапитами
+    по кожній таблиці (updated_at проіндексовано, тож MAX береться з індексу).
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = []
+    for model in models:
+        table = quote(model._meta.db_table)
+        column = quote(model._meta.get_field('updated_at').column)
+        columns.append(f'(SELECT MAX({column}) FROM {table}), (SELECT COUNT(*) FROM {table})')
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(columns)}")
+        row = cursor.fetchone()
+    return [(_as_datetime(row[i]), row[i + 1]) for i in range(0, len(row), 2)]
+
+
+def _combine(states):
+    """Список (max updated_at, count) -> (Last-Modified, рядок для ETag)."""
+    stamps = [stamp for stamp, _ in states if stamp is not None]
+    last_modified = max(stamps) if stamps else None
+    raw = ';'.join(f'{stamp.isoformat() if stamp else "-"}/{count}' for stamp, count in states)
+    return last_modified, raw
+
+
+def _cached_state(key, models, compute):
+    key = CACHE_KEY.format(versions_signature(*models), key)
+    state = cache.get(key)
+    if state is None:
+        state = compute()
+        cache.set(key, state, CACHE_TIMEOUT)
+    return state
+
+
+def table_validators(*models):
+    """Валідатори для сторінок-списків: стан усіх таблиць models."""
+    def validators(request, *args, **kwargs):
+        return _cached_state('tables', models, lambda: _combine(tables_state(*models)))
+    return validators
+
+
+def object_validators(model, *related):
+    """
+    Валідатори для детальної сторінки: max(updated_at) і count самого об'єкта та
+    пов'язаних рядків в одному агрегаті. related — шляхи до пов'язаних моделей,
+    напр. ('cocktailingredient', 'cocktailingredient__ingredient').
+    """
+    def validators(request, pk, *args, **kwargs):
+        def compute():
+            aggregates = {'own': Max('updated_at'), 'own_count': Count('pk', distinct=True)}
+            for i, path in enumerate(related):
+                aggregates[f'r{i}'] = Max(f'{path}__updated_at')
+                aggregates[f'r{i}_count'] = Count(path, distinct=True)
+            values = model.objects.filter(pk=pk).aggregate(**aggregates)
+            states = [(values['own'], values['own_count'])] + [
+                (values[f'r{i}'], values[f'r{i}_count']) for i in range(len(related))
+            ]
+            return _combine(states)
+        return _cached_state(f'{model._meta.model_name}.{pk}', (model,) + _related_models(model, related), compute)
+    return validators
+
+
+def _related_models(model, paths):
+    result = []
+    for path in paths:
+        current = model
+        for part in path.split('__'):
+            current = current._meta.get_field(part).related_model
+        result.append(current)
+    return tuple(result)
+
+
+def singleton_validators(*models):
+    """Для сторінок з AboutPage/ContactInfo: стан береться з кешу процесу, без SQL."""
+    def validators(request, *args, **kwargs):
+        states = []
+        for model in models:
+            obj = singletons.get(model)
+            states.append((obj.updated_at if obj else None, 1 if obj else 0))
+        return _combine(states)
+    return validators
+
+
+def conditional_page(validators):
+    """
+    Обгортка над django.views.decorators.http.condition: ETag і Last-Modified
+    з одного виклику validators(request, *args, **kwargs) -> (last_modified, raw).
+    Має стояти зовні кешу сторінок, щоб 304 віддавався ще до нього.
+    """
+    def get(request, *args, **kwargs):
+        if not hasattr(request, '_bar_validators'):
+            last_modified, raw = validators(request, *args, **kwargs)
+            salt = getattr(settings, 'ETAG_SALT', '')
+            etag = hashlib.md5(f'{salt}:{request.path}:{raw}'.encode()).hexdigest()
+            request._bar_validators = (last_modified, etag)
+        return request._bar_validators
+
+    def etag_func(request, *args, **kwargs):
+        return get(request, *args, **kwargs)[1]
+
+    def last_modified_func(request, *args, **kwargs):
+        return get(request, *args, **kwargs)[0]
+
+    def decorator(view_func):
+        conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view_func)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+                # Валідатори читають кеш і БД — рахуємо їх у потоці заздалегідь,
+                # condition() далі бере готові значення з request
+                await sync_to_async(get)(request, *args, **kwargs)
+                return await conditional(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            return conditional(request, *args, **kwargs)
+        return wrapper
+    return decorator
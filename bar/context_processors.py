@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import singletons
+
+
+def site(request):
+    """
+    about_page і contact_info для навбару й футера будь-якого шаблону.
+    Ліниві: шаблон, що їх не використовує, не звертається навіть до кешу.
+    """
+    return {
+        'about_page': SimpleLazyObject(singletons.about_page),
+        'contact_info': SimpleLazyObject(singletons.contact_info),
+    }
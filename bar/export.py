@@ -0,0 +1,382 @@
+"""
+Статичний експорт публічної частини сайту (manage.py export_site).
+
+Кожна сторінка рендериться тими самими view і шаблонами і пишеться у файл
+поруч з .gz/.br (bar/assets.py):
+  /products/5/                 -> <out>/products/5/index.html
+  /products/?category=horilka  -> <out>/products/category=horilka.html
+Списки обходяться від кореня: з нефільтрованої сторінки — за посиланнями фасетів
+(типові комбінації фільтрів), з будь-якої — за посиланнями пагінації. Зібрана
+статика копіюється в <out>/static, а медіа, на які посилаються сторінки, — в
+<out>/media під хешованими іменами.
+
+Поруч лежить manifest (.export-manifest.json): для кожної сторінки — її сім'я
+і відбиток даних, з яких вона зібрана ((max updated_at, count) таблиць, як у
+bar/conditional.py; для детальних сторінок — самого рядка і пов'язаних). Наступний
+запуск перерендерює лише сторінки зі зміненим відбитком, видаляє сторінки
+видалених об'єктів, а при зміні шаблонів чи зібраної статики — усе.
+
+Каталог віддає будь-який файловий сервер, Django лишається для адмінки і
+запитів, яких немає в експорті (пошук, довільні фільтри). Для nginx:
+
+    map $args $page { "" index; default $args; }
+    location / {
+        root /srv/site;
+        gzip_static on; brotli_static on;
+        try_files $uri $uri/$page.html @django;
+    }
+    location /admin/ { proxy_pass http://django; }
+    location @django { proxy_pass http://django; }
+
+Модуль імпортується в дочірніх процесах до django.setup(), тому моделі й
+view імпортуються всередині функцій.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import uuid
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+
+MANIFEST = '.export-manifest.json'
+FORMAT = 1
+MAX_QUERY_LENGTH = 200
+URL_RE = re.compile(r'''(?:href|src)="([^"]+)"''')
+SRCSET_RE = re.compile(r'''srcset="([^"]+)"''')
+
+# pages() -> {url: відбиток рядка або None}; None — сторінка залежить від таблиць models цілком.
+# crawl — обходити посилання фасетів і пагінації від кореня.
+Family = namedtuple('Family', 'name models pages crawl')
+
+
+def _url_prefix(url):
+    return url if url.startswith(('/', 'http://', 'https://')) else '/' + url
+
+
+def page_file(url):
+    """Відносний шлях файлу сторінки або None, якщо query string не годиться для імені файлу."""
+    parts = urlsplit(url)
+    path = parts.path.lstrip('/')
+    if not parts.query:
+        return path + 'index.html'
+    if '/' in parts.query or parts.query.startswith('.') or len(parts.query) > MAX_QUERY_LENGTH:
+        return None
+    return f'{path}{parts.query}.html'
+
+
+def extract_links(text, path):
+    """(посилання на цю ж сторінку з іншим query string, URL статики й медіа) з HTML."""
+    asset_prefixes = (_url_prefix(settings.STATIC_URL), _url_prefix(settings.MEDIA_URL))
+    urls = [html.unescape(url) for url in URL_RE.findall(text)]
+    for srcset in SRCSET_RE.findall(text):
+        urls.extend(html.unescape(item).split()[0] for item in srcset.split(',') if item.strip())
+    pages, assets = [], []
+    for url in urls:
+        if url.startswith('?'):
+            url = path + url
+        if url.startswith(asset_prefixes):
+            assets.append(url.split('?')[0])
+        elif url.startswith(path + '?') and url != path + '?':
+            pages.append(url)
+    return sorted(set(pages)), sorted(set(assets))
+
+
+def _digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(temporary, 'wb') as f:
+            f.write(content)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def render_page(out_dir, url):
+    """
+    Рендерить одну сторінку у файл (якщо вміст змінився) і повертає словник
+    з url, status, file, sha, changed, links і assets. Виконується і в пулі процесів.
+    """
+    from asgiref.sync import async_to_sync, iscoroutinefunction
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import Http404
+    from django.test import RequestFactory
+    from django.urls import resolve
+
+    from .assets import precompress
+
+    result = {'url': url, 'status': 200}
+    name = page_file(url)
+    if name is None:
+        result['status'] = 414
+        return result
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    try:
+        match = resolve(request.path_info)
+        view = match.func
+        if iscoroutinefunction(view):  # ASYNC_VIEWS=true, див. bar/async_views.py
+            view = async_to_sync(view)
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        result['status'] = 404
+        return result
+    if hasattr(response, 'render'):
+        response.render()
+    result['status'] = response.status_code
+    if response.status_code != 200:
+        return result
+    content = response.content
+    path = os.path.join(out_dir, name)
+    sha = hashlib.sha1(content).hexdigest()
+    result.update(file=name, sha=sha, changed=_digest(path) != sha)
+    if result['changed']:
+        _write(path, content)
+    precompress(path)
+    result['links'], result['assets'] = extract_links(content.decode(response.charset), request.path)
+    return result
+
+
+def _init_worker(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    import django
+    django.setup()
+
+
+def _stamp(*values):
+    return '/'.join(value.isoformat() if hasattr(value, 'isoformat') else '-' if value is None else str(value)
+                    for value in values)
+
+
+def families():
+    from django.db.models import Count, Max
+    from django.urls import reverse
+
+    from .models import Cocktail, CocktailIngredient, Ingredient, Product
+
+    def fixed(*names):
+        return lambda: {reverse(name): None for name in names}
+
+    def products():
+        rows = Product.objects.values_list('pk', 'updated_at').order_by('pk')
+        return {reverse('bar:product_detail', args=[pk]): _stamp(updated_at) for pk, updated_at in rows.iterator()}
+
+    def cocktails():
+        rows = Cocktail.objects.annotate(
+            ingredients_updated=Max('cocktailingredient__updated_at'),
+            ingredients_count=Count('cocktailingredient', distinct=True),
+            ingredient_updated=Max('cocktailingredient__ingredient__updated_at'),
+        ).values_list('pk', 'updated_at', 'ingredients_updated', 'ingredients_count', 'ingredient_updated').order_by('pk')
+        return {reverse('bar:cocktail_detail', args=[row[0]]): _stamp(*row[1:]) for row in rows.iterator()}
+
+    return [
+        Family('index', (), fixed('index'), False),
+        Family('about', (), fixed('bar:about'), False),
+        Family('contacts', (), fixed('bar:contacts'), False),
+        Family('products', (Product,), fixed('bar:product_list'), True),
+        Family('cocktails', (Cocktail, CocktailIngredient, Ingredient), fixed('bar:cocktail_list'), True),
+        Family('product_detail', (), products, False),
+        Family('cocktail_detail', (), cocktails, False),
+    ]
+
+
+def code_stamp():
+    """Відбиток шаблонів і зібраної статики: змінилась верстка — експорт перезбирається повністю."""
+    digest = hashlib.md5(str(FORMAT).encode())
+    directories = [str(directory) for config in settings.TEMPLATES for directory in config.get('DIRS', ())]
+    directories.append(os.path.join(os.path.dirname(__file__), 'templates'))
+    for directory in directories:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, directory).encode())
+                digest.update((_digest(path) or '').encode())
+    static_manifest = os.path.join(settings.STATIC_ROOT, 'staticfiles.json')
+    digest.update((_digest(static_manifest) or '').encode())
+    return digest.hexdigest()
+
+
+class Exporter:
+    """Один запуск експорту в out_dir; run() повертає статистику."""
+
+    def __init__(self, out_dir, workers=0, full=False, max_pages=50, log=None):
+        self.out_dir = str(out_dir)
+        self.workers = workers
+        self.full = full
+        self.max_pages = max_pages
+        self.log = log or (lambda message: None)
+        self.stats = {'rendered': 0, 'written': 0, 'kept': 0, 'removed': 0, 'failed': 0, 'assets': 0}
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.out_dir, MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if manifest.get('format') == FORMAT else {}
+
+    def run(self):
+        from .conditional import _combine, tables_state
+        from .singletons import MODELS as SITE_MODELS
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        previous = self.load_manifest()
+        code = code_stamp()
+        full = self.full or previous.get('code') != code
+        old_pages = previous.get('pages', {})
+        by_root = {}
+        for url, page in old_pages.items():
+            by_root.setdefault(page.get('root', url), []).append(url)
+
+        # Футер з контактами є на всіх сторінках
+        site = _combine(tables_state(*SITE_MODELS))[1]
+        self.pages = {}
+        self.queued = {}  # url -> (сім'я, відбиток, чи обходити посилання)
+        self.crawled = {}  # сім'я -> кількість поставлених у чергу сторінок
+        queue = []
+        for family in families():
+            table = _combine(tables_state(*family.models))[1] if family.models else ''
+            for url, row in family.pages().items():
+                stamp = f'{site}|{table}|{row or ""}'
+                old = old_pages.get(url)
+                if not full and old and old['stamp'] == stamp and old['family'] == family.name:
+                    # Сторінка (і для списків — усі сторінки, знайдені обходом від неї) не змінилась
+                    for other_url in by_root.get(url, ()):
+                        self.pages[other_url] = old_pages[other_url]
+                        self.stats['kept'] += 1
+                    continue
+                self.queued[url] = (family.name, stamp, family.crawl, url)
+                self.crawled[url] = 1
+                queue.append(url)
+
+        self.assets = set()
+        self.render(queue)
+        for url, page in old_pages.items():
+            if url not in self.pages and page.get('file'):
+                self.remove(page['file'])
+        self.copy_assets()
+
+        manifest = {'format': FORMAT, 'code': code, 'pages': self.pages}
+        _write(os.path.join(self.out_dir, MANIFEST), json.dumps(manifest, indent=1, sort_keys=True).encode())
+        return self.stats
+
+    def render(self, queue):
+        if not self.workers:
+            queue = deque(queue)
+            while queue:
+                url = queue.popleft()
+                try:
+                    result = render_page(self.out_dir, url)
+                except Exception as exc:
+                    result = {'url': url, 'status': 500, 'error': exc}
+                queue.extend(self.collect(result))
+            return
+        # spawn, як і для зображень: дочірній процес налаштовує Django сам і відкриває своє з'єднання з БД
+        with ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=get_context('spawn'),
+            initializer=_init_worker, initargs=(os.environ['DJANGO_SETTINGS_MODULE'],),
+        ) as pool:
+            futures = {pool.submit(render_page, self.out_dir, url): url for url in queue}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        result = {'url': url, 'status': 500, 'error': exc}
+                    for link in self.collect(result):
+                        futures[pool.submit(render_page, self.out_dir, link)] = link
+
+    def collect(self, result):
+        """Записує результат у manifest; повертає нові URL для обходу."""
+        url = result['url']
+        family, stamp, crawl, root = self.queued[url]
+        if result['status'] != 200:
+            self.stats['failed'] += 1
+            self.log(f"{url}: {result.get('error') or result['status']}")
+            return []
+        self.stats['rendered'] += 1
+        self.stats['written'] += result['changed']
+        self.pages[url] = {'family': family, 'stamp': stamp, 'file': result['file'], 'sha': result['sha'], 'root': root}
+        self.assets.update(result['assets'])
+        if not crawl:
+            return []
+        # З кореня — фасети й пагінація, з відфільтрованих сторінок — лише пагінація
+        is_root = url == root
+        links = []
+        for link in result['links']:
+            if link in self.queued or (not is_root and 'cursor=' not in link):
+                continue
+            if self.crawled[root] >= self.max_pages:
+                break
+            self.crawled[root] += 1
+            self.queued[link] = (family, stamp, crawl, root)
+            links.append(link)
+        return links
+
+    def remove(self, name):
+        path = os.path.join(self.out_dir, name)
+        for variant in (path, path + '.gz', path + '.br'):
+            if os.path.exists(variant):
+                os.remove(variant)
+        self.stats['removed'] += 1
+
+    def copy_assets(self):
+        """Зібрана статика — цілком, медіа — ті файли, на які посилаються сторінки."""
+        from django.http import Http404
+
+        from .mediafiles import _resolve
+
+        static_prefix = _url_prefix(settings.STATIC_URL)
+        media_prefix = _url_prefix(settings.MEDIA_URL)
+        if any(url.startswith(static_prefix) for url in self.assets):
+            if os.path.isdir(settings.STATIC_ROOT):
+                self._copy_tree(settings.STATIC_ROOT, os.path.join(self.out_dir, static_prefix.strip('/')))
+            else:
+                self.log('STATIC_ROOT не існує — спершу запустіть collectstatic')
+        for url in sorted(self.assets):
+            if not url.startswith(media_prefix):
+                continue
+            name = unquote(url[len(media_prefix):])
+            try:
+                source, _ = _resolve(name)
+            except Http404:
+                self.log(f'{url}: файл не знайдено')
+                continue
+            # Ім'я з хешем вмісту: існуючий файл уже актуальний
+            self._copy(source, os.path.join(self.out_dir, media_prefix.strip('/'), name), check_size=False)
+
+    def _copy_tree(self, source_root, target_root):
+        for root, dirs, files in os.walk(source_root):
+            for name in files:
+                source = os.path.join(root, name)
+                self._copy(source, os.path.join(target_root, os.path.relpath(source, source_root)))
+
+    def _copy(self, source, target, check_size=True):
+        if os.path.exists(target):
+            if not check_size:
+                return
+            source_stat, target_stat = os.stat(source), os.stat(target)
+            if source_stat.st_size == target_stat.st_size and source_stat.st_mtime_ns == target_stat.st_mtime_ns:
+                return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(source, target)
+        self.stats['assets'] += 1
@@ -0,0 +1,143 @@
+"""
+Фасетні лічильники для каталогу продуктів.
+
+Усі лічильники рахуються одним агрегатним запитом: кожен — це COUNT(...) FILTER
+(WHERE ...) над тим самим набором рядків. Для виміру D враховуються всі фільтри,
+крім власного фільтра D, тож користувач бачить, скільки продуктів отримає,
+змінивши саме цей вимір. Результат кешується за нормалізованим підписом фільтрів
+і версією моделі Product.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils.http import urlencode
+
+from .cache import versions_signature
+from .models import Product
+
+CACHE_TIMEOUT = 600
+
+# (ключ, підпис, min, max) — межі включні й не перетинаються з урахуванням точності колонок
+VOLUME_BUCKETS = [
+    ('upto-0.5', 'до 0,5 л', None, Decimal('0.5')),
+    ('0.5-1', '0,5–1 л', Decimal('0.501'), Decimal('0.999')),
+    ('from-1', 'від 1 л', Decimal('1'), None),
+]
+ABV_BUCKETS = [
+    ('upto-30', 'до 30%', None, Decimal('29.99')),
+    ('30-40', '30–40%', Decimal('30'), Decimal('39.99')),
+    ('from-40', 'від 40%', Decimal('40'), None),
+]
+BOOLEAN_VALUES = [(True, 'Так'), (False, 'Ні')]
+
+
+def _range_q(field, low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(**{f'{field}__gte': low})
+    if high is not None:
+        q &= Q(**{f'{field}__lte': high})
+    return q
+
+
+def facet_values():
+    """{вимір: [(значення, підпис, Q, параметри запиту)]}"""
+    return {
+        'category': [
+            (key, label, Q(category=key), {'category': key}) for key, label in Product.CATEGORY_CHOICES
+        ],
+        'is_kosher': [
+            (value, label, Q(is_kosher=value), {'is_kosher': str(value).lower()}) for value, label in BOOLEAN_VALUES
+        ],
+        'is_limited': [
+            (value, label, Q(is_limited=value), {'is_limited': str(value).lower()}) for value, label in BOOLEAN_VALUES
+        ],
+        'volume': [
+            # volume_litres = 0 — об'єм невідомий, у жоден кошик не потрапляє
+            (key, label, _range_q('volume_litres', low, high) & Q(volume_litres__gt=0),
+             {'volume_min': low or '', 'volume_max': high or ''})
+            for key, label, low, high in VOLUME_BUCKETS
+        ],
+        'abv': [
+            (key, label, _range_q('abv', low, high), {'abv_min': low or '', 'abv_max': high or ''})
+            for key, label, low, high in ABV_BUCKETS
+        ],
+    }
+
+
+DIMENSION_TITLES = {
+    'category': 'Категорія',
+    'is_kosher': 'Кошерний',
+    'is_limited': 'Обмежена серія',
+    'volume': "Об'єм",
+    'abv': 'Міцність',
+}
+
+# Параметри запиту, що належать кожному виміру (скидаються при виборі іншого значення)
+DIMENSION_PARAMS = {
+    'category': ('category',),
+    'is_kosher': ('is_kosher',),
+    'is_limited': ('is_limited',),
+    'volume': ('volume', 'volume_min', 'volume_max'),
+    'abv': ('abv_min', 'abv_max'),
+}
+
+
+def compute_counts(product_filter, queryset=None):
+    """Один агрегатний запит; повертає {вимір: {значення: кількість}}."""
+    queryset = product_filter.search(Product.objects.all() if queryset is None else queryset)
+    conditions = product_filter.conditions()
+    aggregates = {}
+    labels = {}
+    for dimension, values in facet_values().items():
+        others = Q()
+        for other, condition in conditions.items():
+            if other != dimension:
+                others &= condition
+        for index, (value, _, condition, _) in enumerate(values):
+            alias = f'{dimension}__{index}'
+            aggregates[alias] = Count('pk', filter=others & condition)
+            labels[alias] = (dimension, value)
+    result = {dimension: {} for dimension in DIMENSION_PARAMS}
+    for alias, count in queryset.aggregate(**aggregates).items():
+        dimension, value = labels[alias]
+        result[dimension][value] = count
+    return result
+
+
+def cache_key(product_filter):
+    signature = product_filter.signature(exclude=('sort',))
+    digest = hashlib.md5(signature.encode()).hexdigest()
+    return f'bar:facets:{versions_signature(Product)}:{digest}'
+
+
+def get_counts(product_filter):
+    key = cache_key(product_filter)
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute_counts(product_filter)
+        cache.set(key, counts, CACHE_TIMEOUT)
+    return counts
+
+
+def build(product_filter, params):
+    """Фасети для шаблону: підписи, лічильники, посилання й ознака вибраного значення."""
+    counts = get_counts(product_filter)
+    facets = []
+    for dimension, values in facet_values().items():
+        options = []
+        for value, label, _, value_params in values:
+            query = {key: v for key, v in params.items() if key not in DIMENSION_PARAMS[dimension] and key != 'cursor'}
+            query.update({key: v for key, v in value_params.items() if v != ''})
+            selected = all(str(params.get(key, '')) == str(v) for key, v in value_params.items())
+            options.append({
+                'value': value,
+                'label': label,
+                'count': counts[dimension].get(value, 0),
+                'url': '?' + urlencode(sorted(query.items())),
+                'selected': selected,
+            })
+        facets.append({'name': dimension, 'title': DIMENSION_TITLES[dimension], 'options': options})
+    return facets
@@ -0,0 +1,127 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.utils.http import urlencode
+
+from . import search
+from .models import Product, parse_volume
+
+
+def _decimal(value):
+    try:
+        return Decimal(value.replace(',', '.'))
+    except (InvalidOperation, AttributeError):
+        return None
+
+
+def _boolean(value):
+    value = value.lower()
+    if value in ('true', 'false'):
+        return value == 'true'
+    return None
+
+
+def matching_categories(value):
+    """Ключі категорій, у яких ключ або назва містить value (без урахування регістру й алфавіту)."""
+    folded = search.fold(value.strip())
+    keys = [key for key, label in Product.CATEGORY_CHOICES if folded in search.fold(key) or folded in search.fold(label)]
+    return keys + [value]
+
+
+class ProductFilter:
+    """
+    Розбирає GET-параметри каталогу продуктів у нормалізований вигляд (cleaned)
+    і застосовує їх до queryset. Некоректні значення мовчки ігноруються.
+    """
+    SORT_FIELDS = {
+        'name': 'name', '-name': '-name',
+        'abv': 'abv', '-abv': '-abv',
+        'volume': 'volume_litres', '-volume': '-volume_litres',
+    }
+    default_ordering = 'name'
+    PARAMS = (
+        'name', 'q', 'category', 'volume', 'volume_min', 'volume_max',
+        'abv_min', 'abv_max', 'is_kosher', 'is_limited', 'sort',
+    )
+
+    def __init__(self, params):
+        self.params = params
+        self.cleaned = self.clean(params)
+
+    def clean(self, params):
+        cleaned = {}
+        for key in ('name', 'q', 'category'):
+            value = params.get(key, '').strip()
+            if value:
+                cleaned[key] = value
+        for key in ('volume', 'volume_min', 'volume_max'):
+            value = parse_volume(params.get(key, ''))
+            if value is not None:
+                cleaned[key] = value
+        for key in ('abv_min', 'abv_max'):
+            value = _decimal(params.get(key, ''))
+            if value is not None and value.is_finite():
+                cleaned[key] = value
+        for key in ('is_kosher', 'is_limited'):
+            value = _boolean(params.get(key, ''))
+            if value is not None:
+                cleaned[key] = value
+        if params.get('sort') in self.SORT_FIELDS:
+            cleaned['sort'] = params['sort']
+        return cleaned
+
+    @property
+    def ordering(self):
+        if 'sort' in self.cleaned:
+            return self.SORT_FIELDS[self.cleaned['sort']]
+        # Під час пошуку сортуємо за релевантністю
+        if 'name' in self.cleaned or 'q' in self.cleaned:
+            return 'search_rank'
+        return self.default_ordering
+
+    def signature(self, exclude=()):
+        """Стабільний рядок для ключів кешу: однакові фільтри дають однаковий підпис."""
+        return urlencode(sorted((key, str(value)) for key, value in self.cleaned.items() if key not in exclude))
+
+    def search(self, queryset):
+        """Повнотекстові фільтри (не є фасетами)."""
+        cleaned = self.cleaned
+        if 'name' in cleaned:
+            queryset = search.filter_queryset(queryset, 'product', cleaned['name'], column='name')
+        if 'q' in cleaned:
+            queryset = search.filter_queryset(queryset, 'product', cleaned['q'], fallback_fields=('name', 'description'))
+        return queryset
+
+    def conditions(self):
+        """Умови фасетних вимірів: {вимір: Q}. Лише для тих вимірів, що задані в запиті."""
+        cleaned = self.cleaned
+        conditions = {}
+        if 'category' in cleaned:
+            conditions['category'] = Q(category__in=matching_categories(cleaned['category']))
+        volume = Q()
+        if 'volume' in cleaned:
+            volume &= Q(volume_litres=cleaned['volume'])
+        if 'volume_min' in cleaned:
+            volume &= Q(volume_litres__gte=cleaned['volume_min'])
+        if 'volume_max' in cleaned:
+            # 0 означає "об'єм невідомий" — такі продукти у верхню межу не потрапляють
+            volume &= Q(volume_litres__lte=cleaned['volume_max'], volume_litres__gt=0)
+        if volume:
+            conditions['volume'] = volume
+        abv = Q()
+        if 'abv_min' in cleaned:
+            abv &= Q(abv__gte=cleaned['abv_min'])
+        if 'abv_max' in cleaned:
+            abv &= Q(abv__lte=cleaned['abv_max'])
+        if abv:
+            conditions['abv'] = abv
+        for key in ('is_kosher', 'is_limited'):
+            if key in cleaned:
+                conditions[key] = Q(**{key: cleaned[key]})
+        return conditions
+
+    def apply(self, queryset):
+        queryset = self.search(queryset)
+        for condition in self.conditions().values():
+            queryset = queryset.filter(condition)
+        return queryset
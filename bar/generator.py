@@ -0,0 +1,275 @@
+"""
+Синтетичний каталог для перевірки масштабування (manage.py generate_catalog).
+
+Дані правдоподібні, а не рівномірні:
+  * назви кирилицею з тих самих слів, що й справжній асортимент;
+  * категорії за Ципфом — перша в CATEGORY_CHOICES найчисленніша;
+  * міцність і об'єм залежать від категорії, популярні об'єми частіші;
+  * інгредієнтів у коктейлі найчастіше 3–5 (INGREDIENT_COUNTS), а самі
+    інгредієнти теж за Ципфом — лід і лайм у кожному другому рецепті, рідкісні
+    сиропи лише в кількох;
+  * зображення — файли, що вже є в MEDIA_ROOT; похідні (image_variants)
+    копіюються з об'єктів з тим самим зображенням, якщо їх уже згенеровано.
+
+Усе визначається seed: окремий генератор для кожної таблиці, тож зміна
+--products не змінює коктейлів. Номери в назвах продовжують наявні рядки.
+
+Рядки пишуться bulk_create пачками по batch_size, кожна пачка — транзакція;
+FTS-індекс доповнюється тією ж пачкою (search.index_products,
+index_ingredients, index_cocktails). Сигнали не шлються, тож версії кешів генератор збільшує
+сам наприкінці, а похідні зображень, яких бракує, робить
+generate_image_derivatives.
+"""
+import itertools
+import os
+import random
+import time
+from bisect import bisect
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from . import images, search, thumbnails
+from .cache import bump_version
+from .models import Cocktail, CocktailIngredient, Ingredient, Product, parse_volume
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+BRANDS = (
+    'Козацька', 'Гетьманська', 'Полтавська', 'Карпатська', 'Хортицька', 'Київська', 'Січова', 'Волинська',
+    'Подільська', 'Слобожанська', 'Чумацька', 'Дніпровська', 'Поліська', 'Галицька', 'Таврійська',
+)
+FLAVOURS = {
+    'horilka': ('Класична', 'Пшенична', 'Житня', 'М\'яка', 'Льодова', 'Срібна', 'Золота', 'Органічна', 'Березова'),
+    'infusion': ('Перцева', 'Медова', 'Вишнева', 'Журавлинна', 'Смородинова', 'Калинова', 'Хрінова', 'Калганова',
+                 'Зубрівка', 'Лимонна', 'М\'ятна', 'Горіхова'),
+}
+NOUNS = {
+    'horilka': ('горілка',),
+    'infusion': ('настоянка', 'наливка', 'настоянка', 'хріновуха', 'медовуха'),
+}
+SERIES = ('', '', '', 'Преміум', 'Резерв', 'Люкс', 'Особлива', 'Експорт')
+# Міцність за категорією: (найчастіша, мінімум, максимум)
+ABV = {'horilka': (40, 37.5, 50), 'infusion': (35, 18, 45)}
+VOLUMES = {'0.5': 50, '0.7': 20, '1': 12, '0.25': 10, '0.375': 5, '0.2': 3}
+DESCRIPTIONS = (
+    'Виготовлено на м\'якій артезіанській воді.',
+    'Спирт класу "Люкс", тричі очищений.',
+    'Настояно на натуральній сировині без ароматизаторів.',
+    'Має м\'який смак і чистий аромат.',
+    'Найкраще подавати охолодженою до +6 °C.',
+    'Пасує до традиційних українських страв.',
+    'Витримано в дубових бочках.',
+    'Обмежена партія до свят.',
+)
+
+# Від найпопулярніших до рідкісних: порядок задає частоту в рецептах
+INGREDIENTS = (
+    'Лід', 'Горілка', 'Сік лайма', 'Цукровий сироп', 'Лимонний сік', 'Содова', 'Тонік', 'Апельсиновий сік',
+    'Журавлинний сік', "М'ята", 'Томатний сік', 'Імбирне пиво', 'Грейпфрутовий сік', 'Сіль', 'Перець чорний',
+    'Еспресо', 'Кавовий лікер', 'Triple sec', 'Гренадин', 'Мед', 'Вишневий сік', 'Яблучний сік', 'Ананасовий сік',
+    'Вершки', 'Кориця', 'Гвоздика', 'Бузиновий сироп', 'Малина', 'Чорниця', 'Огірок', 'Базилік', 'Розмарин',
+    'Ванільний сироп', 'Імбир', 'Табаско', 'Вустерширський соус', 'Селера', 'Кокосове молоко', 'Маракуя',
+    'Полуничне пюре', 'Персикове пюре', 'Медовуха', 'Хріновуха', 'Зубрівка', 'Ангостура', 'Яєчний білок',
+)
+VARIANTS = ('домашній', 'свіжий', 'заморожений', 'органічний', 'карамелізований', 'копчений', 'пряний')
+# Скільки інгредієнтів у коктейлі: вага
+INGREDIENT_COUNTS = {2: 8, 3: 22, 4: 28, 5: 20, 6: 12, 7: 6, 8: 3, 9: 1}
+QUANTITIES = ('10 мл', '15 мл', '20 мл', '25 мл', '30 мл', '40 мл', '45 мл', '50 мл', '60 мл', '90 мл', '120 мл',
+              '1 ч. л.', '2 скибки', '3 листки', '1 дрібка', 'до верху', 'до смаку')
+COCKTAIL_WORDS = ('Світанок', 'Бриз', 'Мул', 'Захід', 'Шторм', 'Вечір', 'Туман', 'Мед', 'Вогонь', 'Дим', 'Іній',
+                  'Сад', 'Жар', 'Степ', 'Ранок', 'Гроза')
+COCKTAIL_ADJECTIVES = ('Київський', 'Карпатський', 'Козацький', 'Нічний', 'Солоний', 'Кривавий', 'Золотий',
+                       'Журавлинний', 'Пряний', 'Медовий', 'Дикий', 'Кавовий', 'Морський', 'Осінній')
+
+
+def zipf_weights(n, s=1.1):
+    """Ваги рангів 1..n за законом Ципфа: перший елемент найчастіший."""
+    return [1 / (rank ** s) for rank in range(1, n + 1)]
+
+
+def _cumulative(weights):
+    return list(itertools.accumulate(weights))
+
+
+def _pick(rng, population, cumulative):
+    return population[bisect(cumulative, rng.random() * cumulative[-1])]
+
+
+def media_images(media_root=None):
+    """Оригінали зображень у MEDIA_ROOT (без похідних і мініатюр), відсортовані."""
+    media_root = media_root or settings.MEDIA_ROOT
+    skip = {images.DERIVATIVES_DIR, thumbnails.THUMBNAILS_DIR}
+    found = []
+    for directory, dirnames, filenames in os.walk(media_root):
+        if directory == str(media_root):
+            dirnames[:] = [name for name in dirnames if name not in skip]
+        for filename in filenames:
+            if filename.lower().endswith(IMAGE_EXTENSIONS):
+                found.append(os.path.relpath(os.path.join(directory, filename), media_root).replace(os.sep, '/'))
+    return sorted(found)
+
+
+def known_variants(using='default'):
+    """{ім'я зображення: image_variants} з уже згенерованих похідних — їх можна перевикористати."""
+    variants = {}
+    for model in (Product, Cocktail):
+        rows = model.objects.using(using).exclude(image_variants={}).values_list('image', 'image_variants')
+        for name, value in rows.iterator(chunk_size=2000):
+            if (value or {}).get('source') == name:
+                variants.setdefault(name, value)
+    return variants
+
+
+def ingredient_names(count):
+    """count різних назв: спершу базові, далі варіанти ("Мед (домашній)"), далі з номером."""
+    names = list(INGREDIENTS[:count])
+    variants = (f'{name} ({variant})' for variant in VARIANTS for name in INGREDIENTS)
+    names += itertools.islice(variants, max(0, count - len(names)))
+    names += [f'{INGREDIENTS[i % len(INGREDIENTS)]} №{i}' for i in range(len(names), count)]
+    return names
+
+
+class CatalogGenerator:
+    """
+    generate() додає products продуктів, ingredients інгредієнтів і cocktails
+    коктейлів з рецептами; progress(kind, done, total, elapsed) — після кожної пачки.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, using='default', index=True, progress=None, media_root=None):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.using = using
+        self.index = index and search.is_available(using)
+        self.progress = progress or (lambda kind, done, total, elapsed: None)
+        self.images = media_images(media_root) or ['']
+        self.variants = known_variants(using)
+
+    def rng(self, kind):
+        # Рядковий seed детермінований (sha512), окремий потік на таблицю
+        return random.Random(f'{self.seed}:{kind}')
+
+    def _batches(self, kind, objects, total, write):
+        started = time.perf_counter()
+        done = 0
+        while True:
+            batch = list(itertools.islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic(using=self.using):
+                write(batch)
+            done += len(batch)
+            self.progress(kind, done, total, time.perf_counter() - started)
+        return done
+
+    def _objects(self, model):
+        return model.objects.using(self.using)
+
+    def _image(self, rng):
+        name = rng.choice(self.images)
+        return name, self.variants.get(name, {})
+
+    # --- Продукти ---
+    def products(self, count, start):
+        rng = self.rng('product')
+        categories = [key for key, _ in Product.CATEGORY_CHOICES]
+        category_weights = _cumulative(zipf_weights(len(categories), s=2))
+        volumes = list(VOLUMES)
+        volume_weights = _cumulative(VOLUMES.values())
+        for number in range(start, start + count):
+            category = _pick(rng, categories, category_weights)
+            mode, low, high = ABV.get(category, (40, 18, 50))
+            volume = _pick(rng, volumes, volume_weights)
+            name = ' '.join(filter(None, (
+                rng.choice(BRANDS), rng.choice(FLAVOURS.get(category, FLAVOURS['horilka'])),
+                rng.choice(NOUNS.get(category, NOUNS['horilka'])), rng.choice(SERIES), f'№{number}',
+            )))
+            image, variants = self._image(rng)
+            yield Product(
+                name=name,
+                description=' '.join(rng.sample(DESCRIPTIONS, rng.randint(1, 3))),
+                category=category,
+                abv=Decimal(str(round(rng.triangular(low, high, mode) * 2) / 2)),
+                volume=volume,
+                volume_litres=parse_volume(volume),
+                image=image,
+                image_variants=variants,
+                is_kosher=rng.random() < 0.1,
+                is_limited=rng.random() < 0.05,
+            )
+
+    def write_products(self, batch):
+        created = Product.objects.using(self.using).bulk_create(batch)
+        if self.index:
+            search.index_products(created, using=self.using)
+
+    # --- Інгредієнти ---
+    def write_ingredients(self, batch):
+        created = Ingredient.objects.using(self.using).bulk_create(batch)
+        if self.index:
+            search.index_ingredients(created, using=self.using)
+
+    # --- Коктейлі ---
+    def cocktails(self, count, start, ingredient_ids):
+        rng = self.rng('cocktail')
+        popularity = _cumulative(zipf_weights(len(ingredient_ids), s=1.1))
+        sizes = list(INGREDIENT_COUNTS)
+        size_weights = _cumulative(INGREDIENT_COUNTS.values())
+        for number in range(start, start + count):
+            size = min(_pick(rng, sizes, size_weights), len(ingredient_ids))
+            recipe = []
+            while len(recipe) < size:
+                ingredient_id = _pick(rng, ingredient_ids, popularity)
+                if ingredient_id not in recipe:
+                    recipe.append(ingredient_id)
+            image, variants = self._image(rng)
+            cocktail = Cocktail(
+                name=f'{rng.choice(COCKTAIL_ADJECTIVES)} {rng.choice(COCKTAIL_WORDS)} №{number}',
+                description=rng.choice(DESCRIPTIONS),
+                image=image,
+                image_variants=variants,
+            )
+            cocktail.recipe = [(ingredient_id, rng.choice(QUANTITIES)) for ingredient_id in recipe]
+            yield cocktail
+
+    def write_cocktails(self, batch):
+        created = Cocktail.objects.using(self.using).bulk_create(batch)
+        CocktailIngredient.objects.using(self.using).bulk_create([
+            CocktailIngredient(cocktail_id=cocktail.pk, ingredient_id=ingredient_id, quantity=quantity)
+            for cocktail in created for ingredient_id, quantity in cocktail.recipe
+        ], batch_size=self.batch_size)
+        if self.index:
+            search.index_cocktails([cocktail.pk for cocktail in created], using=self.using)
+
+    def generate(self, products=0, cocktails=0, ingredients=0):
+        """Повертає кількість створених рядків за таблицями."""
+        created = {'product': 0, 'ingredient': 0, 'cocktail': 0, 'cocktailingredient': 0}
+
+        existing = set(self._objects(Ingredient).values_list('name', flat=True).iterator(chunk_size=5000))
+        names = [name for name in ingredient_names(ingredients + len(existing)) if name not in existing][:ingredients]
+        created['ingredient'] = self._batches(
+            'ingredient', (Ingredient(name=name) for name in names), len(names), self.write_ingredients,
+        )
+        created['product'] = self._batches(
+            'product', self.products(products, self._objects(Product).count() + 1), products, self.write_products,
+        )
+        if cocktails:
+            # Популярність — за порядком створення: базові інгредієнти раніше за варіанти
+            ingredient_ids = list(self._objects(Ingredient).order_by('pk').values_list('pk', flat=True))
+            if not ingredient_ids:
+                raise ValueError('Для коктейлів потрібні інгредієнти (--ingredients).')
+            before = self._objects(CocktailIngredient).count()
+            created['cocktail'] = self._batches(
+                'cocktail', self.cocktails(cocktails, self._objects(Cocktail).count() + 1, ingredient_ids), cocktails,
+                self.write_cocktails,
+            )
+            created['cocktailingredient'] = self._objects(CocktailIngredient).count() - before
+
+        # bulk_create не шле сигналів: кеші сторінок, ETag і індекс "що я можу приготувати"
+        # інших процесів оновляться за версіями
+        for model, kind in ((Product, 'product'), (Ingredient, 'ingredient'), (Cocktail, 'cocktail'),
+                            (CocktailIngredient, 'cocktailingredient')):
+            if created[kind]:
+                bump_version(model)
+        return created
@@ -0,0 +1,148 @@
+"""
+Адаптивні похідні зображень Product і Cocktail.
+
+Для кожного оригіналу генеруються зменшені копії кількох ширин (IMAGE_WIDTHS)
+у WebP і JPEG (для браузерів без WebP). Опис похідних зберігається в полі
+image_variants моделі, тому шаблону не треба ходити на диск, щоб скласти srcset
+(див. bar/templatetags/bar_images.py). Поле містить ім'я оригіналу, з якого
+похідні зроблено: якщо в адмінці завантажили нове зображення, старі похідні
+просто ігноруються, доки не згенеруються нові.
+
+Генерація йде в пулі процесів після коміту (signals.py), щоб не тримати запит
+адмінки і не ділити GIL з воркером. Сама функція render() не залежить від
+Django ORM і працює в дочірньому процесі лише з файлами.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .cache import bump_version
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = 'derivatives'
+FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_WIDTHS', (320, 640, 960, 1280))))
+
+
+def get_quality():
+    return getattr(settings, 'IMAGE_QUALITY', 80)
+
+
+def derivative_name(name, width, fmt):
+    """
+    'product_images/a.png' -> 'derivatives/product_images/a.png-320w.webp'. Розширення
+    оригіналу лишається в імені: інакше a.png і a.jpg перезаписували б похідні одне одного.
+    """
+    return f'{DERIVATIVES_DIR}/{name}-{width}w.{EXTENSIONS[fmt]}'
+
+
+def render(media_root, name, widths, quality=80):
+    """
+    Генерує похідні одного оригіналу. Ширини, більші за оригінал, замінюються
+    шириною оригіналу (зображення не збільшуємо). Повертає значення image_variants.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(media_root, name)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    original_width, original_height = image.size
+    targets = sorted({min(width, original_width) for width in widths})
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    webp_source = image.convert('RGBA' if has_alpha else 'RGB')
+    if has_alpha:
+        # JPEG не має прозорості — кладемо на білий фон
+        jpeg_source = Image.new('RGB', image.size, (255, 255, 255))
+        jpeg_source.paste(webp_source, mask=webp_source.getchannel('A'))
+    else:
+        jpeg_source = webp_source
+
+    variants = {'source': name, 'width': original_width, 'height': original_height}
+    for fmt, source in (('webp', webp_source), ('jpeg', jpeg_source)):
+        variants[fmt] = []
+        for width in targets:
+            height = max(1, round(original_height * width / original_width))
+            resized = source if width == original_width else source.resize((width, height), Image.LANCZOS)
+            target = derivative_name(name, width, fmt)
+            path = os.path.join(media_root, target)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            options = {'quality': quality}
+            if fmt == 'jpeg':
+                options.update(optimize=True, progressive=True)
+            else:
+                options['method'] = 4
+            resized.save(path, FORMATS[fmt], **options)
+            variants[fmt].append([width, target])
+    return variants
+
+
+def needs_derivatives(instance):
+    name = instance.image.name if instance.image else ''
+    return bool(name) and (instance.image_variants or {}).get('source') != name
+
+
+def store(model, pk, variants):
+    """Записує image_variants, якщо зображення з того часу не змінилось."""
+    updated = model.objects.filter(pk=pk, image=variants['source']).update(
+        image_variants=variants, updated_at=timezone.now(),
+    )
+    if updated:
+        # update() не шле сигналів — інвалідовуємо кеші сторінок самі
+        bump_version(model)
+    return updated
+
+
+def generate(model, pk, name):
+    """Синхронна генерація в поточному процесі."""
+    try:
+        variants = render(settings.MEDIA_ROOT, name, get_widths(), get_quality())
+    except (OSError, ValueError) as exc:
+        logger.warning('Не вдалося згенерувати похідні для %s: %s', name, exc)
+        return None
+    store(model, pk, variants)
+    return variants
+
+
+_lock = threading.Lock()
+_executor = None
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # spawn, а не fork: воркер gunicorn має потоки і відкриті з'єднання з БД
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_WORKERS', 2), mp_context=get_context('spawn'),
+            )
+        return _executor
+
+
+def schedule(model, pk, name):
+    """Ставить генерацію в пул процесів; IMAGE_WORKERS = 0 — генерувати одразу."""
+    if not getattr(settings, 'IMAGE_WORKERS', 2):
+        return generate(model, pk, name)
+    future = get_executor().submit(render, settings.MEDIA_ROOT, name, get_widths(), get_quality())
+
+    def done(future):
+        # Викликається в службовому потоці пулу, тут своє з'єднання з БД
+        try:
+            store(model, pk, future.result())
+        except Exception:
+            logger.exception('Не вдалося згенерувати похідні для %s', name)
+        finally:
+            close_old_connections()
+    future.add_done_callback(done)
+    return future
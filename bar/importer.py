@@ -0,0 +1,435 @@
+"""
+Масовий імпорт каталогу (manage.py import_catalog).
+
+Вхід читається потоком, запис за записом:
+  * JSON Lines — {"type": "product", "name": ..., ...} в кожному рядку;
+  * JSON — масив таких записів або фікстура Django (як Initial_Data.json);
+  * CSV — один тип записів на файл (--kind), інгредієнти коктейлю в колонці
+    ingredients: "Горілка: 40 мл; Томатний сік: 60 мл".
+
+Природні ключі — назва продукту, коктейлю, інгредієнта і пара (коктейль,
+інгредієнт). Записи накопичуються пачками по batch_size; кожна пачка — одна
+транзакція: один SELECT існуючих об'єктів за назвами, full_clean() кожного рядка
+без звернень до БД, bulk_create для нових і bulk_update лише для змінених (у
+незмінених лишається updated_at, тож ETag і статичний експорт їх не чіпають).
+Інгредієнти шукаються за назвою в словнику в пам'яті, відсутні створюються.
+
+bulk_* не шлють сигналів, тому те, що роблять signals.py (FTS-індекс, версії
+кешів, індекс "що я можу приготувати"), імпорт робить сам для кожної пачки.
+Похідні зображень генерує окрема команда generate_image_derivatives.
+"""
+import csv
+import json
+import time
+
+from django.core.exceptions import ValidationError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import images, makeable, search
+from .cache import bump_version
+from .models import Cocktail, CocktailIngredient, Ingredient, Product, parse_volume
+
+KINDS = ('product', 'ingredient', 'cocktail', 'cocktailingredient')
+# Поля, які можна задати в записі (крім name)
+FIELDS = {
+    Product: ('description', 'category', 'abv', 'volume', 'image', 'is_kosher', 'is_limited'),
+    Cocktail: ('description', 'image'),
+}
+# Булеві значення з CSV
+BOOLEANS = {'true': True, '1': True, 'yes': True, 'так': True, 'false': False, '0': False, 'no': False, 'ні': False, '': False}
+READ_CHUNK = 64 * 1024
+MAX_REPORTED_ERRORS = 100
+
+
+class RecordError(ValueError):
+    """Запис не можна імпортувати; потрапляє у звіт з номером рядка."""
+
+
+# --- Читання входу ---
+
+def read_jsonl(f):
+    for line_number, line in enumerate(f, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def read_json(f):
+    """Елементи JSON-масиву по одному, не завантажуючи весь файл (raw_decode по буферу)."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    index = 0
+    eof = False
+    while True:
+        # Пропускаємо пробіли й коми між елементами
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or eof:
+                break
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+        if position >= len(buffer):
+            if started:
+                raise RecordError('JSON-масив не закрито')
+            return
+        if not started:
+            if buffer[position] != '[':
+                raise RecordError('Очікувався JSON-масив')
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(READ_CHUNK)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        index += 1
+        yield index, value
+        position = end
+        if position > READ_CHUNK:
+            buffer, position = buffer[position:], 0
+
+
+def parse_ingredients(value):
+    """'Горілка: 40 мл; Лайм' -> [('Горілка', '40 мл'), ('Лайм', '')]"""
+    items = []
+    for part in (value or '').split(';'):
+        name, _, quantity = part.partition(':')
+        if name.strip():
+            items.append((name.strip(), quantity.strip()))
+    return items
+
+
+def records(f, fmt, kind=None):
+    """(номер рядка або елемента, запис) з файлу f у форматі 'jsonl', 'json' або 'csv'."""
+    if fmt == 'csv':
+        reader = csv.DictReader(f)
+        for row in reader:
+            record = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+            record['type'] = kind
+            yield reader.line_num, record
+        return
+    items = read_jsonl(f) if fmt == 'jsonl' else read_json(f)
+    for number, item in items:
+        if isinstance(item, str):
+            try:
+                item = json.loads(item)
+            except ValueError as exc:
+                yield number, exc
+                continue
+        yield number, item
+
+
+# --- Запис ---
+
+class CatalogImporter:
+    """
+    Імпорт потоку записів пачками по batch_size. progress(stats) викликається
+    після кожної пачки; run() повертає статистику.
+    """
+
+    def __init__(self, batch_size=1000, using='default', progress=None):
+        self.batch_size = batch_size
+        self.using = using
+        self.progress = progress or (lambda stats: None)
+        self.stats = {
+            'records': 0, 'skipped': 0, 'errors': 0, 'error_messages': [], 'batches': 0,
+            'created': {kind: 0 for kind in KINDS}, 'updated': {kind: 0 for kind in KINDS},
+            'unchanged': {kind: 0 for kind in KINDS}, 'needs_images': 0, 'elapsed': 0.0,
+        }
+        self.ingredients = None  # назва -> pk, завантажується при першій пачці
+        # pk з фікстури -> назва, щоб розв'язати записи bar.cocktailingredient
+        self.fixture_names = {'cocktail': {}, 'ingredient': {}}
+        self._reset_batch()
+
+    def _reset_batch(self):
+        self.batch = {'product': [], 'ingredient': [], 'cocktail': [], 'cocktailingredient': []}
+        self.batch_size_now = 0
+
+    def error(self, number, message):
+        self.stats['errors'] += 1
+        if len(self.stats['error_messages']) < MAX_REPORTED_ERRORS:
+            self.stats['error_messages'].append(f'{number}: {message}')
+
+    def run(self, items):
+        started = time.perf_counter()
+        for number, record in items:
+            self.stats['records'] += 1
+            if isinstance(record, Exception):
+                self.error(number, record)
+                continue
+            try:
+                self.add(number, record)
+            except RecordError as exc:
+                self.error(number, exc)
+                continue
+            if self.batch_size_now >= self.batch_size:
+                self.flush()
+                self.stats['elapsed'] = time.perf_counter() - started
+                self.progress(self.stats)
+        if self.batch_size_now:
+            self.flush()
+        self.stats['elapsed'] = time.perf_counter() - started
+        return self.stats
+
+    def add(self, number, record):
+        """Нормалізує запис (власний формат або фікстура Django) і додає до пачки."""
+        if not isinstance(record, dict):
+            raise RecordError('запис має бути об\'єктом')
+        if 'model' in record:
+            app_label, _, kind = str(record['model']).lower().partition('.')
+            data = dict(record.get('fields') or {})
+            if app_label != 'bar' or kind not in KINDS:
+                # AboutPage, ContactInfo тощо — не каталог
+                self.stats['skipped'] += 1
+                return
+            if kind in self.fixture_names and 'pk' in record:
+                self.fixture_names[kind][record['pk']] = data.get('name')
+            if kind == 'cocktailingredient':
+                data['cocktail'] = self.fixture_names['cocktail'].get(data.get('cocktail'))
+                data['ingredient'] = self.fixture_names['ingredient'].get(data.get('ingredient'))
+        else:
+            data = dict(record)
+            kind = str(data.pop('type', '')).lower()
+            if kind not in KINDS:
+                raise RecordError(f"невідомий type {kind!r}")
+
+        if kind == 'cocktailingredient':
+            cocktail, ingredient = data.get('cocktail'), data.get('ingredient')
+            if not isinstance(cocktail, str) or not isinstance(ingredient, str) or not cocktail.strip() or not ingredient.strip():
+                raise RecordError('cocktail та ingredient мають бути назвами (або pk записів з цієї ж фікстури)')
+            self.batch[kind].append((number, (cocktail.strip(), ingredient.strip(), str(data.get('quantity') or ''))))
+        else:
+            name = data.get('name')
+            if not isinstance(name, str) or not name.strip():
+                raise RecordError('name обов\'язковий')
+            data['name'] = name.strip()
+            if kind == 'cocktail' and 'ingredients' in data:
+                data['ingredients'] = self._recipe(data['ingredients'])
+            self.batch[kind].append((number, data))
+        self.batch_size_now += 1
+
+    def _recipe(self, value):
+        if isinstance(value, str):
+            return parse_ingredients(value)
+        if not isinstance(value, list):
+            raise RecordError('ingredients має бути списком або рядком "назва: кількість; ..."')
+        items = []
+        for item in value:
+            if isinstance(item, str):
+                item = {'name': item}
+            if not isinstance(item, dict) or not str(item.get('name') or '').strip():
+                raise RecordError('кожен інгредієнт має мати name')
+            items.append((str(item['name']).strip(), str(item.get('quantity') or '').strip()))
+        return items
+
+    def flush(self):
+        batch = self.batch
+        self._reset_batch()
+        touched_models = set()
+        touched_cocktails = set()
+        with transaction.atomic(using=self.using):
+            if self.ingredients is None:
+                self.ingredients = {}
+                for pk, name in Ingredient.objects.using(self.using).order_by('-pk').values_list('pk', 'name').iterator(chunk_size=5000):
+                    self.ingredients[name] = pk  # з дублікатів перемагає найменший pk
+            names = {data['name'] for _, data in batch['ingredient']}
+            names |= {name for _, data in batch['cocktail'] for name, _ in data.get('ingredients', ())}
+            names |= {ingredient for _, (_, ingredient, _) in batch['cocktailingredient']}
+            if self._ensure_ingredients(names, explicit={data['name'] for _, data in batch['ingredient']}):
+                touched_models.add(Ingredient)
+
+            products = self._upsert(Product, 'product', batch['product'])
+            if products['changed']:
+                touched_models.add(Product)
+                search.index_products(products['changed'], using=self.using)
+
+            cocktails = self._upsert(Cocktail, 'cocktail', batch['cocktail'])
+            if cocktails['changed']:
+                touched_models.add(Cocktail)
+                touched_cocktails |= {obj.pk for obj in cocktails['changed']}
+
+            recipes = {}
+            for _, data in batch['cocktail']:
+                cocktail = cocktails['objects'].get(data['name'])
+                if cocktail is not None and cocktail.pk is not None and 'ingredients' in data:
+                    recipes[cocktail.pk] = data['ingredients']
+            lines = self._resolve_lines(batch['cocktailingredient'], cocktails['objects'])
+            changed_recipes = self._write_recipes(recipes, replace=True) | self._write_recipes(lines, replace=False)
+            if changed_recipes:
+                touched_models.add(CocktailIngredient)
+                touched_cocktails |= changed_recipes
+            if touched_cocktails:
+                search.index_cocktails(touched_cocktails, using=self.using)
+
+            def after_commit():
+                for model in touched_models:
+                    bump_version(model)
+                if changed_recipes:
+                    makeable.refresh_cocktails(changed_recipes, using=self.using)
+            # Як і в signals.py: версії — одразу і ще раз після коміту
+            for model in touched_models:
+                bump_version(model)
+            transaction.on_commit(after_commit, using=self.using)
+        self.stats['batches'] += 1
+
+    def _ensure_ingredients(self, names, explicit):
+        missing = sorted(name for name in names if name not in self.ingredients)
+        self.stats['unchanged']['ingredient'] += len(explicit) - len(set(missing) & explicit)
+        if not missing:
+            return False
+        created = Ingredient.objects.using(self.using).bulk_create(
+            [Ingredient(name=name) for name in missing], batch_size=self.batch_size,
+        )
+        for ingredient in created:
+            self.ingredients[ingredient.name] = ingredient.pk
+        search.index_ingredients(created, using=self.using)
+        self.stats['created']['ingredient'] += len(created)
+        return True
+
+    def _upsert(self, model, kind, rows):
+        """Створює нові й оновлює змінені об'єкти; повертає {'objects': {назва: об'єкт}, 'changed': [...]}."""
+        objects = {}
+        if not rows:
+            return {'objects': objects, 'changed': []}
+        names = {data['name'] for _, data in rows}
+        existing = {}
+        for obj in model.objects.using(self.using).filter(name__in=names).order_by('-pk'):
+            existing[obj.name] = obj
+        fields = FIELDS[model]
+        created, updated = {}, {}
+        for number, data in rows:
+            name = data['name']
+            obj = objects.get(name) or existing.get(name) or model(name=name)
+            changed = False
+            for field in fields:
+                if field not in data:
+                    continue
+                value = data[field]
+                if value is None:
+                    value = ''
+                model_field = model._meta.get_field(field)
+                if isinstance(value, str) and model_field.get_internal_type() == 'BooleanField':
+                    value = BOOLEANS.get(value.strip().lower(), value)
+                try:
+                    value = model_field.to_python(value)
+                except ValidationError as exc:
+                    self.error(number, f'{field}: {"; ".join(exc.messages)}')
+                    break
+                if getattr(obj, field) != value:
+                    setattr(obj, field, value)
+                    changed = True
+            else:
+                if model is Product:
+                    # Як у Product.save(), який bulk_* не викликають
+                    obj.volume_litres = parse_volume(obj.volume) or 0
+                try:
+                    obj.full_clean(exclude=('image_variants',), validate_unique=False, validate_constraints=False)
+                except ValidationError as exc:
+                    self.error(number, '; '.join(f'{key}: {" ".join(messages)}' for key, messages in exc.message_dict.items()))
+                    continue
+                objects[name] = obj
+                if obj.pk is None:
+                    created[name] = obj
+                elif changed:
+                    updated[obj.pk] = obj
+                elif obj.pk not in updated:
+                    self.stats['unchanged'][kind] += 1
+
+        now = timezone.now()
+        created = model.objects.using(self.using).bulk_create(list(created.values()), batch_size=self.batch_size)
+        for obj in updated.values():
+            obj.updated_at = now
+        model.objects.using(self.using).bulk_update(
+            list(updated.values()), fields=list(fields) + ['updated_at'] + (['volume_litres'] if model is Product else []),
+            batch_size=self.batch_size,
+        )
+        self.stats['created'][kind] += len(created)
+        self.stats['updated'][kind] += len(updated)
+        changed = created + list(updated.values())
+        self.stats['needs_images'] += sum(1 for obj in changed if images.needs_derivatives(obj))
+        return {'objects': objects, 'changed': changed}
+
+    def _resolve_lines(self, lines, cocktails):
+        """Рядки bar.cocktailingredient -> {pk коктейлю: [(інгредієнт, кількість)]}."""
+        names = {cocktail for _, (cocktail, _, _) in lines if cocktail not in cocktails}
+        known = {}
+        if names:
+            for pk, name in Cocktail.objects.using(self.using).filter(name__in=names).order_by('-pk').values_list('pk', 'name'):
+                known[name] = pk
+        known.update({name: obj.pk for name, obj in cocktails.items()})
+        result = {}
+        for number, (cocktail, ingredient, quantity) in lines:
+            if cocktail not in known:
+                self.error(number, f'коктейль {cocktail!r} не знайдено')
+                continue
+            result.setdefault(known[cocktail], []).append((ingredient, quantity))
+        return result
+
+    def _write_recipes(self, recipes, replace):
+        """
+        Приводить CocktailIngredient до recipes: {pk коктейлю: [(назва інгредієнта, кількість)]}.
+        replace=True — рецепт повний, зайві рядки видаляються. Повертає pk змінених коктейлів.
+        """
+        if not recipes:
+            return set()
+        existing = {}
+        duplicates = []
+        rows = CocktailIngredient.objects.using(self.using).filter(cocktail_id__in=recipes).order_by('pk')
+        for item in rows:
+            key = (item.cocktail_id, item.ingredient_id)
+            if key in existing:
+                duplicates.append(item)
+            else:
+                existing[key] = item
+        to_create, to_update, to_delete = [], {}, []
+        changed = set()
+        wanted = set()
+        for cocktail_id, items in recipes.items():
+            for name, quantity in items:
+                key = (cocktail_id, self.ingredients[name])
+                wanted.add(key)
+                item = existing.get(key)
+                if item is None:
+                    item = CocktailIngredient(cocktail_id=cocktail_id, ingredient_id=key[1], quantity=quantity)
+                    existing[key] = item
+                    to_create.append(item)
+                    changed.add(cocktail_id)
+                elif item.quantity != quantity:
+                    item.quantity = quantity
+                    if item.pk is not None:
+                        to_update[item.pk] = item
+                    changed.add(cocktail_id)
+                elif item.pk is not None and item.pk not in to_update:
+                    self.stats['unchanged']['cocktailingredient'] += 1
+        if replace:
+            to_delete = [item.pk for key, item in existing.items() if key not in wanted and item.pk is not None]
+            to_delete += [item.pk for item in duplicates]
+            changed |= {item.cocktail_id for key, item in existing.items() if key not in wanted}
+            changed |= {item.cocktail_id for item in duplicates}
+        CocktailIngredient.objects.using(self.using).bulk_create(to_create, batch_size=self.batch_size)
+        now = timezone.now()
+        for item in to_update.values():
+            item.updated_at = now
+        CocktailIngredient.objects.using(self.using).bulk_update(
+            list(to_update.values()), fields=['quantity', 'updated_at'], batch_size=self.batch_size,
+        )
+        if to_delete:
+            # QuerySet.delete() шле post_delete на кожен рядок — видаляємо напряму
+            connection = connections[self.using]
+            table = connection.ops.quote_name(CocktailIngredient._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.executemany(f'DELETE FROM {table} WHERE id = %s', [(pk,) for pk in to_delete])
+        self.stats['created']['cocktailingredient'] += len(to_create)
+        self.stats['updated']['cocktailingredient'] += len(to_update)
+        return changed
@@ -0,0 +1,443 @@
+"""
+Інструментування запитів: SQL, шаблони й загальний час за іменем маршруту.
+
+InstrumentationMiddleware (перший у MIDDLEWARE) заводить на час запиту
+RequestStats у ContextVar. Туди пишуть:
+  - sql_wrapper — обгортка execute() кожного з'єднання (ставиться на
+    connection_created), тож рахуються й запити async ORM у потоках
+    sync_to_async: вони бачать той самий контекст;
+  - InstrumentedTemplates — бекенд шаблонів (TEMPLATES у settings), міряє
+    рендер шаблону верхнього рівня; {% include %} і {% extends %} входять у нього.
+
+Відповідь отримує заголовок Server-Timing (SERVER_TIMING) — лише в DEBUG або
+для staff, бо він розкриває час SQL і шаблонів:
+    sql;dur=12.3;desc="5 queries", tpl;dur=4.1, app;dur=25.0
+app — увесь час запиту в Django, тож те, що не SQL і не шаблони, — код view
+і middleware. Потокові відповіді (JSON API) читають базу вже після
+заголовків: їхні запити потрапляють у метрики, коли тіло дочитано.
+
+Метрики — гістограми часу запиту й суми SQL/шаблонів за маршрутом
+(bar:product_list, admin:index, ...) — агрегуються в пам'яті процесу. Якщо
+задано METRICS_DIR, кожен процес не пізніше ніж через METRICS_FLUSH_SECONDS
+після запиту й на виході скидає свої лічильники у власний файл
+<pid>-<мітка>.json, а /metrics/ додає
+файли всіх воркерів gunicorn; лічильники завершених воркерів лишаються в сумі.
+Так само агрегуються лічильники інших модулів (registry.count, COUNTERS) —
+напр. влучання кешу сторінок (bar/pagecache.py).
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.template.backends.django import DjangoTemplates
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UNMATCHED = '<unmatched>'  # запит не дійшов до view (404 резолвера, редирект CommonMiddleware)
+# Лічильники registry.count: ім'я метрики -> (назва мітки або None, опис)
+COUNTERS = {
+    'bar_page_cache_hits_total': ('view', 'Влучань у кеш сторінок.'),
+    'bar_page_cache_misses_total': ('view', 'Промахів кешу сторінок.'),
+    'bar_page_cache_bytes_total': (None, 'Байтів сторінок, записаних у кеш.'),
+}
+
+
+class RequestStats:
+    __slots__ = ('sql_count', 'sql_time', 'template_time', 'template_depth')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+
+_stats = ContextVar('bar_request_stats', default=None)
+
+
+def current():
+    """RequestStats поточного запиту; None поза InstrumentationMiddleware."""
+    return _stats.get()
+
+
+# --- SQL ---
+def sql_wrapper(execute, sql, params, many, context):
+    stats = _stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def install(connection):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+@receiver(connection_created)
+def _on_connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+# --- Шаблони ---
+class TimedTemplate:
+    """Обгортка шаблону бекенда: решта атрибутів (origin, template) — від оригіналу."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _stats.get()
+        if stats is None:
+            return self.template.render(context, request)
+        # render_to_string усередині шаблонного тегу вже входить у зовнішній рендер
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_depth -= 1
+            if not stats.template_depth:
+                stats.template_time += time.perf_counter() - started
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+# --- Метрики процесу ---
+def get_buckets():
+    return tuple(getattr(settings, 'METRICS_BUCKETS', DEFAULT_BUCKETS))
+
+
+class Registry:
+    """Лічильники за маршрутом: {route: {'buckets', 'count', 'sum', 'sql_queries', 'sql_seconds', 'template_seconds', 'responses'}}."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.counters = {}
+        self.pid = None
+        self.token = None
+        self.flushed_at = 0.0
+        self.timer = None
+
+    def _check_process(self):
+        # Після fork дитина починає з нуля: лічильники батька вже у файлі батька.
+        # Мітка, а не лише pid, — новий воркер з тим самим pid не перезапише файл старого.
+        if self.pid != os.getpid():
+            if self.pid is not None:
+                self.routes = {}
+                self.counters = {}
+            self.pid = os.getpid()
+            self.token = uuid.uuid4().hex[:8]
+
+    def observe(self, route, status, duration, stats):
+        buckets = get_buckets()
+        with self.lock:
+            self._check_process()
+            row = self.routes.get(route)
+            if row is None:
+                row = self.routes[route] = {
+                    'buckets': [0] * len(buckets), 'count': 0, 'sum': 0.0,
+                    'sql_queries': 0, 'sql_seconds': 0.0, 'template_seconds': 0.0, 'responses': {},
+                }
+            for index, bound in enumerate(buckets):
+                if duration <= bound:
+                    row['buckets'][index] += 1
+            row['count'] += 1
+            row['sum'] += duration
+            row['sql_queries'] += stats.sql_count
+            row['sql_seconds'] += stats.sql_time
+            row['template_seconds'] += stats.template_time
+            row['responses'][str(status)] = row['responses'].get(str(status), 0) + 1
+        if getattr(settings, 'METRICS_DIR', ''):
+            self.schedule_flush()
+
+    def count(self, name, label='', delta=1):
+        """Лічильник COUNTERS[name] з міткою label; без запису в кеш чи на диск на кожен виклик."""
+        with self.lock:
+            self._check_process()
+            values = self.counters.setdefault(name, {})
+            values[label] = values.get(label, 0) + delta
+        if getattr(settings, 'METRICS_DIR', ''):
+            self.schedule_flush()
+
+    def schedule_flush(self):
+        """Скидає одразу, якщо інтервал минув, інакше — таймером, щоб і тихий воркер віддав останні запити."""
+        interval = getattr(settings, 'METRICS_FLUSH_SECONDS', 1)
+        wait = interval - (time.monotonic() - self.flushed_at)
+        if wait <= 0:
+            self.flush()
+            return
+        with self.lock:
+            if self.timer is not None and self.timer.is_alive():
+                return
+            self.timer = threading.Timer(wait, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'buckets': list(get_buckets()),
+                'routes': json.loads(json.dumps(self.routes)),
+                'counters': json.loads(json.dumps(self.counters)),
+            }
+
+    def flush(self):
+        """Скидає лічильники процесу у файл METRICS_DIR (якщо задано)."""
+        self.flushed_at = time.monotonic()
+        directory = getattr(settings, 'METRICS_DIR', '')
+        if not directory:
+            return
+        with self.lock:
+            self._check_process()
+            path = os.path.join(directory, f'{self.pid}-{self.token}.json')
+        data = self.snapshot()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+    def reset(self):
+        with self.lock:
+            self.routes = {}
+            self.counters = {}
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+@receiver(setting_changed)
+def _reset_on_settings_change(setting, **kwargs):
+    if setting in ('METRICS_DIR', 'METRICS_BUCKETS'):
+        registry.reset()
+
+
+def collect():
+    """Сума лічильників усіх процесів з METRICS_DIR; без нього — лише цього процесу."""
+    directory = getattr(settings, 'METRICS_DIR', '')
+    if not directory:
+        return registry.snapshot()
+    registry.flush()
+    merged = {'buckets': list(get_buckets()), 'routes': {}, 'counters': {}}
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # файл щойно замінено або пошкоджено — наступний скрейп його прочитає
+        if data.get('buckets') != merged['buckets']:
+            continue
+        for route, row in data['routes'].items():
+            target = merged['routes'].setdefault(route, {
+                'buckets': [0] * len(merged['buckets']), 'count': 0, 'sum': 0.0,
+                'sql_queries': 0, 'sql_seconds': 0.0, 'template_seconds': 0.0, 'responses': {},
+            })
+            target['buckets'] = [a + b for a, b in zip(target['buckets'], row['buckets'])]
+            for key in ('count', 'sum', 'sql_queries', 'sql_seconds', 'template_seconds'):
+                target[key] += row[key]
+            for status, count in row['responses'].items():
+                target['responses'][status] = target['responses'].get(status, 0) + count
+        for name, values in data.get('counters', {}).items():
+            target = merged['counters'].setdefault(name, {})
+            for label, count in values.items():
+                target[label] = target.get(label, 0) + count
+    return merged
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(data):
+    """Текстовий формат Prometheus 0.0.4."""
+    lines = [
+        '# HELP bar_request_duration_seconds Час обробки запиту в Django.',
+        '# TYPE bar_request_duration_seconds histogram',
+    ]
+    routes = sorted(data['routes'].items())
+    for route, row in routes:
+        route = _label(route)
+        for bound, count in zip(data['buckets'], row['buckets']):
+            lines.append(f'bar_request_duration_seconds_bucket{{route="{route}",le="{_number(float(bound))}"}} {count}')
+        lines.append(f'bar_request_duration_seconds_bucket{{route="{route}",le="+Inf"}} {row["count"]}')
+        lines.append(f'bar_request_duration_seconds_sum{{route="{route}"}} {_number(row["sum"])}')
+        lines.append(f'bar_request_duration_seconds_count{{route="{route}"}} {row["count"]}')
+    counters = (
+        ('bar_request_sql_queries_total', 'SQL-запитів.', 'sql_queries'),
+        ('bar_request_sql_seconds_total', 'Час виконання SQL.', 'sql_seconds'),
+        ('bar_request_template_seconds_total', 'Час рендеру шаблонів.', 'template_seconds'),
+    )
+    for name, help_text, key in counters:
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{{route="{_label(route)}"}} {_number(row[key])}' for route, row in routes]
+    lines += ['# HELP bar_responses_total Відповідей за статусом.', '# TYPE bar_responses_total counter']
+    for route, row in routes:
+        for status, count in sorted(row['responses'].items()):
+            lines.append(f'bar_responses_total{{route="{_label(route)}",status="{status}"}} {count}')
+    for name, values in sorted(data.get('counters', {}).items()):
+        label_name, help_text = COUNTERS.get(name, (None, ''))
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for label, count in sorted(values.items()):
+            labels = f'{{{label_name}="{_label(label)}"}}' if label_name else ''
+            lines.append(f'{name}{labels} {_number(count)}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    """
+    /metrics/ для Prometheus: вимкнено, доки не задано METRICS_ENABLED. Потрібен
+    заголовок Authorization: Bearer <METRICS_TOKEN>; без токена — лише в DEBUG.
+    """
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token and not settings.DEBUG:
+        raise Http404
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    return HttpResponse(render_prometheus(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --- Middleware ---
+def server_timing(stats, duration):
+    return (
+        f'sql;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries", '
+        f'tpl;dur={stats.template_time * 1000:.1f}, app;dur={duration * 1000:.1f}'
+    )
+
+
+def show_server_timing(user):
+    """Server-Timing розкриває час SQL і шаблонів маршруту — лише в DEBUG або для staff."""
+    if not getattr(settings, 'SERVER_TIMING', True):
+        return False
+    return settings.DEBUG or (user is not None and user.is_staff)
+
+
+def route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNMATCHED
+
+
+class InstrumentationMiddleware:
+    """Міряє запит цілком; має стояти першим у MIDDLEWARE. Працює і під WSGI, і під ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install(connection)
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            # request.user ставить AuthenticationMiddleware далі в MIDDLEWARE; його запити
+            # (сесія, користувач) теж входять у статистику запиту
+            timing = show_server_timing(getattr(request, 'user', None))
+        finally:
+            _stats.reset(token)
+        return self.finish(request, response, stats, started, timing)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            user = await request.auser() if hasattr(request, 'auser') else None
+        finally:
+            _stats.reset(token)
+        return self.finish(request, response, stats, started, show_server_timing(user))
+
+    def finish(self, request, response, stats, started, timing=False):
+        duration = time.perf_counter() - started
+        if timing:
+            response['Server-Timing'] = server_timing(stats, duration)
+        route = route_name(request)
+        if not response.streaming:
+            registry.observe(route, response.status_code, duration, stats)
+            return response
+        # Тіло читається вже після middleware: враховуємо його SQL, коли потік закінчиться
+        content = response.streaming_content
+        if response.is_async:
+            response.streaming_content = self._astream(content, route, response.status_code, stats, started)
+        else:
+            response.streaming_content = self._stream(content, route, response.status_code, stats, started)
+        return response
+
+    @staticmethod
+    def _stream(content, route, status, stats, started):
+        iterator = iter(content)
+        try:
+            while True:
+                token = _stats.set(stats)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    _stats.reset(token)
+                yield chunk
+        finally:
+            registry.observe(route, status, time.perf_counter() - started, stats)
+
+    @staticmethod
+    async def _astream(content, route, status, stats, started):
+        iterator = aiter(content)
+        try:
+            while True:
+                token = _stats.set(stats)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _stats.reset(token)
+                yield chunk
+        finally:
+            registry.observe(route, status, time.perf_counter() - started, stats)
@@ -0,0 +1,345 @@
+"""
+Навантажувальні прогони проти живого HTTP-сервера.
+
+Клієнт — asyncio зі стандартної бібліотеки: кожен запит — нове з'єднання з
+Connection: close (синхронні воркери gunicorn keep-alive не тримають, тож
+умови однакові для обох профілів). concurrency корутин беруть шляхи по колу,
+доки не буде зроблено requests запитів; латентність — від connect до
+останнього байта відповіді.
+
+Server запускає gunicorn з djangoProject2/gunicorn.conf.py у підпроцесі на
+вільному порту й чекає, поки той почне приймати з'єднання.
+
+run_mix — кілька процесів-читачів (тестовий Client, повний стек Django) і
+процесів-записувачів (збереження продуктів, як в адмінці) над однією базою
+одночасно. Процеси запускаються через spawn і налаштовують Django самі, тож
+модуль імпортується в них до django.setup().
+"""
+import asyncio
+import itertools
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from django.conf import settings
+
+HOST = '127.0.0.1'
+
+
+def percentile(values, q):
+    """q-й перцентиль (0..100) методом найближчого рангу; None — для порожнього списку."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    """Підсумок прогону: кількості, req/s і перцентилі в мілісекундах."""
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50': ms(percentile(latencies, 50)),
+        'p95': ms(percentile(latencies, 95)),
+        'p99': ms(percentile(latencies, 99)),
+        'max': ms(max(latencies) if latencies else None),
+    }
+
+
+async def fetch(port, path, host=HOST, timeout=30):
+    """GET path; повертає HTTP-статус (тіло дочитується й відкидається)."""
+    async def request():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            while await reader.read(65536):
+                pass
+        finally:
+            writer.close()
+        parts = status_line.split()
+        return int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    return await asyncio.wait_for(request(), timeout)
+
+
+async def slow_client(port, hold, host=HOST):
+    """
+    Повільний клієнт: надсилає заголовки частинами впродовж hold секунд.
+    Синхронний воркер gunicorn весь цей час зайнятий читанням запиту.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f'GET / HTTP/1.1\r\nHost: {host}\r\n'.encode())
+        await writer.drain()
+        await asyncio.sleep(hold)
+        writer.write(b'Connection: close\r\n\r\n')
+        await writer.drain()
+        while await reader.read(65536):
+            pass
+    except (OSError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def drive(port, paths, concurrency, requests, host=HOST, slow_clients=0, hold=5.0):
+    """requests запитів по paths з concurrency одночасних клієнтів; повертає summarize()."""
+    queue = itertools.cycle(paths)
+    remaining = requests
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            path = next(queue)
+            started = time.perf_counter()
+            try:
+                status = await fetch(port, path, host)
+            except (OSError, asyncio.TimeoutError):
+                status = 0
+            if 200 <= status < 400:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    slow = [asyncio.ensure_future(slow_client(port, hold, host)) for _ in range(slow_clients)]
+    if slow:
+        await asyncio.sleep(0.2)  # даємо повільним клієнтам зайняти з'єднання
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    for task in slow:
+        task.cancel()
+    await asyncio.gather(*slow, return_exceptions=True)
+    return summarize(latencies, errors, elapsed)
+
+
+def run(port, paths, concurrency, requests, **kwargs):
+    return asyncio.run(drive(port, paths, concurrency, requests, **kwargs))
+
+
+def parse_levels(value):
+    """'1,10,50' -> [1, 10, 50]; ValueError, якщо рівні не додатні цілі."""
+    levels = [int(level) for level in value.split(',') if level.strip()]
+    if not levels or min(levels) < 1:
+        raise ValueError(value)
+    return levels
+
+
+def default_paths():
+    """Списки, сортування й детальні сторінки каталогу для навантаження."""
+    from django.urls import reverse
+
+    from .models import Cocktail, Product
+
+    paths = [reverse('bar:product_list'), reverse('bar:cocktail_list'), reverse('bar:product_list') + '?sort=-abv']
+    product = Product.objects.order_by('pk').values_list('pk', flat=True).first()
+    cocktail = Cocktail.objects.order_by('pk').values_list('pk', flat=True).first()
+    if product is not None:
+        paths.append(reverse('bar:product_detail', args=[product]))
+    if cocktail is not None:
+        paths.append(reverse('bar:cocktail_detail', args=[cocktail]))
+    return paths
+
+
+# --- Процеси-читачі й записувачі над однією базою ---
+STARTUP_DELAY = 3  # секунд на spawn і django.setup() усіх процесів до спільного старту
+
+
+def _init_process(env):
+    os.environ.update(env)
+    import django
+    django.setup()
+
+
+def _sleep_until(moment):
+    delay = moment - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def read_loop(paths, start_at, duration):
+    """GET по paths по колу до start_at + duration; (латентності, помилки)."""
+    from django.db import OperationalError
+    from django.test import Client
+
+    client = Client()
+    latencies, errors = [], 0
+    _sleep_until(start_at)
+    deadline = start_at + duration
+    for path in itertools.cycle(paths):
+        if time.time() >= deadline:
+            break
+        started = time.perf_counter()
+        try:
+            status = client.get(path).status_code
+        except OperationalError:  # "database is locked"
+            status = 0
+        if 200 <= status < 400:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+    return latencies, errors
+
+
+def write_loop(start_at, duration, interval, seed):
+    """
+    Зберігає випадкові продукти в транзакції (сигнали, FTS-індекс — як в адмінці)
+    з паузою interval; межі "запиту" — close_old_connections, як у Django.
+    Похідні зображень не генеруються: це не робота бази, а власний пул процесів
+    у кожному записувачі писав би файли в MEDIA_ROOT.
+    """
+    from django.db import OperationalError, close_old_connections, transaction
+    from django.db.models.signals import post_save
+
+    from .models import Product
+    from .signals import schedule_image_derivatives
+
+    post_save.disconnect(schedule_image_derivatives, sender=Product)
+    rng = random.Random(seed)
+    pks = list(Product.objects.values_list('pk', flat=True))
+    close_old_connections()
+    latencies, errors = [], 0
+    _sleep_until(start_at)
+    deadline = start_at + duration
+    while pks and time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                product = Product.objects.get(pk=rng.choice(pks))
+                product.is_limited = not product.is_limited
+                product.save()
+        except OperationalError:
+            errors += 1
+        except Product.DoesNotExist:
+            pass
+        else:
+            latencies.append(time.perf_counter() - started)
+        close_old_connections()
+        if interval:
+            time.sleep(interval)
+    return latencies, errors
+
+
+def call_in_process(env, func, *args):
+    """func(*args) в окремому spawn-процесі з налаштуваннями Django з env."""
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=get_context('spawn'), initializer=_init_process, initargs=(env,),
+    ) as pool:
+        return pool.submit(func, *args).result()
+
+
+def run_mix(env, paths, readers, writers, duration, write_interval=0.05):
+    """
+    readers читачів і writers записувачів у окремих процесах з налаштуваннями
+    з env; повертає {'reads': summarize(), 'writes': summarize()}.
+    """
+    results = {'reads': ([], 0), 'writes': ([], 0)}
+    with ProcessPoolExecutor(
+        max_workers=readers + writers, mp_context=get_context('spawn'),
+        initializer=_init_process, initargs=(env,),
+    ) as pool:
+        start_at = time.time() + STARTUP_DELAY
+        futures = [('reads', pool.submit(read_loop, paths, start_at, duration)) for _ in range(readers)]
+        futures += [
+            ('writes', pool.submit(write_loop, start_at, duration, write_interval, seed))
+            for seed in range(writers)
+        ]
+        for kind, future in futures:
+            latencies, errors = future.result()
+            results[kind] = (results[kind][0] + latencies, results[kind][1] + errors)
+    return {kind: summarize(latencies, errors, duration) for kind, (latencies, errors) in results.items()}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30, process=None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f'Сервер завершився з кодом {process.returncode}')
+        try:
+            with socket.create_connection((HOST, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Сервер не відповів на порту {port} за {timeout} с')
+
+
+class Server:
+    """
+    gunicorn із профілем SERVER=wsgi|asgi (djangoProject2/gunicorn.conf.py) у
+    підпроцесі; env — додаткові змінні середовища (PAGE_CACHE_TIMEOUT тощо).
+    """
+
+    def __init__(self, profile, workers=2, env=None, port=None):
+        self.profile = profile
+        self.workers = workers
+        self.port = port or free_port()
+        self.env = dict(env or {})
+        self.process = None
+        self.log = None
+
+    def command(self):
+        config = os.path.join(settings.BASE_DIR, 'djangoProject2', 'gunicorn.conf.py')
+        return [sys.executable, '-m', 'gunicorn', '-c', config, '--bind', f'{HOST}:{self.port}']
+
+    def __enter__(self):
+        env = dict(os.environ)
+        env.update({
+            'SERVER': self.profile,
+            'WEB_CONCURRENCY': str(self.workers),
+            'ALLOWED_HOSTS': ','.join(filter(None, [env.get('ALLOWED_HOSTS', ''), HOST, 'localhost'])),
+        })
+        env.update(self.env)
+        # Лог gunicorn — у тимчасовий файл: непрочитаний PIPE заблокував би сервер
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            self.command(), cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=self.log,
+        )
+        try:
+            wait_for_port(self.port, process=self.process)
+        except RuntimeError as exc:
+            output = self.output()
+            self.__exit__(None, None, None)
+            raise RuntimeError(f'{exc}\n{output}') from None
+        return self
+
+    def output(self):
+        """Що сервер встиг написати в stderr."""
+        if self.log is None:
+            return ''
+        self.log.seek(0)
+        return self.log.read().decode(errors='replace')
+
+    def __exit__(self, *exc_info):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.log is not None:
+            self.log.close()
+            self.log = None
@@ -0,0 +1,267 @@
+"""
+"Що я можу приготувати?" — інвертований індекс інгредієнт -> коктейлі.
+
+Кожен коктейль отримує слот (номер біта). Для кожного інгредієнта зберігається
+бітсет (Python int) слотів коктейлів, де він використовується. Кількість інгредієнтів
+коктейлю зберігається "вертикально": bit-sliced, тобто size_slices[k] має біт слота s,
+якщо в size[s] встановлено k-й біт.
+
+Запит складає бітсети вибраних інгредієнтів у bit-sliced лічильник влучань і
+одним проходом по бітових зрізах порівнює (влучання + N) >= size для всіх коктейлів
+одночасно. Кількість операцій залежить від кількості вибраних інгредієнтів і
+log2(max size), а не від кількості коктейлів, і жодних JOIN-ів під час запиту.
+
+Індекс живе в пам'яті процесу. Сигнали оновлюють його інкрементально, а версія
+моделі CocktailIngredient у кеші (bar/cache.py) повідомляє іншим воркерам, що
+індекс слід перебудувати.
+"""
+import threading
+
+from . import search
+from .cache import local_chain, model_version
+from .models import CocktailIngredient, Ingredient
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _add_bit(slices, mask):
+    """Додає до bit-sliced лічильника одиницю в позиціях mask."""
+    carry = mask
+    for k, value in enumerate(slices):
+        if not carry:
+            return
+        slices[k], carry = value ^ carry, value & carry
+    if carry:
+        slices.append(carry)
+
+
+def _add_constant(slices, constant, width):
+    """Додає ту саму константу до всіх слотів (width — маска всіх слотів)."""
+    result = list(slices)
+    carry = 0
+    k = 0
+    while constant >> k or carry:
+        bit = width if (constant >> k) & 1 else 0
+        value = result[k] if k < len(result) else 0
+        total = value ^ bit ^ carry
+        carry = (value & bit) | (value & carry) | (bit & carry)
+        if k < len(result):
+            result[k] = total
+        else:
+            result.append(total)
+        k += 1
+    return result
+
+
+def _greater_or_equal(a, b, width):
+    """Маска слотів, де bit-sliced число a >= b."""
+    length = max(len(a), len(b))
+    greater = 0
+    equal = width
+    for k in reversed(range(length)):
+        x = a[k] if k < len(a) else 0
+        y = b[k] if k < len(b) else 0
+        greater |= equal & x & ~y
+        equal &= ~(x ^ y)
+    return (greater | equal) & width
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.slot_of = {}  # cocktail_id -> slot
+        self.cocktail_of = []  # slot -> cocktail_id або None
+        self.free_slots = []
+        self.ingredients_of = {}  # cocktail_id -> frozenset(ingredient_id)
+        self.postings = {}  # ingredient_id -> bitset слотів
+        self.size_slices = []
+        self.by_size = {}  # кількість інгредієнтів -> бітсет слотів
+        self.live = 0  # бітсет зайнятих слотів
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """pairs — ітерабельне (cocktail_id, ingredient_id)."""
+        grouped = {}
+        for cocktail_id, ingredient_id in pairs:
+            grouped.setdefault(cocktail_id, set()).add(ingredient_id)
+        index = cls()
+        for cocktail_id, ingredient_ids in grouped.items():
+            index.set_cocktail(cocktail_id, ingredient_ids)
+        return index
+
+    def _set_size(self, slot, size):
+        bit = 1 << slot
+        while size.bit_length() > len(self.size_slices):
+            self.size_slices.append(0)
+        for k in range(len(self.size_slices)):
+            if (size >> k) & 1:
+                self.size_slices[k] |= bit
+            else:
+                self.size_slices[k] &= ~bit
+
+    def set_cocktail(self, cocktail_id, ingredient_ids):
+        ingredient_ids = frozenset(ingredient_ids)
+        self.remove_cocktail(cocktail_id)
+        if not ingredient_ids:
+            return
+        slot = self.free_slots.pop() if self.free_slots else len(self.cocktail_of)
+        if slot == len(self.cocktail_of):
+            self.cocktail_of.append(cocktail_id)
+        else:
+            self.cocktail_of[slot] = cocktail_id
+        bit = 1 << slot
+        self.slot_of[cocktail_id] = slot
+        self.ingredients_of[cocktail_id] = ingredient_ids
+        for ingredient_id in ingredient_ids:
+            self.postings[ingredient_id] = self.postings.get(ingredient_id, 0) | bit
+        self._set_size(slot, len(ingredient_ids))
+        self.by_size[len(ingredient_ids)] = self.by_size.get(len(ingredient_ids), 0) | bit
+        self.live |= bit
+
+    def remove_cocktail(self, cocktail_id):
+        slot = self.slot_of.pop(cocktail_id, None)
+        if slot is None:
+            return
+        bit = 1 << slot
+        ingredient_ids = self.ingredients_of.pop(cocktail_id)
+        for ingredient_id in ingredient_ids:
+            remaining = self.postings[ingredient_id] & ~bit
+            if remaining:
+                self.postings[ingredient_id] = remaining
+            else:
+                del self.postings[ingredient_id]
+        self._set_size(slot, 0)
+        remaining = self.by_size[len(ingredient_ids)] & ~bit
+        if remaining:
+            self.by_size[len(ingredient_ids)] = remaining
+        else:
+            del self.by_size[len(ingredient_ids)]
+        self.live &= ~bit
+        self.cocktail_of[slot] = None
+        self.free_slots.append(slot)
+
+    def query(self, ingredient_ids, max_missing=0, limit=None):
+        """
+        Коктейлі, для яких бракує не більше max_missing інгредієнтів (і є хоча б один).
+        Повертає список (cocktail_id, matched, total), відсортований за кількістю
+        відсутніх, далі за покриттям і розміром рецепту.
+        """
+        hits = []
+        any_hit = 0
+        for ingredient_id in set(ingredient_ids):
+            posting = self.postings.get(ingredient_id)
+            if posting:
+                _add_bit(hits, posting)
+                any_hit |= posting
+        if not any_hit:
+            return []
+        width = self.live
+        results = []
+        seen = 0
+        sizes = sorted(self.by_size, reverse=True)
+        # Групи за кількістю відсутніх інгредієнтів: спершу ті, що можна зробити повністю.
+        # У групі покриття (size - missing) / size зростає разом із size, тож ідемо
+        # від більших рецептів до менших і зупиняємося, щойно набрали limit.
+        for missing in range(max_missing + 1):
+            enough = _greater_or_equal(_add_constant(hits, missing, width), self.size_slices, width)
+            group = enough & any_hit & ~seen
+            seen |= group
+            for size in sizes:
+                members = group & self.by_size[size]
+                for slot in _bits(members):
+                    results.append((self.cocktail_of[slot], size - missing, size))
+                    if limit is not None and len(results) >= limit:
+                        return results
+        return results
+
+
+_lock = threading.Lock()
+_index = None
+_index_version = None
+
+
+def _load(using='default'):
+    pairs = CocktailIngredient.objects.using(using).values_list('cocktail_id', 'ingredient_id').iterator(chunk_size=5000)
+    return IngredientIndex.from_pairs(pairs)
+
+
+def get_index():
+    """Індекс процесу; перебудовується, якщо інший воркер змінив CocktailIngredient."""
+    global _index, _index_version
+    version = model_version(CocktailIngredient)
+    if _index is None or _index_version != version:
+        with _lock:
+            if _index is None or _index_version != version:
+                _index = _load()
+                _index_version = version
+    return _index
+
+
+def refresh_cocktails(cocktail_ids, using='default'):
+    """Інкрементальне оновлення після зміни рядків CocktailIngredient у цьому процесі."""
+    global _index, _index_version
+    if _index is None:
+        return
+    cocktail_ids = set(cocktail_ids)
+    grouped = {cocktail_id: set() for cocktail_id in cocktail_ids}
+    rows = CocktailIngredient.objects.using(using).filter(cocktail_id__in=cocktail_ids).values_list('cocktail_id', 'ingredient_id')
+    for cocktail_id, ingredient_id in rows:
+        grouped[cocktail_id].add(ingredient_id)
+    version = model_version(CocktailIngredient)
+    with _lock:
+        if _index is None:
+            return
+        if not local_chain(CocktailIngredient, _index_version, version):
+            # Між версією індексу і поточною є зміна іншого воркера — її рядків
+            # тут немає, тож get_index() перебудує індекс повністю
+            _index = None
+            _index_version = None
+            return
+        for cocktail_id, ingredient_ids in grouped.items():
+            _index.set_cocktail(cocktail_id, ingredient_ids)
+        # Усі зміни від версії індексу — цього процесу, і їх щойно застосовано.
+        # Інші воркери побачать нову версію і перебудують індекс у get_index().
+        _index_version = version
+
+
+_names = None
+_names_version = None
+
+
+def ingredient_names():
+    """(id -> назва, згорнута назва -> {id}); кешується в процесі до зміни Ingredient."""
+    global _names, _names_version
+    version = model_version(Ingredient)
+    if _names is None or _names_version != version:
+        by_id = dict(Ingredient.objects.values_list('pk', 'name').iterator(chunk_size=5000))
+        by_name = {}
+        for pk, name in by_id.items():
+            by_name.setdefault(search.fold(name).strip(), set()).add(pk)
+        _names, _names_version = (by_id, by_name), version
+    return _names
+
+
+def resolve_ingredients(tokens):
+    """Ідентифікатори або назви (без урахування регістру й алфавіту) -> множина id інгредієнтів."""
+    by_id, by_name = ingredient_names()
+    ids = set()
+    for token in tokens:
+        token = token.strip()
+        if token.isdigit() and int(token) in by_id:
+            ids.add(int(token))
+        else:
+            ids |= by_name.get(search.fold(token), set())
+    return ids
+
+
+def reset():
+    global _index, _index_version, _names, _names_version
+    with _lock:
+        _index = None
+        _index_version = None
+        _names = None
+        _names_version = None
@@ -0,0 +1,163 @@
+import importlib.util
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bar import benchmark, loadtest
+
+from .bench_asgi import REQUIREMENTS, _levels
+
+TARGETS = ('client', *REQUIREMENTS)
+
+
+def default_baseline(target):
+    return os.path.join(settings.BASE_DIR, 'benchmarks', f'{target}.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Бенчмарк усіх маршрутів bar.urls і головної на окремій базі з синтетичним каталогом: '
+        'req/s і p50/p95/p99 на кожному рівні конкурентності, SQL-запитів на запит для кожного сценарію. '
+        'Зберігає результат як базову лінію (JSON) і падає, якщо новий прогін гірший за неї понад поріг.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', choices=TARGETS, default='client',
+            help='client — тестовий Client у потоках одного процесу; wsgi/asgi — gunicorn з профілем '
+                 'djangoProject2/gunicorn.conf.py.',
+        )
+        parser.add_argument('--products', type=int, default=2000, help='Синтетичних продуктів.')
+        parser.add_argument('--cocktails', type=int, default=300, help='Синтетичних коктейлів.')
+        parser.add_argument('--ingredients', type=int, default=120, help='Синтетичних інгредієнтів.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed каталогу, сценаріїв і порядку запитів.')
+        parser.add_argument('--workers', type=int, default=2, help='Воркерів gunicorn (wsgi/asgi).')
+        parser.add_argument('--concurrency', default='1,10,50', help='Рівні одночасних клієнтів через кому.')
+        parser.add_argument('--requests', type=int, default=500, help='Запитів на кожен рівень.')
+        parser.add_argument('--warmup', type=int, default=50, help='Запитів прогріву перед вимірами.')
+        parser.add_argument('--repeat', type=int, default=5, help='Запитів на сценарій під час підрахунку SQL.')
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help='Не вимикати кеш сторінок (за замовчуванням вимкнено, щоб міряти роботу view).',
+        )
+        parser.add_argument(
+            '--save', nargs='?', const='', metavar='PATH',
+            help='Зберегти результат як базову лінію (за замовчуванням benchmarks/<target>.json).',
+        )
+        parser.add_argument(
+            '--compare', nargs='?', const='', metavar='PATH',
+            help='Порівняти з базовою лінією (за замовчуванням benchmarks/<target>.json).',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10.0,
+            help='Допустиме погіршення req/s і p95, %%. Більше SQL-запитів — регресія завжди.',
+        )
+        parser.add_argument('--json', action='store_true', help='Результат одним JSON у stdout.')
+
+    def handle(self, *args, **options):
+        target = options['target']
+        missing = [module for module in REQUIREMENTS.get(target, ()) if importlib.util.find_spec(module) is None]
+        if missing:
+            raise CommandError(f"Ціль {target}: не встановлено {', '.join(missing)} (pip install -r requirements.txt)")
+        levels = _levels(options['concurrency'])
+        if min(options['products'], options['cocktails'], options['ingredients']) < 0 or options['requests'] < 1:
+            raise CommandError('Розміри каталогу — невід\'ємні, --requests — додатне.')
+        save_path = self.baseline_path(options['save'], target)
+        compare_path = self.baseline_path(options['compare'], target)
+        baseline = None
+        if compare_path is not None:
+            try:
+                with open(compare_path, encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Не вдалося прочитати базову лінію {compare_path}: {exc}')
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                'DATABASE_ENGINE': 'django.db.backends.sqlite3',
+                'DATABASE_NAME': os.path.join(directory, 'bench.sqlite3'),
+                'DATABASE_REPLICAS': '',
+                # Власний кеш у пам'яті кожного процесу: версії й сторінки не змішуються з робочими
+                'CACHE_BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'],
+            }
+            if not options['page_cache']:
+                env['PAGE_CACHE_TIMEOUT'] = '0'
+            client_env = {**env, 'ALLOWED_HOSTS': 'testserver'}
+
+            self.stderr.write('Готую базу...')
+            catalog = loadtest.call_in_process(
+                client_env, benchmark.prepare,
+                options['products'], options['cocktails'], options['ingredients'], options['seed'],
+            )
+            scenario_list = loadtest.call_in_process(client_env, benchmark.scenarios, options['seed'])
+            paths = benchmark.mix(scenario_list, options['seed'])
+            self.stderr.write(f"Каталог: {catalog}; сценаріїв {len(scenario_list)}, шляхів у суміші {len(paths)}")
+
+            scenario_results = loadtest.call_in_process(client_env, benchmark.measure, scenario_list, options['repeat'])
+            if target == 'client':
+                level_results = loadtest.call_in_process(
+                    client_env, benchmark.client_levels, paths, levels, options['requests'], options['warmup'],
+                )
+            else:
+                level_results = []
+                with loadtest.Server(target, workers=options['workers'], env=env) as server:
+                    if options['warmup']:
+                        loadtest.run(server.port, paths, 1, options['warmup'])
+                    for concurrency in levels:
+                        summary = loadtest.run(server.port, paths, concurrency, options['requests'])
+                        level_results.append({'concurrency': concurrency, **summary})
+
+        result = {
+            'target': target,
+            'workers': options['workers'] if target != 'client' else None,
+            'page_cache': options['page_cache'],
+            'seed': options['seed'],
+            'catalog': catalog,
+            'levels': level_results,
+            'scenarios': scenario_results,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2, ensure_ascii=False))
+        else:
+            self.report(result)
+
+        if save_path is not None:
+            os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+            with open(save_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, indent=2, ensure_ascii=False)
+            self.stderr.write(f'Базову лінію збережено: {save_path}')
+
+        if baseline is not None:
+            for key in ('target', 'catalog', 'page_cache'):
+                if baseline.get(key) != result[key]:
+                    self.stderr.write(self.style.WARNING(
+                        f'Базова лінія з іншим {key}: {baseline.get(key)} проти {result[key]} — порівняння приблизне.'
+                    ))
+            regressions = benchmark.compare(baseline, result, options['threshold'] / 100)
+            if regressions:
+                raise CommandError(f'Регресії відносно {compare_path}:\n' + '\n'.join(regressions))
+            self.stderr.write(self.style.SUCCESS(f'Без регресій відносно {compare_path}.'))
+
+    def baseline_path(self, value, target):
+        if value is None:
+            return None
+        return value or default_baseline(target)
+
+    def report(self, result):
+        self.stdout.write(f"{'клієнтів':>8} {'req/s':>9} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'помилок':>8}")
+        for row in result['levels']:
+            self.stdout.write(
+                f"{row['concurrency']:>8} {row['rps']:>9} {row['p50'] or '-':>9} {row['p95'] or '-':>9} "
+                f"{row['p99'] or '-':>9} {row['errors']:>8}"
+            )
+        self.stdout.write('')
+        self.stdout.write(f"{'сценарій':28} {'SQL':>4} {'p50 мс':>9} {'p95 мс':>9} {'помилок':>8}")
+        for row in result['scenarios']:
+            queries = '-' if row['queries'] is None else row['queries']
+            self.stdout.write(
+                f"{row['name']:28} {queries:>4} {row['p50'] or '-':>9} {row['p95'] or '-':>9} {row['errors']:>8}"
+            )
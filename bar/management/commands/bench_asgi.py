@@ -0,0 +1,83 @@
+import importlib.util
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bar import loadtest
+
+REQUIREMENTS = {
+    'wsgi': ('gunicorn',),
+    'asgi': ('gunicorn', 'uvicorn', 'uvicorn_worker'),
+}
+
+
+def _levels(value):
+    try:
+        return loadtest.parse_levels(value)
+    except ValueError:
+        raise CommandError('--concurrency: додатні цілі через кому, напр. 1,10,50')
+
+
+class Command(BaseCommand):
+    help = (
+        'Порівнює синхронний WSGI (gunicorn sync) і ASGI (gunicorn + uvicorn-воркери, bar/async_views.py): '
+        'req/s і p50/p95/p99 на кожному рівні конкурентності, на тій самій машині й базі.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='wsgi,asgi', help='Профілі djangoProject2/gunicorn.conf.py через кому.')
+        parser.add_argument('--workers', type=int, default=2, help='Воркерів gunicorn у кожному профілі.')
+        parser.add_argument('--concurrency', default='1,10,50,100', help='Рівні одночасних клієнтів через кому.')
+        parser.add_argument('--requests', type=int, default=500, help='Запитів на кожен рівень.')
+        parser.add_argument('--warmup', type=int, default=20, help='Запитів прогріву перед вимірами.')
+        parser.add_argument(
+            '--slow-clients', type=int, default=0,
+            help='Скільки повільних клієнтів тримають з\'єднання впродовж кожного рівня.',
+        )
+        parser.add_argument('--hold', type=float, default=5.0, help='Скільки секунд тримає з\'єднання повільний клієнт.')
+        parser.add_argument('--path', action='append', dest='paths', help='Шлях для навантаження (можна кілька разів).')
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help='Не вимикати кеш сторінок (за замовчуванням вимкнено, щоб міряти роботу view).',
+        )
+        parser.add_argument('--json', action='store_true', help='Результати одним JSON у stdout.')
+
+    def handle(self, *args, **options):
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = [profile for profile in profiles if profile not in REQUIREMENTS]
+        if unknown:
+            raise CommandError(f"Невідомі профілі: {', '.join(unknown)}. Доступні: {', '.join(REQUIREMENTS)}")
+        for profile in profiles:
+            missing = [module for module in REQUIREMENTS[profile] if importlib.util.find_spec(module) is None]
+            if missing:
+                raise CommandError(f"Профіль {profile}: не встановлено {', '.join(missing)} (pip install -r requirements.txt)")
+        levels = _levels(options['concurrency'])
+        paths = options['paths'] or loadtest.default_paths()
+        env = {} if options['page_cache'] else {'PAGE_CACHE_TIMEOUT': '0'}
+
+        results = []
+        for profile in profiles:
+            with loadtest.Server(profile, workers=options['workers'], env=env) as server:
+                if options['warmup']:
+                    loadtest.run(server.port, paths, 1, options['warmup'])
+                for concurrency in levels:
+                    summary = loadtest.run(
+                        server.port, paths, concurrency, options['requests'],
+                        slow_clients=options['slow_clients'], hold=options['hold'],
+                    )
+                    results.append({'profile': profile, 'concurrency': concurrency, **summary})
+                    if not options['json']:
+                        self.stderr.write(f'{profile} c={concurrency}: {summary["rps"]} req/s')
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'workers': options['workers'], 'paths': paths, 'slow_clients': options['slow_clients'],
+                'results': results,
+            }, indent=2))
+            return
+        self.stdout.write(f"{'профіль':8} {'клієнтів':>8} {'req/s':>9} {'p50 мс':>9} {'p95 мс':>9} {'p99 мс':>9} {'помилок':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:8} {row['concurrency']:>8} {row['rps']:>9} {row['p50'] or '-':>9} "
+                f"{row['p95'] or '-':>9} {row['p99'] or '-':>9} {row['errors']:>8}"
+            )
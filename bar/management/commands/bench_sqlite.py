@@ -0,0 +1,101 @@
+import json
+import os
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+from bar import loadtest
+
+# Змінні середовища процесів кожного профілю (див. SQLITE_CONCURRENCY у settings.py)
+PROFILES = {
+    # Як було: rollback journal, таймаут sqlite3 за замовчуванням, нове з'єднання на запит
+    'baseline': {'SQLITE_CONCURRENCY': 'false', 'DATABASE_CONN_MAX_AGE': '0'},
+    # WAL, прагми, busy timeout, BEGIN IMMEDIATE, постійні з'єднання
+    'tuned': {'SQLITE_CONCURRENCY': 'true', 'DATABASE_CONN_MAX_AGE': '600'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Навантаження SQLite кількома процесами: читачі відкривають сторінки каталогу, поки записувачі '
+        'зберігають продукти. Порівнює профілі baseline і tuned (WAL, прагми, постійні з\'єднання) '
+        'на копії бази: req/s, p50/p95/p99 читань і помилки "database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', default='baseline,tuned', help='Профілі через кому.')
+        parser.add_argument('--readers', type=int, default=4, help='Процесів-читачів.')
+        parser.add_argument('--writers', type=int, default=1, help='Процесів-записувачів.')
+        parser.add_argument('--duration', type=float, default=10.0, help='Тривалість кожного профілю, с.')
+        parser.add_argument('--write-interval', type=float, default=0.05, help='Пауза між записами, с.')
+        parser.add_argument('--path', action='append', dest='paths', help='Шлях для читачів (можна кілька разів).')
+        parser.add_argument('--json', action='store_true', help='Результати одним JSON у stdout.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('bench_sqlite міряє лише SQLite.')
+        executor = MigrationExecutor(primary)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            raise CommandError('База має незастосовані міграції: спершу manage.py migrate.')
+        profiles = [profile.strip() for profile in options['profiles'].split(',') if profile.strip()]
+        unknown = [profile for profile in profiles if profile not in PROFILES]
+        if unknown:
+            raise CommandError(f"Невідомі профілі: {', '.join(unknown)}. Доступні: {', '.join(PROFILES)}")
+        if options['readers'] < 1 or options['writers'] < 0:
+            raise CommandError('Потрібен хоча б один читач.')
+        paths = options['paths'] or loadtest.default_paths()
+
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in profiles:
+                # Кожен профіль — на свіжій копії, щоб записи й режим журналу не впливали на інший
+                name = os.path.join(directory, f'{profile}.sqlite3')
+                self.copy_database(primary, name, wal=PROFILES[profile]['SQLITE_CONCURRENCY'] == 'true')
+                env = {
+                    **PROFILES[profile],
+                    'DATABASE_NAME': name,
+                    'DATABASE_REPLICAS': '',
+                    # Без кешів кожен запит доходить до бази
+                    'CACHE_BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+                    'PAGE_CACHE_TIMEOUT': '0',
+                    'ALLOWED_HOSTS': 'testserver',
+                    'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'],
+                }
+                summary = loadtest.run_mix(
+                    env, paths, options['readers'], options['writers'], options['duration'], options['write_interval'],
+                )
+                results.append({'profile': profile, **summary})
+                if not options['json']:
+                    self.stderr.write(f"{profile}: {summary['reads']['rps']} читань/с")
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'readers': options['readers'], 'writers': options['writers'], 'duration': options['duration'],
+                'paths': paths, 'results': results,
+            }, indent=2))
+            return
+        self.stdout.write(
+            f"{'профіль':9} {'читань/с':>9} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8} {'помилок':>8} "
+            f"{'записів/с':>10} {'p99 мс':>8} {'помилок':>8}"
+        )
+        for row in results:
+            reads, writes = row['reads'], row['writes']
+            self.stdout.write(
+                f"{row['profile']:9} {reads['rps']:>9} {reads['p50'] or '-':>8} {reads['p95'] or '-':>8} "
+                f"{reads['p99'] or '-':>8} {reads['errors']:>8} {writes['rps']:>10} {writes['p99'] or '-':>8} "
+                f"{writes['errors']:>8}"
+            )
+
+    def copy_database(self, primary, name, wal):
+        primary.ensure_connection()
+        target = sqlite3.connect(name)
+        try:
+            primary.connection.backup(target)
+            target.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        finally:
+            target.close()
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from bar import catalog_export
+
+
+class Command(BaseCommand):
+    help = 'Потоково експортує продукти або коктейлі (з інгредієнтами) у CSV чи JSON Lines — у форматі import_catalog.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(catalog_export.COLUMNS))
+        parser.add_argument('--format', choices=sorted(catalog_export.FORMATS), default='csv')
+        parser.add_argument('--output', '-o', default='-', help="Файл або '-' для stdout.")
+        parser.add_argument('--chunk-size', type=int, default=catalog_export.CHUNK_SIZE)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        queryset = catalog_export.MODELS[kind].objects.using(options['database'])
+        lines = catalog_export.stream(kind, options['format'], queryset, chunk_size=max(1, options['chunk_size']))
+        started = time.perf_counter()
+        count = 0
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+                count += 1
+        else:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+                for line in lines:
+                    f.write(line)
+                    count += 1
+        if options['format'] == 'csv':
+            count -= 1  # рядок заголовка
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f'{kind}: {count} рядків за {elapsed:.2f} с')
@@ -0,0 +1,33 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bar.export import Exporter
+
+
+class Command(BaseCommand):
+    help = ('Експортує публічні сторінки (головна, про нас, контакти, списки з типовими фільтрами, '
+            'продукти й коктейлі) у статичний каталог з .gz/.br; повторний запуск перерендерює лише змінене.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('out_dir', nargs='?', default=None, help='Каталог експорту (за замовчуванням EXPORT_ROOT).')
+        parser.add_argument('--full', action='store_true', help='Перерендерити всі сторінки, ігноруючи manifest.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Процеси для рендеру; 0 — у поточному.')
+        parser.add_argument('--max-pages', type=int, default=50, help='Максимум сторінок на один список (фасети + пагінація).')
+
+    def handle(self, *args, **options):
+        out_dir = options['out_dir'] or settings.EXPORT_ROOT
+        started = time.perf_counter()
+        exporter = Exporter(
+            out_dir, workers=max(0, options['workers']), full=options['full'],
+            max_pages=options['max_pages'], log=self.stderr.write,
+        )
+        stats = exporter.run()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{out_dir}: відрендерено {stats['rendered']} сторінок (змінилось {stats['written']}), "
+            f"без змін {stats['kept']}, видалено {stats['removed']}, з помилками {stats['failed']}, "
+            f"скопійовано файлів {stats['assets']} за {elapsed:.2f} с"
+        ))
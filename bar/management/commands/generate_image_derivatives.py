@@ -0,0 +1,75 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bar import images
+from bar.cache import bump_version
+from bar.models import Cocktail, Product
+
+MODELS = {'product': Product, 'cocktail': Cocktail}
+
+
+class Command(BaseCommand):
+    help = 'Генерує адаптивні похідні (WebP + JPEG кількох ширин) для зображень продуктів і коктейлів.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kinds', nargs='*', help='product та/або cocktail (за замовчуванням усе).')
+        parser.add_argument('--force', action='store_true', help='Перегенерувати навіть актуальні похідні.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or sorted(MODELS)
+        unknown = set(kinds) - set(MODELS)
+        if unknown:
+            raise CommandError(f"Невідомий тип: {', '.join(sorted(unknown))}")
+
+        # Один файл може бути в кількох об'єктів — генеруємо його один раз
+        jobs = {}  # ім'я файлу -> [(модель, pk)]
+        for kind in kinds:
+            model = MODELS[kind]
+            rows = model.objects.exclude(image='').values_list('pk', 'image', 'image_variants')
+            for pk, name, variants in rows.iterator(chunk_size=2000):
+                if options['force'] or (variants or {}).get('source') != name:
+                    jobs.setdefault(name, []).append((model, pk))
+        if not jobs:
+            self.stdout.write('Усі похідні актуальні.')
+            return
+
+        started = time.perf_counter()
+        done = failed = 0
+        changed = set()
+        widths, quality = images.get_widths(), images.get_quality()
+        with ProcessPoolExecutor(max_workers=max(1, options['workers']), mp_context=get_context('spawn')) as pool:
+            futures = {
+                pool.submit(images.render, settings.MEDIA_ROOT, name, widths, quality): name
+                for name in jobs
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    variants = future.result()
+                except (OSError, ValueError) as exc:
+                    failed += 1
+                    self.stderr.write(f'{name}: {exc}')
+                    continue
+                by_model = {}
+                for model, pk in jobs[name]:
+                    by_model.setdefault(model, []).append(pk)
+                for model, pks in by_model.items():
+                    model.objects.filter(pk__in=pks, image=name).update(image_variants=variants, updated_at=timezone.now())
+                    changed.add(model)
+                done += 1
+                if done % 50 == 0:
+                    self.stdout.write(f'{done}/{len(jobs)}...')
+        # update() не шле сигналів — інвалідовуємо кеші сторінок самі
+        for model in changed:
+            bump_version(model)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Оброблено {done} файлів ({failed} з помилками) за {elapsed:.2f} с'
+        ))
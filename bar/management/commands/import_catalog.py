@@ -0,0 +1,63 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from bar import importer
+
+FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'json', '.csv': 'csv'}
+
+
+class Command(BaseCommand):
+    help = ('Імпортує продукти, інгредієнти й коктейлі з JSON Lines, JSON (зокрема фікстур Django) або CSV '
+            'пачками bulk_create/bulk_update з upsert за назвою.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Файл для імпорту або '-' для stdin.")
+        parser.add_argument('--format', choices=sorted(set(FORMATS.values())), help='За замовчуванням — з розширення файлу.')
+        parser.add_argument('--kind', choices=('product', 'ingredient', 'cocktail'), help="Тип записів CSV-файлу.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or FORMATS.get(os.path.splitext(path)[1].lower())
+        if fmt is None:
+            raise CommandError('Не вдалося визначити формат — вкажіть --format.')
+        if fmt == 'csv' and not options['kind']:
+            raise CommandError('Для CSV потрібен --kind.')
+
+        def progress(stats):
+            rate = stats['records'] / stats['elapsed'] if stats['elapsed'] else 0
+            self.stdout.write(f"{stats['records']} записів, {stats['errors']} помилок ({rate:.0f} записів/с)")
+
+        catalog_importer = importer.CatalogImporter(
+            batch_size=max(1, options['batch_size']), using=options['database'], progress=progress,
+        )
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+        try:
+            stats = catalog_importer.run(importer.records(f, fmt, options['kind']))
+        except ValueError as exc:
+            # Зламаний JSON-масив: попередні пачки вже збережені
+            raise CommandError(f'Не вдалося прочитати {path}: {exc}')
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+        for message in stats['error_messages']:
+            self.stderr.write(message)
+        if stats['errors'] > len(stats['error_messages']):
+            self.stderr.write(f"... і ще {stats['errors'] - len(stats['error_messages'])} помилок")
+        for kind in importer.KINDS:
+            self.stdout.write(
+                f"{kind}: створено {stats['created'][kind]}, оновлено {stats['updated'][kind]}, "
+                f"без змін {stats['unchanged'][kind]}"
+            )
+        if stats['needs_images']:
+            self.stdout.write(f"Зображень без похідних: {stats['needs_images']} — запустіть generate_image_derivatives.")
+        rate = stats['records'] / stats['elapsed'] if stats['elapsed'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Імпортовано {stats['records']} записів ({stats['skipped']} пропущено, {stats['errors']} з помилками) "
+            f"пачками по {options['batch_size']} за {stats['elapsed']:.2f} с — {rate:.0f} записів/с"
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.commands import loaddata
+from django.db import transaction
+
+from bar import makeable, search
+from bar.models import Cocktail, CocktailIngredient, Ingredient, Product
+
+# Модель фікстури -> FTS-індекси, що від неї залежать
+SEARCH_KINDS = {
+    Product: ('product',),
+    Cocktail: ('cocktail',),
+    CocktailIngredient: ('cocktail',),
+    Ingredient: ('ingredient', 'cocktail'),
+}
+
+
+class Command(loaddata.Command):
+    """
+    loaddata Django, після якого похідні дані bar оновлюються разом, а не на
+    кожен рядок: сигнали для рядків фікстури (raw=True) їх пропускають
+    (bar/signals.py). FTS-індекси перебудовуються цілком, індекс "що я можу
+    приготувати" скидається; похідні зображень — manage.py generate_image_derivatives.
+    """
+
+    def handle(self, *fixture_labels, **options):
+        super().handle(*fixture_labels, **options)
+        loaded = set(getattr(self, 'models', ()))
+        kinds = sorted({kind for model in loaded for kind in SEARCH_KINDS.get(model, ())})
+        if kinds and search.is_available(self.using):
+            for kind in kinds:
+                with transaction.atomic(using=self.using):
+                    total = search.rebuild(kind, using=self.using)
+                if self.verbosity >= 1:
+                    self.stdout.write(f'Пошуковий індекс {kind}: {total} об\'єктів')
+        if loaded & {Cocktail, CocktailIngredient}:
+            makeable.reset()
+        if loaded & {Product, Cocktail} and self.verbosity >= 1:
+            self.stdout.write('Похідні зображень: python manage.py generate_image_derivatives')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from bar import pagecache, views  # noqa: F401  (views реєструють свої кеші)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показує статистику влучань кешу сторінок bar.views: усіх воркерів, якщо задано '
+        'METRICS_DIR (gunicorn.conf.py задає її сам), інакше лише цього процесу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулити лічильники.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            pagecache.reset_stats()
+            self.stdout.write('Лічильники обнулено.')
+            return
+        stats = pagecache.stats()
+        self.stdout.write(f"{'view':<20} {'hits':>8} {'misses':>8} {'ratio':>6}")
+        for name, row in stats.items():
+            if name == 'bytes':
+                continue
+            self.stdout.write(f"{name:<20} {row['hits']:>8} {row['misses']:>8} {row['ratio']:>6.1%}")
+        self.stdout.write(f"Записано в кеш: {stats['bytes'] / 1024:.1f} КБ")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bar import profiling
+
+
+class Command(BaseCommand):
+    help = 'Видаляє профілі запитів понад PROFILE_MAX_COUNT і старші за PROFILE_MAX_AGE_DAYS разом із файлами.'
+
+    def handle(self, *args, **options):
+        deleted = profiling.prune()
+        self.stdout.write(f'Видалено профілів: {deleted}.')
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from bar import search
+from bar.cache import bump_version
+from bar.models import Cocktail, Ingredient, Product
+
+MODELS = {'product': Product, 'cocktail': Cocktail, 'ingredient': Ingredient}
+
+
+class Command(BaseCommand):
+    help = 'Перебудовує повнотекстовий індекс FTS5 для продуктів, коктейлів та інгредієнтів.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kinds', nargs='*', help='product, cocktail та/або ingredient (за замовчуванням усе).')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_available(using):
+            raise CommandError('FTS5-індекс недоступний для цієї бази (потрібен SQLite з FTS5 і застосовані міграції).')
+        kinds = options['kinds'] or sorted(search.INDEXES)
+        unknown = set(kinds) - set(search.INDEXES)
+        if unknown:
+            raise CommandError(f"Невідомий індекс: {', '.join(sorted(unknown))}")
+        for kind in kinds:
+            started = time.perf_counter()
+            with transaction.atomic(using=using):
+                total = search.rebuild(kind, batch_size=options['batch_size'], using=using)
+            # Результати пошуку могли змінитись — інвалідуємо кеші сторінок
+            bump_version(MODELS[kind])
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {total} об\'єктів за {elapsed:.2f} с'))
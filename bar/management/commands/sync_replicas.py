@@ -0,0 +1,40 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копіює primary SQLite у файли-репліки з DATABASE_REPLICAS (bar/routers.py) — '
+        'локальна заміна реплікації; між запусками репліки відстають, як справжні.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Аліаси реплік (за замовчуванням усі).')
+
+    def handle(self, *args, **options):
+        replicas = options['aliases'] or list(settings.DATABASE_REPLICAS)
+        if not replicas:
+            raise CommandError('Реплік немає: задайте DATABASE_REPLICAS.')
+        unknown = [alias for alias in replicas if alias not in settings.DATABASE_REPLICAS]
+        if unknown:
+            raise CommandError(f"Не репліки: {', '.join(unknown)}")
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копіювати можна лише SQLite; репліки PostgreSQL наповнює потокова реплікація.')
+        primary.ensure_connection()
+        for alias in replicas:
+            started = time.perf_counter()
+            # Старе з'єднання з реплікою бачило б попередній файл
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                # Онлайн-копія через backup API: узгоджений знімок навіть під час записів
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'{alias}: скопійовано за {elapsed:.2f} с'))
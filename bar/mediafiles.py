@@ -0,0 +1,211 @@
+"""
+Віддача файлів з MEDIA_ROOT у продакшені.
+
+URL файлу містить хеш вмісту: product_images/a.jpg -> /media/product_images/a.<md5[:12]>.jpg
+(HashedMediaStorage). Такий URL ніколи не змінює вмісту, тож віддається з
+Cache-Control: immutable на рік; замінили файл — змінився і URL.
+
+serve() передає саму віддачу фронт-проксі, якщо він налаштований (MEDIA_ACCEL):
+  * 'nginx' — X-Accel-Redirect на internal location MEDIA_ACCEL_PREFIX;
+  * 'sendfile' — X-Sendfile з абсолютним шляхом (Apache mod_xsendfile, lighttpd).
+Інакше — FileResponse: gunicorn віддає його через os.sendfile без копіювання в
+Python, і для Range-запитів теж (файл позиціонується на початок діапазону, а
+довжину обмежує Content-Length).
+"""
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+HASH_LENGTH = 12
+HASHED_RE = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)?$' % HASH_LENGTH)
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+@lru_cache(maxsize=4096)
+def _file_hash(path, mtime_ns, size):
+    # mtime і розмір — частина ключа: змінений файл переобчислиться
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def file_hash(path):
+    """Хеш вмісту файлу або None, якщо файлу немає."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _file_hash(path, stat.st_mtime_ns, stat.st_size)
+
+
+def hashed_name(name, content_hash):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{content_hash}{ext}'
+
+
+class HashedMediaStorage(FileSystemStorage):
+    """FileSystemStorage, чиї URL містять хеш вмісту файлу."""
+
+    def url(self, name):
+        content_hash = file_hash(self.path(name)) if name else None
+        if content_hash:
+            name = hashed_name(name, content_hash)
+        return super().url(name)
+
+
+def _max_age():
+    return getattr(settings, 'MEDIA_MAX_AGE', 3600)
+
+
+def _resolve(path):
+    """(абсолютний шлях, хеш з URL або None); хеш вважається частиною імені, лише якщо такого файлу немає."""
+    root = settings.MEDIA_ROOT
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if os.path.isfile(full_path):
+        return full_path, None
+    match = HASHED_RE.match(path)
+    if match:
+        original = safe_join(root, match['stem'] + (match['ext'] or ''))
+        if os.path.isfile(original):
+            return original, match['hash']
+    raise Http404
+
+
+def parse_range(header, size):
+    """
+    'bytes=a-b' -> (start, length); None — заголовка немає або він не підтримується
+    (кілька діапазонів), тоді віддаємо весь файл; ValueError — діапазон поза файлом.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or (not match[1] and not match[2]):
+        return None
+    if match[1]:
+        start = int(match[1])
+        end = min(int(match[2]), size - 1) if match[2] else size - 1
+        if start >= size or end < start:
+            raise ValueError
+    else:
+        suffix = int(match[2])
+        if not suffix:
+            raise ValueError
+        start, end = max(0, size - suffix), size - 1
+    return start, end - start + 1
+
+
+class RangeFile:
+    """Частина файлу для FileResponse. fileno() лишається — gunicorn віддасть її через sendfile."""
+
+    def __init__(self, f, start, length):
+        self.file = f
+        self.start = start
+        self.length = length
+        self.name = f.name
+        f.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell() - self.start
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        base = self.start + self.length if whence == os.SEEK_END else self.start
+        if whence == os.SEEK_CUR:
+            base = self.file.tell()
+        return self.file.seek(base + offset) - self.start
+
+    def read(self, size=-1):
+        remaining = max(0, self.length - self.tell())
+        return self.file.read(remaining if size is None or size < 0 else min(size, remaining))
+
+    def close(self):
+        self.file.close()
+
+
+def file_response(request, full_path, cache_control, content_type=None, content_encoding=None, accel_path=None, vary=None):
+    """
+    Відповідь з файлом: 304 за If-None-Match/If-Modified-Since, віддача через
+    проксі (accel_path — шлях для X-Accel-Redirect) або FileResponse з Range.
+    """
+    stat = os.stat(full_path)
+    etag = quote_etag(file_hash(full_path))
+    if_none_match = request.headers.get('If-None-Match')
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    if (if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*')) or (
+        not if_none_match and if_modified_since and int(stat.st_mtime) <= if_modified_since
+    ):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = cache_control
+        if vary:
+            response['Vary'] = vary
+        return response
+
+    if content_type is None:
+        content_type, content_encoding = mimetypes.guess_type(full_path)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+    if vary:
+        headers['Vary'] = vary
+    if content_encoding:
+        headers['Content-Encoding'] = content_encoding
+    content_type = content_type or 'application/octet-stream'
+
+    accel = getattr(settings, 'MEDIA_ACCEL', '')
+    if accel and accel_path:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if accel == 'nginx':
+            # Range і If-* nginx обробляє сам
+            response['X-Accel-Redirect'] = accel_path
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if request.method == 'GET' and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), stat.st_size)
+        except ValueError:
+            return HttpResponse(status=416, headers={'Content-Range': f'bytes */{stat.st_size}'})
+
+    f = open(full_path, 'rb')
+    if byte_range is None:
+        return FileResponse(f, content_type=content_type, headers=headers)
+    start, length = byte_range
+    response = FileResponse(RangeFile(f, start, length), status=206, content_type=content_type, headers=headers)
+    response['Content-Range'] = f'bytes {start}-{start + length - 1}/{stat.st_size}'
+    return response
+
+
+def serve(request, path):
+    full_path, url_hash = _resolve(path)
+    content_hash = file_hash(full_path)
+    relative = os.path.relpath(full_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+    if url_hash and url_hash != content_hash:
+        # Файл замінили після рендеру сторінки — ведемо на актуальний URL
+        return HttpResponseRedirect(settings.MEDIA_URL + hashed_name(relative, content_hash))
+    return file_response(
+        request, full_path,
+        cache_control=IMMUTABLE if url_hash else f'public, max-age={_max_age()}',
+        accel_path=getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/') + relative,
+    )
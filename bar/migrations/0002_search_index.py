@@ -0,0 +1,100 @@
+"""
+FTS5-таблиці повнотекстового пошуку (bar/search.py) і їхнє початкове заповнення.
+
+DDL і згортання тексту тут заморожені на момент міграції: зміни в search.py не
+мають змінювати історію міграцій. Індекс, зібраний за старими правилами,
+оновлює manage.py rebuild_search_index.
+"""
+import re
+
+from django.db import migrations
+
+TRANSLIT = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ё': 'e', 'ъ': '', '’': '', "'": '', 'ʼ': '',
+}
+_TRANSLIT_TABLE = str.maketrans(TRANSLIT)
+BATCH_SIZE = 2000
+
+
+class SqliteRunSQL(migrations.RunSQL):
+    """RunSQL лише на SQLite: на інших СУБД FTS5 немає, і search.py шукає через icontains."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fold(text):
+    return (text or '').casefold().translate(_TRANSLIT_TABLE)
+
+
+def _insert(cursor, table, columns, rows):
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    cursor.executemany(f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({placeholders})", rows)
+
+
+def fill_search_index(apps, schema_editor):
+    """Наявні продукти й коктейлі (на свіжій базі їх немає)."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    alias = schema_editor.connection.alias
+    Product = apps.get_model('bar', 'Product')
+    Cocktail = apps.get_model('bar', 'Cocktail')
+    CocktailIngredient = apps.get_model('bar', 'CocktailIngredient')
+
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for pk, name, description in Product.objects.using(alias).order_by('pk').values_list(
+            'pk', 'name', 'description',
+        ).iterator(chunk_size=BATCH_SIZE):
+            batch.append((pk, fold(name), fold(description)))
+            if len(batch) >= BATCH_SIZE:
+                _insert(cursor, 'bar_product_fts', ('name', 'description'), batch)
+                batch = []
+        if batch:
+            _insert(cursor, 'bar_product_fts', ('name', 'description'), batch)
+
+        ingredients = {}
+        for cocktail_id, ingredient_name in CocktailIngredient.objects.using(alias).order_by('pk').values_list(
+            'cocktail_id', 'ingredient__name',
+        ).iterator(chunk_size=BATCH_SIZE):
+            ingredients.setdefault(cocktail_id, []).append(ingredient_name)
+        rows = [
+            (pk, fold(name), fold(description), fold(' '.join(ingredients.get(pk, ()))))
+            for pk, name, description in Cocktail.objects.using(alias).order_by('pk').values_list(
+                'pk', 'name', 'description',
+            )
+        ]
+        for start in range(0, len(rows), BATCH_SIZE):
+            _insert(cursor, 'bar_cocktail_fts', ('name', 'description', 'ingredients'), rows[start:start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bar', '0001_initial'),
+    ]
+
+    operations = [
+        SqliteRunSQL(
+            [
+                "CREATE VIRTUAL TABLE IF NOT EXISTS bar_product_fts USING fts5("
+                "name, description, tokenize='unicode61 remove_diacritics 2')",
+                "CREATE VIRTUAL TABLE IF NOT EXISTS bar_cocktail_fts USING fts5("
+                "name, description, ingredients, tokenize='unicode61 remove_diacritics 2')",
+            ],
+            [
+                'DROP TABLE IF EXISTS bar_cocktail_fts',
+                'DROP TABLE IF EXISTS bar_product_fts',
+            ],
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:15
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Заморожена копія bar.models.parse_volume на момент міграції: зміни в моделях не
+# мають змінювати історію міграцій.
+VOLUME_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*(мл|ml|л|l|литр\w*|літр\w*)?\.?\s*$', re.IGNORECASE)
+
+
+def parse_volume(value):
+    match = VOLUME_RE.match(str(value or ''))
+    if not match:
+        return None
+    try:
+        amount = Decimal(match.group(1).replace(',', '.'))
+    except InvalidOperation:
+        return None
+    unit = (match.group(2) or '').lower()
+    if unit in ('мл', 'ml'):
+        amount /= 1000
+    return amount.quantize(Decimal('0.001'))
+
+
+def parse_existing_volumes(apps, schema_editor):
+    Product = apps.get_model('bar', 'Product')
+    db_alias = schema_editor.connection.alias
+    batch = []
+    for product in Product.objects.using(db_alias).only('pk', 'volume').iterator(chunk_size=2000):
+        product.volume_litres = parse_volume(product.volume) or 0
+        batch.append(product)
+        if len(batch) >= 2000:
+            Product.objects.using(db_alias).bulk_update(batch, ['volume_litres'])
+            batch = []
+    if batch:
+        Product.objects.using(db_alias).bulk_update(batch, ['volume_litres'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bar', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='volume_litres',
+            field=models.DecimalField(decimal_places=3, default=0, editable=False, max_digits=6),
+        ),
+        migrations.RunPython(parse_existing_volumes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cocktail',
+            index=models.Index(fields=['name', 'id'], name='cocktail_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'is_kosher', 'is_limited', 'abv'], name='product_cat_flags_abv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'volume_litres'], name='product_cat_volume_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_kosher', 'is_limited', 'volume_litres'], name='product_flags_volume_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['abv', 'id'], name='product_abv_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['volume_litres', 'id'], name='product_volume_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+"""
+FTS5-індекс назв інгредієнтів: пошук і автодоповнення в адмінці (bar/admin.py).
+
+Як і в 0002, DDL і згортання тексту заморожені на момент міграції.
+"""
+from django.db import migrations
+
+TRANSLIT = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ё': 'e', 'ъ': '', '’': '', "'": '', 'ʼ': '',
+}
+_TRANSLIT_TABLE = str.maketrans(TRANSLIT)
+BATCH_SIZE = 2000
+
+
+class SqliteRunSQL(migrations.RunSQL):
+    """RunSQL лише на SQLite: на інших СУБД FTS5 немає, і search.py шукає через icontains."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'sqlite':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def fold(text):
+    return (text or '').casefold().translate(_TRANSLIT_TABLE)
+
+
+def fill_ingredient_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Ingredient = apps.get_model('bar', 'Ingredient')
+    rows = Ingredient.objects.using(schema_editor.connection.alias).order_by('pk').values_list('pk', 'name')
+    with schema_editor.connection.cursor() as cursor:
+        batch = []
+        for pk, name in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append((pk, fold(name)))
+            if len(batch) >= BATCH_SIZE:
+                cursor.executemany('INSERT INTO bar_ingredient_fts (rowid, name) VALUES (%s, %s)', batch)
+                batch = []
+        if batch:
+            cursor.executemany('INSERT INTO bar_ingredient_fts (rowid, name) VALUES (%s, %s)', batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bar', '0007_request_profile'),
+    ]
+
+    operations = [
+        SqliteRunSQL(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS bar_ingredient_fts USING fts5("
+            "name, tokenize='unicode61 remove_diacritics 2')",
+            'DROP TABLE IF EXISTS bar_ingredient_fts',
+        ),
+        migrations.RunPython(fill_ingredient_index, migrations.RunPython.noop),
+    ]
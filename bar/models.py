@@ -1,9 +1,32 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
 from django.db import models
 
+VOLUME_RE = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*(мл|ml|л|l|литр\w*|літр\w*)?\.?\s*$', re.IGNORECASE)
+
+
+def parse_volume(value):
+    """'0.5', '0.7L', '0,7 л', '500 мл' -> Decimal у літрах; None, якщо не розпізнано."""
+    match = VOLUME_RE.match(str(value or ''))
+    if not match:
+        return None
+    try:
+        amount = Decimal(match.group(1).replace(',', '.'))
+    except InvalidOperation:
+        return None
+    unit = (match.group(2) or '').lower()
+    if unit in ('мл', 'ml'):
+        amount /= 1000
+    return amount.quantize(Decimal('0.001'))
+
+
 class AboutPage(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     image = models.ImageField(upload_to='about_images/', blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
@@ -19,24 +42,67 @@ class Product(models.Model):
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     abv = models.DecimalField(max_digits=5, decimal_places=2)  # Alcohol by volume
     volume = models.CharField(max_length=50)  # e.g., '0.5L', '0.7L'
+    volume_litres = models.DecimalField(max_digits=6, decimal_places=3, default=0, editable=False)  # 0 — невідомо
     image = models.ImageField(upload_to='product_images/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # див. bar/images.py
     is_kosher = models.BooleanField(default=False)
     is_limited = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Фільтри каталогу: категорія + прапорці + діапазони
+            models.Index(fields=['category', 'is_kosher', 'is_limited', 'abv'], name='product_cat_flags_abv_idx'),
+            models.Index(fields=['category', 'volume_litres'], name='product_cat_volume_idx'),
+            models.Index(fields=['is_kosher', 'is_limited', 'volume_litres'], name='product_flags_volume_idx'),
+            # Keyset-пагінація за (ключ сортування, pk)
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            models.Index(fields=['abv', 'id'], name='product_abv_id_idx'),
+            models.Index(fields=['volume_litres', 'id'], name='product_volume_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.volume_litres = parse_volume(self.volume) or 0
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'volume' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'volume_litres'}
+        super().save(*args, **kwargs)
+
+class CocktailQuerySet(models.QuerySet):
+    def with_ingredients(self):
+        # Увесь граф інгредієнтів за два запити замість N+1
+        return self.prefetch_related(
+            models.Prefetch(
+                'cocktailingredient_set',
+                queryset=CocktailIngredient.objects.select_related('ingredient').order_by('pk'),
+            )
+        )
+
+
 class Cocktail(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     image = models.ImageField(upload_to='cocktail_images/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # див. bar/images.py
     ingredients = models.ManyToManyField('Ingredient', through='CocktailIngredient')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = CocktailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id'], name='cocktail_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 class Ingredient(models.Model):
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)  # сортування в адмінці й автодоповненні
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -45,6 +111,7 @@ class CocktailIngredient(models.Model):
     cocktail = models.ForeignKey(Cocktail, on_delete=models.CASCADE)
     ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
     quantity = models.CharField(max_length=100)  # e.g., '30 мл'
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.quantity} {self.ingredient.name} for {self.cocktail.name}"
@@ -54,8 +121,42 @@ class ContactInfo(models.Model):
     phone = models.CharField(max_length=50)
     email = models.EmailField()
     map_embed_url = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.address
 
 
+class RequestProfile(models.Model):
+    """Профіль одного запиту (bar/profiling.py); сам файл лежить у PROFILE_DIR."""
+    TRIGGER_CHOICES = [
+        ('header', 'Заголовок'),
+        ('query', 'Параметр URL'),
+        ('sample', 'Випадкова вибірка'),
+    ]
+    FORMAT_CHOICES = [
+        ('speedscope', 'speedscope'),
+        ('collapsed', 'collapsed stacks'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    route = models.CharField(max_length=255, db_index=True)  # ім'я маршруту, напр. bar:product_list
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    sql_queries = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    samples = models.PositiveIntegerField(default=0)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+',
+    )
+    file = models.CharField(max_length=255)  # ім'я файлу в PROFILE_DIR
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.method} {self.path}'
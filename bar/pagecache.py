@@ -0,0 +1,215 @@
+"""
+Кеш цілих сторінок для bar.views з інвалідацією через версії моделей.
+
+Ключ сторінки = шлях + нормалізований query string + версії моделей, від яких
+сторінка залежить. Зберегли Product в адмінці — змінилась версія Product, і
+сторінки продуктів перестали влучати в кеш, а "Про нас" і контакти лишились.
+
+І сторінки, і версії лежать у спільному для всіх воркерів кеші (CACHES, за
+замовчуванням FileBasedCache): зміна, збережена одним воркером, інвалідує
+сторінки в усіх. З LocMemCache інші воркери віддавали б старі сторінки до
+PAGE_CACHE_TIMEOUT.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.http import urlencode
+
+from . import instrumentation
+from .cache import versions_signature
+from .singletons import MODELS as SITE_MODELS
+
+STATS_METRIC = 'bar_page_cache_{}_total'
+STATS_BASELINE_KEY = 'bar:pagecache:baseline'
+# Імена view, обгорнутих кешем, — для статистики
+registry = set()
+
+
+def get_timeout():
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 600)
+
+
+def canonical_items(params, allowed=None, multi=()):
+    """
+    Параметри так, як їх прочитає view: для звичайних — останнє значення
+    (QueryDict.get), для multi — усі по порядку (getlist). Порожні значення
+    лишаються: {% querystring %} повторює їх у посиланнях. allowed=None — усі
+    параметри як є.
+    """
+    items = []
+    for key in sorted(params):
+        if allowed is not None and key not in allowed:
+            continue
+        values = params.getlist(key)
+        if allowed is not None and key not in multi:
+            values = values[-1:]
+        items.extend((key, value) for value in values)
+    return items
+
+
+def is_canonical(params, allowed=None, multi=()):
+    """
+    Чи можна кешувати сторінку під ключем з canonical_items(): шаблони й фасети
+    повторюють сирий request.GET, тож невідомих чи повторених параметрів бути не
+    повинно — інакше сторінку з ними отримали б запити без них.
+    """
+    if allowed is None:
+        return True
+    return all(key in allowed and (key in multi or len(params.getlist(key)) == 1) for key in params)
+
+
+def canonical_url(request, allowed=None, multi=()):
+    query = urlencode(canonical_items(request.GET, allowed, multi))
+    return f'{request.path}?{query}' if query else request.path
+
+
+def page_key(request, models, allowed=None, multi=()):
+    query = urlencode(canonical_items(request.GET, allowed, multi))
+    digest = hashlib.md5(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'bar:page:{versions_signature(*models)}:{digest}'
+
+
+def bypassed(request):
+    """Профіль на вимогу (bar/profiling.py) має міряти роботу view, а не влучання в кеш."""
+    return getattr(request, '_bar_skip_page_cache', False)
+
+
+def _count(name, outcome, size=0):
+    # Лічильники процесу (bar/instrumentation.py): запис у спільний кеш на кожне
+    # влучання — це запис на диск (FileBasedCache) і втрачені інкременти між воркерами
+    instrumentation.registry.count(STATS_METRIC.format(outcome), name)
+    if size:
+        instrumentation.registry.count(STATS_METRIC.format('bytes'), '', size)
+
+
+def _totals():
+    counters = instrumentation.collect().get('counters', {})
+    totals = {
+        (outcome, name): count
+        for outcome in ('hits', 'misses')
+        for name, count in counters.get(STATS_METRIC.format(outcome), {}).items()
+    }
+    totals['bytes', '*'] = sum(counters.get(STATS_METRIC.format('bytes'), {}).values())
+    return totals
+
+
+def stats():
+    """
+    {view: {'hits', 'misses', 'ratio'}}; '*' — сума; 'bytes' — скільки байтів записано в кеш.
+    Лічильники всіх воркерів — якщо задано METRICS_DIR, інакше лише цього процесу;
+    від останнього reset_stats().
+    """
+    totals = _totals()
+    baseline = cache.get(STATS_BASELINE_KEY) or {}
+
+    def value(outcome, name):
+        return max(totals.get((outcome, name), 0) - baseline.get((outcome, name), 0), 0)
+
+    result = {}
+    for name in sorted(registry):
+        hits, misses = value('hits', name), value('misses', name)
+        result[name] = {'hits': hits, 'misses': misses}
+    hits = sum(row['hits'] for row in result.values())
+    misses = sum(row['misses'] for row in result.values())
+    result['*'] = {'hits': hits, 'misses': misses}
+    for row in result.values():
+        total = row['hits'] + row['misses']
+        row['ratio'] = round(row['hits'] / total, 3) if total else 0.0
+    result['bytes'] = value('bytes', '*')
+    return result
+
+
+def reset_stats():
+    """Лічильники процесів лише ростуть (Prometheus), тож обнуляємо відносно поточних значень."""
+    cache.set(STATS_BASELINE_KEY, _totals(), timeout=None)
+
+
+def _store(key, response, timeout):
+    if response.status_code != 200 or response.cookies or 'private' in response.get('Cache-Control', ''):
+        return 0
+    headers = [(name, value) for name, value in response.items() if name.lower() not in ('set-cookie', 'vary')]
+    cache.set(key, (response.status_code, headers, response.content), timeout)
+    return len(response.content)
+
+
+def cache_page_versioned(*models, name=None, query_params=None, multi_params=()):
+    """
+    Кешує відповіді GET/HEAD. models — моделі, від яких залежить сторінка;
+    query_params — параметри, які читає view; multi_params — ті з них, що
+    читаються через getlist(). Запит з іншими або повтореними параметрами
+    переспрямовується на канонічну адресу (canonical_url), тож у ключі кешу
+    рівно те, що потрапляє в сторінку.
+    AboutPage і ContactInfo додаються завжди: їх показують навбар і футер
+    (контекст-процесор bar.context_processors.site).
+    """
+    allowed = set(query_params) if query_params is not None else None
+    multi = set(multi_params)
+    models = tuple(dict.fromkeys(models + SITE_MODELS))
+
+    def decorator(view_func):
+        view_name = name or view_func.__name__
+        registry.add(view_name)
+
+        def lookup(request):
+            """(ключ, відповідь із кешу або None)"""
+            key = page_key(request, models, allowed, multi)
+            cached = cache.get(key)
+            if cached is None:
+                return key, None
+            _count(view_name, 'hits')
+            status, headers, content = cached
+            response = HttpResponse(content, status=status)
+            for header, value in headers:
+                response[header] = value
+            response['X-Page-Cache'] = 'HIT'
+            return key, response
+
+        def store(key, response, timeout):
+            size = _store(key, response, timeout)
+            _count(view_name, 'misses', size)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                timeout = get_timeout()
+                if request.method not in ('GET', 'HEAD') or not timeout or bypassed(request):
+                    return await view_func(request, *args, **kwargs)
+                if not is_canonical(request.GET, allowed, multi):
+                    return HttpResponseRedirect(canonical_url(request, allowed, multi))
+                # Кеш-бекенд синхронний (файли, мережа) — звертаємось до нього з потоку
+                key, cached = await sync_to_async(lookup)(request)
+                if cached is not None:
+                    return cached
+                response = await view_func(request, *args, **kwargs)
+                if getattr(response, 'is_rendered', True) is False:
+                    response.add_post_render_callback(lambda response: store(key, response, timeout))
+                    return response
+                return await sync_to_async(store)(key, response, timeout)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            timeout = get_timeout()
+            if request.method not in ('GET', 'HEAD') or not timeout or bypassed(request):
+                return view_func(request, *args, **kwargs)
+            if not is_canonical(request.GET, allowed, multi):
+                return HttpResponseRedirect(canonical_url(request, allowed, multi))
+
+            key, cached = lookup(request)
+            if cached is not None:
+                return cached
+
+            response = view_func(request, *args, **kwargs)
+            if getattr(response, 'is_rendered', True) is False:
+                response.add_post_render_callback(lambda response: store(key, response, timeout))
+            else:
+                store(key, response, timeout)
+            return response
+        return wrapper
+    return decorator
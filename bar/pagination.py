@@ -0,0 +1,166 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorSerializer(signing.JSONSerializer):
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+
+class KeysetPage:
+    """Сторінка keyset-пагінації; інтерфейс наближений до django.core.paginator.Page."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Пагінація за курсором (ключ сортування, pk).
+
+    Замість OFFSET кожна сторінка — це WHERE (key, pk) > (v, p) ORDER BY key, pk LIMIT n,
+    тож глибокі сторінки коштують стільки ж, скільки перша. Курсор підписаний і
+    прив'язаний до сортування; зіпсований або чужий курсор повертає першу сторінку.
+    """
+    salt = 'bar.pagination.cursor'
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.field = ordering.lstrip('-')
+        self.descending = ordering.startswith('-')
+        self.per_page = per_page
+
+    def encode_cursor(self, obj, direction):
+        return signing.dumps(
+            {'o': self.ordering, 'd': direction, 'v': getattr(obj, self.field), 'pk': obj.pk},
+            salt=self.salt, serializer=CursorSerializer,
+        )
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            cursor = signing.loads(token, salt=self.salt)
+        except signing.BadSignature:
+            return None
+        if not isinstance(cursor, dict) or cursor.get('o') != self.ordering or cursor.get('d') not in ('next', 'prev'):
+            return None
+        return cursor
+
+    def _order_by(self, reverse):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.field == 'pk':
+            return [f'{prefix}pk']
+        return [f'{prefix}{self.field}', f'{prefix}pk']
+
+    def _after(self, cursor, reverse):
+        # "Після" курсору з урахуванням напрямку сортування
+        descending = self.descending != reverse
+        op = 'lt' if descending else 'gt'
+        value = cursor['v']
+        if self.field == 'pk':
+            return Q(**{f'pk__{op}': value})
+        return Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'pk__{op}': cursor['pk']})
+
+    def page(self, token=None):
+        cursor = self.decode_cursor(token)
+        if cursor is not None:
+            try:
+                return self._page_from(cursor)
+            except (ValidationError, ValueError, TypeError):
+                pass  # Некоректне значення в курсорі — віддаємо першу сторінку
+        rows = list(self._first_rows())
+        return self._build(rows, forward=True, from_cursor=False)
+
+    async def apage(self, token=None):
+        """page() для async view (bar/async_views.py): рядки читаються async ORM."""
+        cursor = self.decode_cursor(token)
+        if cursor is not None:
+            try:
+                queryset, forward = self._rows_from(cursor)
+                rows = [row async for row in queryset]
+            except (ValidationError, ValueError, TypeError):
+                pass
+            else:
+                return self._build(rows, forward=forward, from_cursor=True)
+        rows = [row async for row in self._first_rows()]
+        return self._build(rows, forward=True, from_cursor=False)
+
+    def _first_rows(self):
+        return self.queryset.order_by(*self._order_by(False))[:self.per_page + 1]
+
+    def rows_after(self, token=None):
+        """
+        Усі рядки після курсору вперед (без LIMIT) — для потокової віддачі, де
+        наступний курсор рахується з останнього відданого рядка (encode_cursor).
+        None — token заданий, але недійсний.
+        """
+        queryset = self.queryset.order_by(*self._order_by(False))
+        if not token:
+            return queryset
+        cursor = self.decode_cursor(token)
+        if cursor is None or cursor['d'] != 'next':
+            return None
+        return queryset.filter(self._after(cursor, False))
+
+    def _rows_from(self, cursor):
+        """(queryset сторінки після курсору, чи йдемо вперед)"""
+        reverse = cursor['d'] == 'prev'
+        queryset = self.queryset.filter(self._after(cursor, reverse)).order_by(*self._order_by(reverse))
+        return queryset[:self.per_page + 1], not reverse
+
+    def _page_from(self, cursor):
+        queryset, forward = self._rows_from(cursor)
+        return self._build(list(queryset), forward=forward, from_cursor=True)
+
+    def _build(self, rows, forward, from_cursor):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if forward:
+            has_next, has_previous = has_more, from_cursor
+        else:
+            has_next, has_previous = True, has_more
+        next_cursor = self.encode_cursor(rows[-1], 'next') if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], 'prev') if rows and has_previous else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """Підключає KeysetPaginator до ListView замість стандартного Paginator."""
+    paginate_by = 24
+    keyset_ordering = 'pk'
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        return self.keyset_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.get_keyset_ordering(), page_size)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
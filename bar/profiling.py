@@ -0,0 +1,362 @@
+"""
+Семплювальний профайлер окремих запитів (flamegraph для staff).
+
+Профіль запиту вмикається:
+  - для staff — заголовком X-Profile: 1 (PROFILE_HEADER) або параметром
+    ?_profile=1 (PROFILE_QUERY_PARAM): сторінку з повільною комбінацією
+    фільтрів можна профілювати просто в продакшені;
+  - випадково для одного з PROFILE_SAMPLE_RATE запитів будь-якого користувача
+    (0 — вимкнено): профілі зі справжнього трафіку.
+
+Sampler — окремий потік, що кожні PROFILE_INTERVAL секунд бере стек потоку
+запиту з sys._current_frames() і рахує однакові стеки. Трасування (cProfile,
+sys.setprofile) сповільнює кожен виклик функції; семплювання коштує кілька
+десятків мікросекунд на семпл незалежно від коду view, а запити без профілю
+не платять нічого, крім перевірки заголовка й random().
+
+Результат — файл у PROFILE_DIR у форматі PROFILE_FORMAT:
+  - speedscope — JSON для https://www.speedscope.app;
+  - collapsed — рядки "a;b;c 12" для flamegraph.pl / inferno / speedscope.
+Кожен файл має запис RequestProfile (маршрут, час, SQL з bar/instrumentation.py),
+адмінка показує список і віддає файли; видалення запису видаляє й файл.
+
+Зберігаються лише PROFILE_MAX_COUNT найновіших профілів, не старших за
+PROFILE_MAX_AGE_DAYS (0 — без обмеження): решту видаляє prune() після кожного
+нового профілю або manage.py prune_profiles, тож вибірка PROFILE_SAMPLE_RATE не
+заповнює диск і таблицю.
+
+Під ASGI view і ORM працюють і в event loop, і в потоках sync_to_async, тож
+семплюються всі потоки процесу: у профіль потрапляють і паралельні запити
+того самого воркера (рядок стеку починається з імені потоку).
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from . import instrumentation
+
+FORMATS = {'speedscope': '.speedscope.json', 'collapsed': '.collapsed.txt'}
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+MAX_DEPTH = 200
+
+
+def get_dir():
+    return str(getattr(settings, 'PROFILE_DIR', '') or os.path.join(settings.BASE_DIR, 'profiles'))
+
+
+def get_format():
+    value = getattr(settings, 'PROFILE_FORMAT', 'speedscope')
+    return value if value in FORMATS else 'speedscope'
+
+
+def get_interval():
+    return max(float(getattr(settings, 'PROFILE_INTERVAL', 0.005)), 0.001)
+
+
+def get_sample_rate():
+    return int(getattr(settings, 'PROFILE_SAMPLE_RATE', 0) or 0)
+
+
+def get_max_count():
+    return int(getattr(settings, 'PROFILE_MAX_COUNT', 500) or 0)
+
+
+def get_max_age():
+    return float(getattr(settings, 'PROFILE_MAX_AGE_DAYS', 7) or 0)
+
+
+# --- Семплювання ---
+class Sampler:
+    """
+    Рахує стеки потоків thread_ids (None — усіх, крім власного) кожні interval
+    секунд. stacks — Counter кортежів кадрів від кореня до листа.
+    """
+
+    def __init__(self, thread_ids=None, interval=0.005):
+        self.thread_ids = thread_ids
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bar-profiler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(own)
+
+    def sample(self, own=None):
+        frames = sys._current_frames()
+        if self._stop.is_set():
+            return  # потік запиту вже в stop(): цей семпл — про сам профайлер
+        if self.thread_ids is None:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            targets = [(ident, names.get(ident, str(ident))) for ident in frames if ident != own]
+        else:
+            targets = [(ident, None) for ident in self.thread_ids if ident in frames]
+        for ident, thread_name in targets:
+            stack = self._stack(frames[ident])
+            if thread_name is not None:
+                stack = (f'thread {thread_name}',) + stack
+            self.stacks[stack] += 1
+        self.samples += 1
+
+    def _stack(self, frame):
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            labels.append(label)
+            frame = frame.f_back
+        return tuple(reversed(labels))
+
+
+def _short_path(filename):
+    for prefix in sorted({str(settings.BASE_DIR), *sys.path}, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _label(code):
+    # ';' розділяє кадри у форматі collapsed
+    return f'{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ',')
+
+
+# --- Формати ---
+def collapsed(stacks):
+    return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.most_common() if stack)
+
+
+def speedscope(stacks, interval, name, duration):
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, count in stacks.most_common():
+        ids = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                function, _, location = label.rpartition(' (')
+                file, _, line = location.rstrip(')').rpartition(':')
+                frame = {'name': function or label}
+                if file:
+                    frame.update(file=file, line=int(line) if line.isdigit() else 0)
+                frames.append(frame)
+            ids.append(index[label])
+        samples.append(ids)
+        weights.append(round(count * interval, 6))
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'bar.profiling',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'seconds',
+            'startValue': 0, 'endValue': round(max(duration, sum(weights)), 6),
+            'samples': samples, 'weights': weights,
+        }],
+    }
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', value).strip('-')[:60] or 'request'
+
+
+def write(sampler, name, route, fmt=None):
+    """Зберігає профіль у PROFILE_DIR; повертає ім'я файлу."""
+    fmt = fmt or get_format()
+    directory = get_dir()
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{timezone.now():%Y%m%d-%H%M%S}-{_slug(route)}-{uuid.uuid4().hex[:8]}{FORMATS[fmt]}"
+    if fmt == 'collapsed':
+        data = collapsed(sampler.stacks)
+    else:
+        data = json.dumps(speedscope(sampler.stacks, sampler.interval, name, sampler.duration), ensure_ascii=False)
+    with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+        f.write(data)
+    return filename
+
+
+def path(filename):
+    """Повний шлях до файлу профілю; None, якщо ім'я виходить за PROFILE_DIR."""
+    if not filename or os.path.basename(filename) != filename:
+        return None
+    return os.path.join(get_dir(), filename)
+
+
+def prune():
+    """
+    Видаляє профілі, старші за PROFILE_MAX_AGE_DAYS, і все понад PROFILE_MAX_COUNT
+    найновіших; файли видаляє сигнал post_delete. Повертає кількість видалених.
+    """
+    from .models import RequestProfile
+
+    deleted = 0
+    max_age = get_max_age()
+    if max_age > 0:
+        cutoff = timezone.now() - timedelta(days=max_age)
+        deleted += RequestProfile.objects.filter(created_at__lt=cutoff).delete()[1].get(RequestProfile._meta.label, 0)
+    max_count = get_max_count()
+    if max_count > 0:
+        # Перший профіль, що вже не вміщується: видаляємо його і все старше
+        boundary = RequestProfile.objects.order_by('-created_at', '-pk').values_list(
+            'created_at', 'pk',
+        )[max_count:max_count + 1].first()
+        if boundary is not None:
+            created_at, pk = boundary
+            older = RequestProfile.objects.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lte=pk),
+            )
+            deleted += older.delete()[1].get(RequestProfile._meta.label, 0)
+    return deleted
+
+
+# --- Middleware ---
+def requested(request):
+    """'header' / 'query', якщо профіль просили; чи це staff, перевіряє middleware."""
+    header = getattr(settings, 'PROFILE_HEADER', 'X-Profile')
+    param = getattr(settings, 'PROFILE_QUERY_PARAM', '_profile')
+    if request.headers.get(header, '').lower() in TRUE_VALUES:
+        return 'header'
+    if request.GET.get(param, '').lower() in TRUE_VALUES:
+        return 'query'
+    return None
+
+
+def force_render(request):
+    """
+    Профіль на вимогу staff — про роботу view: без кешу сторінок
+    (bar/pagecache.py) і без 304 за If-None-Match / If-Modified-Since.
+    """
+    request._bar_skip_page_cache = True
+    for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE'):
+        request.META.pop(header, None)
+
+
+def sampled():
+    rate = get_sample_rate()
+    return rate > 0 and random.randrange(rate) == 0
+
+
+class ProfilingMiddleware:
+    """
+    Профіль запиту на вимогу staff або випадкової вибірки. Стоїть після
+    AuthenticationMiddleware, бо перевіряє request.user.is_staff.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # request.user (сесія, запит до бази) чіпаємо, лише коли профіль просили
+        kind = requested(request)
+        if kind is not None and not request.user.is_staff:
+            kind = None
+        if kind is not None:
+            force_render(request)
+        if kind is None and sampled():
+            kind = 'sample'
+        if kind is None:
+            return self.get_response(request)
+        sampler = Sampler([threading.get_ident()], get_interval()).start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            sampler.stop()
+            raise
+        if response.streaming and not response.is_async:
+            # Потокове тіло (JSON API) читає базу вже після middleware: профілюємо до кінця потоку
+            response.streaming_content = self._stream(response.streaming_content, request, response, kind, sampler)
+            return response
+        sampler.stop()
+        self.save(request, response, kind, sampler)
+        return response
+
+    async def __acall__(self, request):
+        kind = requested(request)
+        if kind is not None and not (await request.auser()).is_staff:
+            kind = None
+        if kind is not None:
+            force_render(request)
+        if kind is None and sampled():
+            kind = 'sample'
+        if kind is None:
+            return await self.get_response(request)
+        sampler = Sampler(None, get_interval()).start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        await sync_to_async(self.save)(request, response, kind, sampler)
+        return response
+
+    def _stream(self, content, request, response, kind, sampler):
+        try:
+            yield from content
+        finally:
+            sampler.stop()
+            self.save(request, response, kind, sampler)
+
+    def save(self, request, response, kind, sampler):
+        from .models import RequestProfile
+
+        route = instrumentation.route_name(request)
+        name = f'{request.method} {request.get_full_path()}'
+        stats = instrumentation.current()
+        user = getattr(request, 'user', None)
+        fmt = get_format()
+        try:
+            filename = write(sampler, name, route, fmt)
+        except OSError:
+            return None
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:2000],
+            route=route[:255],
+            status_code=response.status_code,
+            duration_ms=round(sampler.duration * 1000, 1),
+            sql_queries=stats.sql_count if stats is not None else 0,
+            sql_ms=round(stats.sql_time * 1000, 1) if stats is not None else 0,
+            samples=sampler.samples,
+            trigger=kind,
+            format=fmt,
+            user=user if user is not None and user.is_authenticated else None,
+            file=filename,
+        )
+        prune()
+        if kind != 'sample' and not response.streaming:
+            response['X-Profile-Id'] = str(profile.pk)
+        return profile
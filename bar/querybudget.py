@@ -0,0 +1,87 @@
+import sys
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.decorators import method_decorator
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _format_queries(captured):
+    return '\n'.join(
+        f"{i}. {query['sql']}" for i, query in enumerate(captured.captured_queries, start=1)
+    )
+
+
+@contextmanager
+def assert_max_queries(budget, label='block', using=None):
+    """Падає з QueryBudgetExceeded, якщо блок виконав більше ніж budget SQL-запитів."""
+    conn = connection if using is None else using
+    with CaptureQueriesContext(conn) as captured:
+        yield captured
+    if len(captured) > budget:
+        raise QueryBudgetExceeded(
+            f"{label}: {len(captured)} queries executed, budget is {budget}\n"
+            f"{_format_queries(captured)}"
+        )
+
+
+def query_budget(budget):
+    """
+    Декоратор для view-функцій і класів (ListView, DetailView...).
+
+    Зберігає бюджет у атрибуті `query_budget`. Якщо QUERY_BUDGET_ENFORCE увімкнено
+    (тести), кожен запит, що перевищує бюджет, падає з QueryBudgetExceeded.
+    Async view (bar/async_views.py) теж підтримуються.
+    """
+    def wrap_coroutine(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                return await view_func(request, *args, **kwargs)
+            # Async ORM виконує запити в потоці sync_to_async, а з'єднання в Django
+            # свої в кожному потоці, тож і рахуємо запити в тому самому потоці.
+            budget_context = assert_max_queries(budget, label=request.path)
+            await sync_to_async(budget_context.__enter__)()
+            try:
+                response = await view_func(request, *args, **kwargs)
+                if hasattr(response, 'render') and callable(response.render):
+                    await sync_to_async(response.render)()
+            except BaseException:
+                if not await sync_to_async(budget_context.__exit__)(*sys.exc_info()):
+                    raise
+            else:
+                await sync_to_async(budget_context.__exit__)(None, None, None)
+            return response
+        wrapper.query_budget = budget
+        return wrapper
+
+    def wrap_function(view_func):
+        if iscoroutinefunction(view_func):
+            return wrap_coroutine(view_func)
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                return view_func(request, *args, **kwargs)
+            with assert_max_queries(budget, label=request.path):
+                response = view_func(request, *args, **kwargs)
+                # TemplateResponse рендериться пізніше — рахуємо і запити з шаблону
+                if hasattr(response, 'render') and callable(response.render):
+                    response.render()
+            return response
+        wrapper.query_budget = budget
+        return wrapper
+
+    def decorator(view):
+        if isinstance(view, type):
+            view = method_decorator(wrap_function, name='dispatch')(view)
+            view.query_budget = budget
+            return view
+        return wrap_function(view)
+    return decorator
@@ -0,0 +1,161 @@
+"""
+Читання каталогу з реплік, записи — на primary ('default').
+
+DATABASE_REPLICAS (settings) — аліаси реплік із DATABASES. Читання моделей
+застосунку bar ідуть на репліку, усе інше (auth, sessions, журнал адмінки),
+усі записи й міграції — на primary. Репліка вибирається один раз на запит
+(ReplicaRoutingMiddleware), тож сторінка, її ETag і фасети читаються з тієї
+самої бази.
+
+Читання лишаються на primary, поки репліка могла ще не наздогнати:
+  - read-your-writes: після POST/PUT/DELETE браузер отримує підписану cookie
+    на REPLICA_PIN_SECONDS, і його запити весь цей час читають з primary;
+  - після будь-якої зміни моделей bar (bump_version, bar/cache.py) усі читання
+    REPLICA_PIN_SECONDS ідуть на primary — інакше кеш сторінок і ETag під новою
+    версією моделі зберегли б старі дані з репліки;
+  - усередині transaction.atomic() на primary;
+  - усі запити до адмінки (/admin/): форми змін і списки, з яких редагують, не
+    повинні показувати застарілі дані з репліки.
+
+Мітка останнього запису (bar/cache.py, LAST_WRITE_KEY) лежить у кеші default,
+спільному для всіх воркерів (FileBasedCache, settings.CACHES): запис в одному
+воркері закріплює читання за primary в усіх. З репліками кеш одного процесу
+(LocMemCache, DummyCache) відхиляє перевірка bar.E001.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import NoReverseMatch, reverse
+
+from .cache import last_write
+
+PIN_COOKIE = 'db_primary'
+PIN_SALT = 'bar.routers.pin'
+APP_LABEL = 'bar'
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Аліас бази для читань у поточному запиті; None — поза запитом (команди, shell)
+_request_alias = ContextVar('bar_read_alias', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+def get_pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def recently_written():
+    written = last_write()
+    return written is not None and time.time() - written < get_pin_seconds()
+
+
+def choose_read_alias(pinned=False):
+    """Primary, якщо реплік немає, читання закріплене або дані щойно змінились; інакше випадкова репліка."""
+    replicas = get_replicas()
+    if not replicas or pinned or recently_written():
+        return DEFAULT_DB_ALIAS
+    return random.choice(replicas)
+
+
+def is_admin(request):
+    try:
+        return request.path.startswith(reverse('admin:index'))
+    except NoReverseMatch:
+        return False
+
+
+def is_pinned(request):
+    if is_admin(request):
+        return True
+    if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+        return True
+    return request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_SALT, max_age=get_pin_seconds()) is not None
+
+
+@checks.register(checks.Tags.database, checks.Tags.caches)
+def check_shared_cache(app_configs=None, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if get_replicas() and backend in PROCESS_LOCAL_CACHES:
+        return [checks.Error(
+            f'DATABASE_REPLICAS з кешем {backend}: мітка останнього запису не спільна для воркерів, '
+            'і інші воркери читатимуть з реплік щойно змінені дані.',
+            hint='Спільний кеш: FileBasedCache (за замовчуванням), Redis або Memcached.',
+            id='bar.E001',
+        )]
+    return []
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        alias = _request_alias.get()
+        return alias if alias is not None else choose_read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Репліки — копії primary (реплікація або manage.py sync_replicas), схему не міняємо
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Вибирає базу для читань на час запиту і ставить cookie read-your-writes
+    після запитів, що змінюють дані. Працює і під WSGI, і під ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_alias.set(choose_read_alias(is_pinned(request)))
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_alias.reset(token)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        pinned = is_pinned(request)
+        # recently_written() читає кеш — синхронний бекенд, тож з потоку
+        alias = await sync_to_async(choose_read_alias)(pinned) if get_replicas() else DEFAULT_DB_ALIAS
+        token = _request_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_alias.reset(token)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and get_replicas():
+            response.set_signed_cookie(
+                PIN_COOKIE, '1', salt=PIN_SALT, max_age=get_pin_seconds(),
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
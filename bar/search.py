@@ -0,0 +1,210 @@
+"""
+Повнотекстовий пошук по каталогу на SQLite FTS5.
+
+LIKE в SQLite регістронезалежний лише для ASCII, тому "горілка" не знаходить "Горілка".
+Ми зберігаємо в індексі вже "згорнутий" текст: casefold + транслітерація кирилиці
+латиницею, і так само згортаємо запит. Тому "горілка", "Горілка" і "horilka" дають
+однаковий результат. rowid у FTS-таблицях дорівнює pk моделі.
+
+На інших СУБД (або якщо SQLite зібраний без FTS5) усе падає назад на icontains.
+"""
+import re
+
+from django.apps import apps as global_apps
+from django.db import connections
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+TRANSLIT = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ё': 'e', 'ъ': '', '’': '', "'": '', 'ʼ': '',
+}
+_TRANSLIT_TABLE = str.maketrans(TRANSLIT)
+_TOKEN_RE = re.compile(r'\w+')
+
+# kind -> (таблиця, колонки)
+INDEXES = {
+    'product': ('bar_product_fts', ('name', 'description')),
+    'cocktail': ('bar_cocktail_fts', ('name', 'description', 'ingredients')),
+    'ingredient': ('bar_ingredient_fts', ('name',)),
+}
+
+_available = {}
+
+
+def fold(text):
+    """Unicode casefold + транслітерація кирилиці в латиницю."""
+    return (text or '').casefold().translate(_TRANSLIT_TABLE)
+
+
+def match_expression(query, column=None):
+    """Перетворює введений користувачем текст на безпечний FTS5-вираз з префіксним пошуком."""
+    tokens = _TOKEN_RE.findall(fold(query))
+    if not tokens:
+        return None
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    if column:
+        return f'{column} : ({expression})'
+    return expression
+
+
+def reset_availability(using=None):
+    """Забуває, чи є FTS-таблиці (після migrate їх могли створити або видалити)."""
+    if using is None:
+        _available.clear()
+    else:
+        _available.pop(using, None)
+
+
+def is_available(using='default'):
+    if using not in _available:
+        connection = connections[using]
+        tables = set(connection.introspection.table_names()) if connection.vendor == 'sqlite' else set()
+        _available[using] = all(table in tables for table, _ in INDEXES.values())
+    return _available[using]
+
+
+def _product_row(row):
+    pk, name, description = row
+    return (pk, fold(name), fold(description))
+
+
+def _ingredient_row(row):
+    pk, name = row
+    return (pk, fold(name))
+
+
+def _cocktail_rows(CocktailIngredient, cocktails, using):
+    """cocktails — кортежі (pk, name, description); назви інгредієнтів тягнемо одним запитом."""
+    names = {}
+    ingredient_rows = (
+        CocktailIngredient.objects.using(using)
+        .filter(cocktail_id__in=[row[0] for row in cocktails])
+        .order_by('pk').values_list('cocktail_id', 'ingredient__name')
+    )
+    for cocktail_id, ingredient_name in ingredient_rows:
+        names.setdefault(cocktail_id, []).append(ingredient_name)
+    return [
+        (pk, fold(name), fold(description), fold(' '.join(names.get(pk, ()))))
+        for pk, name, description in cocktails
+    ]
+
+
+def _replace(kind, rows, using):
+    table, columns = INDEXES[kind]
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({placeholders})", rows
+        )
+
+
+def remove(kind, pks, using='default'):
+    if not is_available(using):
+        return
+    table, _ = INDEXES[kind]
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def index_products(products, using='default'):
+    if is_available(using):
+        _replace('product', [_product_row((p.pk, p.name, p.description)) for p in products], using)
+
+
+def index_ingredients(ingredients, using='default'):
+    if is_available(using):
+        _replace('ingredient', [_ingredient_row((i.pk, i.name)) for i in ingredients], using)
+
+
+def index_cocktails(cocktail_ids, using='default'):
+    """Переіндексовує коктейлі разом з назвами інгредієнтів; видалені прибирає з індексу."""
+    from .models import Cocktail, CocktailIngredient
+
+    if not is_available(using):
+        return
+    cocktail_ids = set(cocktail_ids)
+    cocktails = list(Cocktail.objects.using(using).filter(pk__in=cocktail_ids).values_list('pk', 'name', 'description'))
+    remove('cocktail', cocktail_ids - {row[0] for row in cocktails}, using)
+    _replace('cocktail', _cocktail_rows(CocktailIngredient, cocktails, using), using)
+
+
+def _chunks(queryset, size):
+    chunk = []
+    for row in queryset.iterator(chunk_size=size):
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rebuild(kind, batch_size=2000, using='default', apps=None):
+    """
+    Повна перебудова індексу пачками; повертає кількість проіндексованих об'єктів.
+    Працює через values_list, тож підходить і для історичних моделей у міграціях.
+    """
+    apps = apps or global_apps
+    Product = apps.get_model('bar', 'Product')
+    Cocktail = apps.get_model('bar', 'Cocktail')
+    CocktailIngredient = apps.get_model('bar', 'CocktailIngredient')
+    Ingredient = apps.get_model('bar', 'Ingredient')
+
+    table, _ = INDEXES[kind]
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+    total = 0
+    if kind == 'product':
+        rows = Product.objects.using(using).order_by('pk').values_list('pk', 'name', 'description')
+        for chunk in _chunks(rows, batch_size):
+            _replace(kind, [_product_row(row) for row in chunk], using)
+            total += len(chunk)
+        return total
+    if kind == 'ingredient':
+        rows = Ingredient.objects.using(using).order_by('pk').values_list('pk', 'name')
+        for chunk in _chunks(rows, batch_size):
+            _replace(kind, [_ingredient_row(row) for row in chunk], using)
+            total += len(chunk)
+        return total
+
+    rows = Cocktail.objects.using(using).order_by('pk').values_list('pk', 'name', 'description')
+    for chunk in _chunks(rows, batch_size):
+        _replace(kind, _cocktail_rows(CocktailIngredient, chunk, using), using)
+        total += len(chunk)
+    return total
+
+
+def filter_queryset(queryset, kind, query, column=None, fallback_fields=('name',)):
+    """
+    Фільтрує queryset за повнотекстовим запитом і додає анотацію search_rank (bm25,
+    менше — краще). Без FTS5 — icontains по fallback_fields і search_rank = 0.
+    """
+    model = queryset.model
+    using = queryset.db
+    expression = match_expression(query, column)
+    if expression is None:
+        return queryset.annotate(search_rank=RawSQL('0', (), output_field=FloatField()))
+    if not is_available(using):
+        condition = Q()
+        for field in ((column,) if column else fallback_fields):
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition).annotate(search_rank=RawSQL('0', (), output_field=FloatField()))
+
+    table, _ = INDEXES[kind]
+    pk_column = f'{model._meta.db_table}.{model._meta.pk.column}'
+    # FTS-таблиця приєднується за rowid = pk, тож MATCH виконується один раз, а rank —
+    # її колонка. Корельований підзапит повторював би MATCH для кожного рядка-кандидата,
+    # у ORDER BY і в умові курсора (bar/pagination.py). Другий пошук у тій самій
+    # таблиці (назва + текст) — ще одна умова MATCH: FTS5 об'єднує їх через AND.
+    if table in queryset.query.extra_tables:
+        queryset = queryset.extra(where=[f'{table} MATCH %s'], params=[expression])
+    else:
+        queryset = queryset.extra(
+            tables=[table], where=[f'{table} MATCH %s', f'{table}.rowid = {pk_column}'], params=[expression],
+        )
+    return queryset.annotate(search_rank=RawSQL(f'{table}.rank', (), output_field=FloatField()))
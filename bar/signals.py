@@ -0,0 +1,144 @@
+import os
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import images, makeable, profiling, search
+from .cache import bump_version
+from .models import AboutPage, Cocktail, CocktailIngredient, ContactInfo, Ingredient, Product, RequestProfile
+
+VERSIONED_MODELS = (AboutPage, Product, Cocktail, Ingredient, CocktailIngredient, ContactInfo)
+
+
+# --- Версії моделей для кешів (bar/cache.py) ---
+# Версію збільшуємо одразу і ще раз після коміту: інакше інший воркер, що читав
+# під час транзакції, міг би закешувати старі дані вже під новою версією.
+def bump_model_version(sender, using, **kwargs):
+    bump_version(sender)
+    transaction.on_commit(lambda: bump_version(sender), using=using)
+
+
+def bump_cocktail_ingredient_version(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        bump_version(CocktailIngredient)
+        transaction.on_commit(lambda: bump_version(CocktailIngredient), using=using)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_model_version, sender=model, dispatch_uid=f'bar.version.save.{model._meta.model_name}')
+    post_delete.connect(bump_model_version, sender=model, dispatch_uid=f'bar.version.delete.{model._meta.model_name}')
+m2m_changed.connect(bump_cocktail_ingredient_version, sender=Cocktail.ingredients.through)
+
+
+# --- Повнотекстовий індекс ---
+# Рядки фікстур (raw=True) не індексуємо поштучно: bar/management/commands/loaddata.py
+# після завантаження перебудовує індекси цілком.
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_products([instance], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using, **kwargs):
+    search.remove('product', [instance.pk], using=using)
+
+
+@receiver(post_migrate)
+def reset_search_availability(sender, using, **kwargs):
+    # FTS-таблиці створює міграція 0002: закешована відповідь is_available() могла застаріти
+    search.reset_availability(using)
+
+
+@receiver(post_save, sender=Cocktail)
+@receiver(post_delete, sender=Cocktail)
+def reindex_cocktail(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_cocktails([instance.pk], using=using)
+
+
+@receiver(post_save, sender=CocktailIngredient)
+@receiver(post_delete, sender=CocktailIngredient)
+def reindex_cocktail_ingredients(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_cocktails([instance.cocktail_id], using=using)
+
+
+@receiver(post_save, sender=Ingredient)
+def index_ingredient(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_ingredients([instance], using=using)
+
+
+@receiver(post_delete, sender=Ingredient)
+def unindex_ingredient(sender, instance, using, **kwargs):
+    search.remove('ingredient', [instance.pk], using=using)
+
+
+@receiver(post_save, sender=Ingredient)
+def reindex_ingredient_cocktails(sender, instance, using, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    cocktail_ids = CocktailIngredient.objects.using(using).filter(ingredient=instance).values_list('cocktail_id', flat=True)
+    search.index_cocktails(cocktail_ids, using=using)
+
+
+@receiver(m2m_changed, sender=Cocktail.ingredients.through)
+def reindex_cocktail_m2m(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        search.index_cocktails([instance.pk], using=using)
+    elif pk_set:
+        search.index_cocktails(pk_set, using=using)
+    else:
+        # post_clear з боку інгредієнта: pk коктейлів уже невідомі
+        search.index_cocktails(Cocktail.objects.using(using).values_list('pk', flat=True), using=using)
+
+
+# --- Індекс "що я можу приготувати" (bar/makeable.py) ---
+@receiver(post_save, sender=CocktailIngredient)
+@receiver(post_delete, sender=CocktailIngredient)
+def refresh_makeable(sender, instance, using, raw=False, **kwargs):
+    if raw:
+        return  # loaddata скидає індекс після завантаження
+    cocktail_id = instance.cocktail_id
+    transaction.on_commit(lambda: makeable.refresh_cocktails([cocktail_id], using=using), using=using)
+
+
+@receiver(m2m_changed, sender=Cocktail.ingredients.through)
+def refresh_makeable_m2m(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # З боку інгредієнта набір коктейлів невідомий (post_clear) — повна перебудова
+        transaction.on_commit(makeable.reset, using=using)
+    else:
+        cocktail_id = instance.pk
+        transaction.on_commit(lambda: makeable.refresh_cocktails([cocktail_id], using=using), using=using)
+
+
+# --- Адаптивні похідні зображень (bar/images.py) ---
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Cocktail)
+def schedule_image_derivatives(sender, instance, using, raw=False, **kwargs):
+    # Для фікстур — manage.py generate_image_derivatives одним пулом процесів
+    if not raw and images.needs_derivatives(instance):
+        pk, name = instance.pk, instance.image.name
+        transaction.on_commit(lambda: images.schedule(sender, pk, name), using=using)
+
+
+# --- Файли профілів запитів ---
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_file(sender, instance, **kwargs):
+    target = profiling.path(instance.file)
+    if target:
+        try:
+            os.remove(target)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,44 @@
+"""
+Кеш у пам'яті процесу для моделей з одним рядком: AboutPage і ContactInfo.
+
+Об'єкт читається з БД один раз на воркер і далі віддається з пам'яті. Чи він
+ще актуальний, перевіряємо за версією моделі (bar/cache.py): збереження в
+адмінці збільшує версію, і кожен воркер перечитає рядок при наступному запиті.
+Перевірка версії — один get у кеші, без SQL.
+"""
+import threading
+
+from .cache import model_version
+from .models import AboutPage, ContactInfo
+
+MODELS = (AboutPage, ContactInfo)
+
+_lock = threading.Lock()
+_objects = {}  # модель -> (версія, об'єкт або None)
+
+
+def get(model):
+    """Перший (єдиний) об'єкт моделі або None."""
+    # Версію читаємо до запиту: якщо рядок змінять під час читання,
+    # ми збережемо старий об'єкт зі старою версією і перечитаємо наступного разу.
+    version = model_version(model)
+    entry = _objects.get(model)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    obj = model.objects.order_by('pk').first()
+    with _lock:
+        _objects[model] = (version, obj)
+    return obj
+
+
+def about_page():
+    return get(AboutPage)
+
+
+def contact_info():
+    return get(ContactInfo)
+
+
+def reset():
+    with _lock:
+        _objects.clear()
@@ -0,0 +1,39 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+register = template.Library()
+
+
+def _srcset(entries):
+    return ', '.join(f'{default_storage.url(name)} {width}w' for width, name in entries)
+
+
+@register.simple_tag
+def responsive_image(obj, sizes='100vw', alt='', css_class='', loading='lazy'):
+    """
+    <picture> з WebP і JPEG srcset для obj.image за описом obj.image_variants
+    (bar/images.py). Поки похідних немає або вони від старого файлу — звичайний <img>.
+
+        {% responsive_image product sizes="300px" alt=product.name %}
+    """
+    image = obj.image
+    if not image:
+        return ''
+    variants = getattr(obj, 'image_variants', None) or {}
+    attrs = [('alt', alt), ('loading', loading), ('decoding', 'async')]
+    if css_class:
+        attrs.append(('class', css_class))
+    if variants.get('source') != image.name or not variants.get('jpeg'):
+        return format_html('<img src="{}"{}>', image.url, format_html_join('', ' {}="{}"', attrs))
+
+    attrs += [('width', variants['width']), ('height', variants['height'])]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}>'
+        '</picture>',
+        _srcset(variants['webp']), sizes,
+        default_storage.url(variants['jpeg'][-1][1]), _srcset(variants['jpeg']), sizes,
+        format_html_join('', ' {}="{}"', attrs),
+    )
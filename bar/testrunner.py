@@ -0,0 +1,31 @@
+"""
+Запуск тестів з окремим кешем.
+
+За замовчуванням кеш — FileBasedCache у BASE_DIR/cache (settings.CACHES), і
+тести, що викликають cache.clear(), чистили б і заповнювали теку робочого
+дерева. Тут кеш той самий за типом (спільний для процесів, як у воркерів
+gunicorn), але в тимчасовій теці, яку прибирають після прогону.
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='bar-test-cache-')
+        self.cache_override = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': self.cache_dir,
+            'OPTIONS': settings.CACHES['default'].get('OPTIONS', {}),
+        }})
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -459,3 +459,2142 @@ class ProjectURLTests(TestCase):
         # Перевірка, що /about/ працює як наслідок include('bar.urls')
         response = self.client.get('/about/')
         self.assertEqual(response.status_code, 200)
+
+
+# ------------------ query budget tests ------------------
+
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern
+from bar import urls as bar_urls
+from bar.querybudget import assert_max_queries, query_budget, QueryBudgetExceeded
+
+
+def make_cocktail_with_ingredients(name, count):
+    cocktail = Cocktail.objects.create(name=name, description="...", image=get_image())
+    for i in range(count):
+        ingredient = Ingredient.objects.create(name=f"{name} ingredient {i}")
+        CocktailIngredient.objects.create(cocktail=cocktail, ingredient=ingredient, quantity=f"{i} мл")
+    return cocktail
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name="Vodka", category="horilka", abv=40.0, volume="0.5", image=get_image())
+        cls.cocktail = make_cocktail_with_ingredients("Mule", 3)
+        make_cocktail_with_ingredients("Sunrise", 5)
+        AboutPage.objects.create(title="About", content="...")
+        ContactInfo.objects.create(address="Kyiv", email="a@b.com", phone="1")
+
+    def url_for(self, pattern):
+        kwargs = {}
+        if 'pk' in pattern.pattern.converters:
+            kwargs['pk'] = self.cocktail.pk if 'cocktail' in pattern.name else self.product.pk
+        return reverse(f'bar:{pattern.name}', kwargs=kwargs)
+
+    def test_every_bar_view_declares_budget(self):
+        """Кожен endpoint із bar.urls має задекларований бюджет запитів"""
+        for pattern in bar_urls.urlpatterns:
+            view = getattr(pattern.callback, 'view_class', pattern.callback)
+            self.assertIsNotNone(getattr(view, 'query_budget', None), pattern.name)
+
+    def test_every_bar_view_stays_within_budget(self):
+        for pattern in bar_urls.urlpatterns:
+            if not isinstance(pattern, URLPattern):
+                continue
+            with self.subTest(pattern.name):
+                response = self.client.get(self.url_for(pattern))
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/').status_code, 200)
+
+    def test_cocktail_detail_is_constant_in_ingredients(self):
+        """Кількість запитів не залежить від кількості інгредієнтів"""
+        small = make_cocktail_with_ingredients("Small", 1)
+        big = make_cocktail_with_ingredients("Big", 20)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.get(f'/cocktails/{small.pk}/')
+        with CaptureQueriesContext(connection) as big_queries:
+            self.client.get(f'/cocktails/{big.pk}/')
+        self.assertEqual(len(small_queries), len(big_queries))
+
+    def test_budget_exceeded_raises(self):
+        @query_budget(0)
+        def greedy_view(request):
+            list(Product.objects.all())
+            return None
+
+        with self.assertRaises(QueryBudgetExceeded):
+            greedy_view(RequestFactory().get('/'))
+
+    def test_assert_max_queries(self):
+        with assert_max_queries(1):
+            Product.objects.count()
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_max_queries(1):
+                Product.objects.count()
+                Cocktail.objects.count()
+
+
+# ------------------ keyset pagination tests ------------------
+
+from unittest import mock
+
+from django.core.cache import cache
+from bar.pagination import KeysetPaginator
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            Product.objects.create(name=f"Product {i % 3}", category="horilka", abv=40 + i, volume="0.5",
+                                   image=get_image(), is_kosher=i % 2 == 0)
+
+    def walk(self, ordering, per_page=3, queryset=None):
+        paginator = KeysetPaginator(queryset or Product.objects.all(), ordering, per_page)
+        page = paginator.page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            pages.append(page)
+        return paginator, pages
+
+    def test_forward_walk_matches_full_ordering(self):
+        for ordering in ('name', '-name', 'abv', '-abv', 'pk'):
+            with self.subTest(ordering):
+                _, pages = self.walk(ordering)
+                walked = [p.pk for page in pages for p in page]
+                expected = list(Product.objects.order_by(ordering, ('-' if ordering.startswith('-') else '') + 'pk')
+                                .values_list('pk', flat=True))
+                self.assertEqual(walked, expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        paginator, pages = self.walk('name')
+        self.assertFalse(pages[0].has_previous())
+        back = paginator.page(pages[2].previous_cursor)
+        self.assertEqual(list(back), list(pages[1]))
+        first = paginator.page(back.previous_cursor)
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertFalse(first.has_previous())
+
+    def test_tampered_or_foreign_cursor_falls_back_to_first_page(self):
+        paginator, pages = self.walk('name')
+        self.assertEqual(list(paginator.page('garbage')), list(pages[0]))
+        other = KeysetPaginator(Product.objects.all(), 'abv', 3)
+        self.assertEqual(list(other.page(pages[0].next_cursor)), list(other.page()))
+
+    def test_list_view_pages_with_filters(self):
+        response = self.client.get('/products/?is_kosher=true')
+        self.assertEqual(len(response.context['products']), 4)
+        self.assertFalse(response.context['is_paginated'])
+
+        cache.clear()  # розмір сторінки змінюється "на льоту", кешована сторінка вже неактуальна
+        with mock.patch.object(ProductListView, 'paginate_by', 2):
+            response = self.client.get('/products/?is_kosher=true')
+            page = response.context['page_obj']
+            self.assertTrue(page.has_next())
+            self.assertContains(response, 'is_kosher=true')
+            response = self.client.get('/products/', {'is_kosher': 'true', 'cursor': page.next_cursor})
+            self.assertTrue(all(p.is_kosher for p in response.context['products']))
+            self.assertEqual(len(response.context['products']), 2)
+
+
+# ------------------ full-text search tests ------------------
+
+from io import StringIO
+from django.core.management import call_command
+from bar import search
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.horilka = Product.objects.create(name="Горілка Преміум", description="Класична", category="horilka",
+                                             abv=40, volume="0.5", image=get_image())
+        cls.medova = Product.objects.create(name="Настоянка Медова", description="Мед і горілка", category="infusion",
+                                            abv=35, volume="0.5", image=get_image())
+        cls.mule = Cocktail.objects.create(name="Kyiv Mule", description="Освіжаючий", image=get_image())
+        cls.lime = Ingredient.objects.create(name="Лайм")
+        CocktailIngredient.objects.create(cocktail=cls.mule, ingredient=cls.lime, quantity="1 шт")
+
+    def names(self, response, key):
+        return [obj.name for obj in response.context[key]]
+
+    def test_fold_casefolds_and_transliterates(self):
+        self.assertEqual(search.fold("Горілка"), search.fold("горілка"))
+        self.assertEqual(search.fold("Горілка"), "horilka")
+        self.assertIsNone(search.match_expression("!!!"))
+
+    def test_cyrillic_case_insensitive_name_search(self):
+        response = self.client.get('/products/', {'name': 'горілка'})
+        self.assertEqual(self.names(response, 'products'), ["Горілка Преміум"])
+
+    def test_latin_query_matches_cyrillic(self):
+        response = self.client.get('/products/', {'q': 'horilka'})
+        self.assertEqual(set(self.names(response, 'products')), {"Горілка Преміум", "Настоянка Медова"})
+        # назва важить більше за опис, тож "Горілка Преміум" перша
+        self.assertEqual(self.names(response, 'products')[0], "Горілка Преміум")
+
+    def test_category_matches_label(self):
+        response = self.client.get('/products/', {'category': 'настоянка'})
+        self.assertEqual(self.names(response, 'products'), ["Настоянка Медова"])
+
+    def test_cocktail_search_by_ingredient_name(self):
+        response = self.client.get('/cocktails/', {'q': 'лайм'})
+        self.assertEqual(self.names(response, 'cocktails'), ["Kyiv Mule"])
+
+    def test_index_follows_save_and_delete(self):
+        self.lime.name = "Лимон"
+        self.lime.save()
+        self.assertEqual(self.names(self.client.get('/cocktails/', {'q': 'лимон'}), 'cocktails'), ["Kyiv Mule"])
+        self.mule.cocktailingredient_set.all().delete()
+        self.assertEqual(self.names(self.client.get('/cocktails/', {'q': 'лимон'}), 'cocktails'), [])
+        self.medova.delete()
+        self.assertEqual(self.names(self.client.get('/products/', {'q': 'медова'}), 'products'), [])
+
+    def test_match_runs_once_per_query(self):
+        queryset = search.filter_queryset(Product.objects.all(), 'product', 'горілка', column='name')
+        queryset = search.filter_queryset(queryset, 'product', 'преміум')
+        sql = str(queryset.order_by('search_rank', 'pk').query)
+        # FTS-таблиця в FROM, без корельованого підзапиту з MATCH на кожен рядок
+        self.assertEqual(sql.count('"bar_product_fts"'), 1)
+        self.assertNotIn('SELECT rank', sql)
+        self.assertEqual([product.name for product in queryset], ["Горілка Преміум"])
+        page = search.filter_queryset(Product.objects.all(), 'product', 'horilka').filter(search_rank__gt=-1e9)
+        self.assertEqual(page.count(), 2)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM bar_product_fts')
+        self.assertEqual(self.names(self.client.get('/products/', {'name': 'горілка'}), 'products'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('product: 2', out.getvalue())
+        self.assertEqual(self.names(self.client.get('/products/', {'name': 'горілка'}), 'products'), ["Горілка Преміум"])
+
+
+# ------------------ volume / range filter tests ------------------
+
+from decimal import Decimal
+from bar.models import parse_volume
+from bar.filters import ProductFilter
+
+
+class ProductVolumeTests(TestCase):
+    def test_parse_volume(self):
+        self.assertEqual(parse_volume("0.5"), Decimal("0.500"))
+        self.assertEqual(parse_volume("0.7L"), Decimal("0.700"))
+        self.assertEqual(parse_volume("0,7 л"), Decimal("0.700"))
+        self.assertEqual(parse_volume("500 мл"), Decimal("0.500"))
+        self.assertIsNone(parse_volume("багато"))
+        self.assertIsNone(parse_volume(""))
+
+    def test_volume_litres_follows_volume(self):
+        product = Product.objects.create(name="Gin", category="h", abv=40.0, volume="0.7L")
+        self.assertEqual(product.volume_litres, Decimal("0.700"))
+        product.volume = "1 л"
+        product.save(update_fields=['volume'])
+        product.refresh_from_db()
+        self.assertEqual(product.volume_litres, Decimal("1.000"))
+
+    def test_filter_normalizes_params(self):
+        product_filter = ProductFilter({'volume': '0.7L', 'abv_min': '35,5', 'abv_max': 'abc',
+                                        'is_kosher': 'TRUE', 'is_limited': 'maybe', 'sort': 'drop table'})
+        self.assertEqual(product_filter.cleaned, {'volume': Decimal('0.700'), 'abv_min': Decimal('35.5'),
+                                                  'is_kosher': True})
+        self.assertEqual(ProductFilter({'abv_min': '35.5', 'is_kosher': 'true'}).signature(),
+                         ProductFilter({'is_kosher': 'TRUE', 'x': '1', 'abv_min': '35,5'}).signature())
+
+
+class ProductRangeFilterViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, abv, volume in (("Small", 35, "0.2"), ("Half", 40, "0.5L"), ("Big", 45, "0,7 л"), ("Unknown", 50, "")):
+            Product.objects.create(name=name, category="horilka", abv=abv, volume=volume, image=get_image())
+
+    def names(self, params):
+        return [p.name for p in self.client.get('/products/', params).context['products']]
+
+    def test_exact_volume_matches_numeric_value(self):
+        self.assertEqual(self.names({'volume': '0.5'}), ["Half"])
+        self.assertEqual(self.names({'volume': '700 мл'}), ["Big"])
+
+    def test_volume_and_abv_ranges(self):
+        self.assertEqual(self.names({'volume_min': '0.5'}), ["Big", "Half"])
+        self.assertEqual(self.names({'volume_max': '0.5'}), ["Half", "Small"])
+        self.assertEqual(self.names({'abv_min': '40', 'abv_max': '45'}), ["Big", "Half"])
+
+    def test_sorting(self):
+        self.assertEqual(self.names({'sort': '-abv'}), ["Unknown", "Big", "Half", "Small"])
+        self.assertEqual(self.names({'sort': 'volume'}), ["Unknown", "Small", "Half", "Big"])
+
+
+# ------------------ facet tests ------------------
+
+from django.core.cache import cache
+from bar import facets
+from bar.cache import model_version
+
+
+class FacetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rows = (
+            ("A", "horilka", 40, "0.5", True, False),
+            ("B", "horilka", 38, "0.7", False, False),
+            ("C", "infusion", 25, "0.5", False, True),
+            ("D", "infusion", 35, "1 л", True, True),
+        )
+        for name, category, abv, volume, kosher, limited in rows:
+            Product.objects.create(name=name, category=category, abv=abv, volume=volume,
+                                   is_kosher=kosher, is_limited=limited, image=get_image())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = facets.compute_counts(ProductFilter({}))
+        self.assertEqual(counts['category'], {'horilka': 2, 'infusion': 2})
+        self.assertEqual(counts['is_kosher'], {True: 2, False: 2})
+        self.assertEqual(counts['volume'], {'upto-0.5': 2, '0.5-1': 1, 'from-1': 1})
+        self.assertEqual(counts['abv'], {'upto-30': 1, '30-40': 2, 'from-40': 1})
+
+    def test_dimension_ignores_its_own_filter(self):
+        counts = facets.compute_counts(ProductFilter({'category': 'horilka', 'is_kosher': 'true'}))
+        # категорія рахується з урахуванням лише is_kosher
+        self.assertEqual(counts['category'], {'horilka': 1, 'infusion': 1})
+        # інші виміри — з урахуванням обох фільтрів
+        self.assertEqual(counts['is_limited'], {True: 0, False: 1})
+
+    def test_counts_are_cached_per_signature_and_invalidated_on_save(self):
+        product_filter = ProductFilter({'is_kosher': 'true'})
+        facets.get_counts(product_filter)
+        with self.assertNumQueries(0):
+            facets.get_counts(ProductFilter({'is_kosher': 'TRUE', 'sort': '-abv'}))
+        version = model_version(Product)
+        Product.objects.create(name="E", category="horilka", abv=40, volume="0.5", is_kosher=True, image=get_image())
+        self.assertNotEqual(model_version(Product), version)
+        self.assertEqual(facets.get_counts(product_filter)['category']['horilka'], 2)
+
+    def test_product_list_renders_facets(self):
+        response = self.client.get('/products/', {'category': 'horilka'})
+        category = response.context['facets'][0]
+        self.assertEqual(category['name'], 'category')
+        self.assertTrue(category['options'][0]['selected'])
+        self.assertContains(response, '?category=infusion')
+
+
+# ------------------ "what can I make" tests ------------------
+
+import random
+from bar import makeable
+from bar.cache import VERSION_KEY
+from bar.makeable import IngredientIndex
+
+
+class IngredientIndexTests(TestCase):
+    def brute_force(self, recipes, have, max_missing):
+        rows = []
+        for cocktail_id, ingredients in recipes.items():
+            matched = len(ingredients & have)
+            if matched and len(ingredients) - matched <= max_missing:
+                rows.append((cocktail_id, matched, len(ingredients)))
+        # за рівного покриття — більші рецепти, далі порядок вставки (тут він збігається з id)
+        return sorted(rows, key=lambda row: (row[2] - row[1], -row[1] / row[2], -row[2], row[0]))
+
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        recipes = {c: set(rng.sample(range(40), rng.randint(1, 9))) for c in range(1, 300)}
+        index = IngredientIndex.from_pairs((c, i) for c, ingredients in recipes.items() for i in ingredients)
+        for _ in range(50):
+            have = set(rng.sample(range(40), rng.randint(1, 15)))
+            max_missing = rng.randint(0, 3)
+            self.assertEqual(index.query(have, max_missing), self.brute_force(recipes, have, max_missing))
+
+    def test_incremental_updates(self):
+        index = IngredientIndex.from_pairs([(1, 10), (1, 11), (2, 10)])
+        self.assertEqual(index.query({10}), [(2, 1, 1)])
+        index.set_cocktail(2, {10, 12})
+        index.remove_cocktail(1)
+        index.set_cocktail(3, {10})
+        self.assertEqual(index.query({10}), [(3, 1, 1)])
+        self.assertEqual(index.query({10}, max_missing=1), [(3, 1, 1), (2, 1, 2)])
+        self.assertEqual(index.query({99}), [])
+
+
+class MakeableViewTests(TestCase):
+    def setUp(self):
+        makeable.reset()
+        self.vodka = Ingredient.objects.create(name="Горілка")
+        self.juice = Ingredient.objects.create(name="Томатний сік")
+        self.lime = Ingredient.objects.create(name="Лайм")
+        self.mary = Cocktail.objects.create(name="Bloody Mary", image=get_image())
+        self.mary.ingredients.set([self.vodka, self.juice])
+        self.shot = Cocktail.objects.create(name="Shot", image=get_image())
+        self.shot.ingredients.set([self.vodka])
+
+    def get(self, **params):
+        return self.client.get(reverse('bar:cocktail_makeable'), params).json()
+
+    def test_exact_and_partial_matches(self):
+        data = self.get(ingredients=str(self.vodka.pk))
+        self.assertEqual([row['name'] for row in data['results']], ["Shot"])
+        data = self.get(ingredients="горілка", missing=1)
+        self.assertEqual([row['name'] for row in data['results']], ["Shot", "Bloody Mary"])
+        self.assertEqual(data['results'][1]['missing'], ["Томатний сік"])
+
+    def test_index_follows_ingredient_changes(self):
+        self.get(ingredients="лайм")
+        with self.captureOnCommitCallbacks(execute=True):
+            CocktailIngredient.objects.create(cocktail=self.shot, ingredient=self.lime, quantity="1")
+        data = self.get(ingredients="горілка,лайм")
+        self.assertEqual([row['name'] for row in data['results']], ["Shot"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shot.delete()
+        self.assertEqual(self.get(ingredients="горілка,лайм")['results'], [])
+
+    def test_local_refresh_does_not_hide_other_worker_changes(self):
+        self.get(ingredients="лайм")
+        # Рядок і нова версія від іншого воркера: сигнали цього процесу їх не бачили
+        CocktailIngredient.objects.bulk_create([CocktailIngredient(cocktail=self.mary, ingredient=self.lime, quantity="1")])
+        cache.set(VERSION_KEY.format('bar.cocktailingredient'), model_version(CocktailIngredient) + 1, timeout=None)
+        with self.captureOnCommitCallbacks(execute=True):
+            CocktailIngredient.objects.create(cocktail=self.shot, ingredient=self.lime, quantity="1")
+        data = self.get(ingredients="лайм", missing=2)
+        self.assertEqual({row['name'] for row in data['results']}, {"Shot", "Bloody Mary"})
+
+    def test_bad_params(self):
+        response = self.client.get(reverse('bar:cocktail_makeable'), {'missing': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+# ------------------ page cache tests ------------------
+
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.utils import timezone
+
+from bar import instrumentation, loadtest, pagecache
+from bar.cache import bump_version
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=600)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image=get_image())
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get('/products/')
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/products/')
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_normalized(self):
+        self.client.get('/products/?is_kosher=false&sort=name')
+        response = self.client.get('/products/?sort=name&is_kosher=false')
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        response = self.client.get('/products/?is_kosher=true&sort=name')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_unknown_params_redirect_to_canonical_url(self):
+        response = self.client.get('/products/?name=A&evil=xyz')
+        self.assertRedirects(response, '/products/?name=A', fetch_redirect_response=False)
+        response = self.client.get('/products/?name=A')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertNotContains(response, 'evil')
+
+    def test_repeated_params_use_the_value_the_view_reads(self):
+        kosher = Product.objects.create(name="Kosher", category="horilka", abv=40, volume="0.5", is_kosher=True, image=get_image())
+        response = self.client.get('/products/?is_kosher=false&is_kosher=true')
+        self.assertRedirects(response, '/products/?is_kosher=true', fetch_redirect_response=False)
+        self.client.get('/products/?is_kosher=false')
+        response = self.client.get('/products/?is_kosher=true')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, kosher.name)
+        self.assertNotContains(response, self.product.name)
+
+    def test_empty_values_are_part_of_the_key(self):
+        self.client.get('/products/?is_kosher=false')
+        self.assertEqual(self.client.get('/products/?is_kosher=false&name=')['X-Page-Cache'], 'MISS')
+
+    def test_multi_value_params_keep_their_order(self):
+        url = reverse('bar:api_product_detail', args=[self.product.pk])
+        first = self.client.get(url, {'fields': ['name', 'id']})
+        second = self.client.get(url, {'fields': ['id', 'name']})
+        self.assertEqual(second['X-Page-Cache'], 'MISS')
+        self.assertEqual(list(json.loads(first.content)), ['name', 'id'])
+        self.assertEqual(list(json.loads(second.content)), ['id', 'name'])
+
+    def test_save_invalidates_only_dependent_pages(self):
+        self.client.get('/products/')
+        self.client.get(f'/products/{self.product.pk}/')
+        self.client.get('/contacts/')
+        self.product.name = "Горілка"
+        self.product.save()
+        self.assertEqual(self.client.get('/products/')['X-Page-Cache'], 'MISS')
+        response = self.client.get(f'/products/{self.product.pk}/')
+        self.assertContains(response, "Горілка")
+        self.assertEqual(self.client.get('/contacts/')['X-Page-Cache'], 'HIT')
+
+    def test_not_found_is_not_cached(self):
+        self.client.get('/products/999999/')
+        self.assertEqual(self.client.get('/products/999999/').status_code, 404)
+        self.assertEqual(pagecache.stats()['product_detail']['hits'], 0)
+
+    def test_stats_and_command(self):
+        pagecache.reset_stats()
+        self.client.get('/about/')
+        self.client.get('/about/')
+        self.assertEqual(pagecache.stats()['about'], {'hits': 1, 'misses': 1, 'ratio': 0.5})
+        out = StringIO()
+        call_command('pagecache_stats', stdout=out)
+        self.assertIn('about', out.getvalue())
+
+    def test_hit_does_not_write_to_shared_cache(self):
+        self.client.get('/about/')
+        backend = type(caches['default'])
+        with mock.patch.object(backend, 'set') as set_, mock.patch.object(backend, 'add') as add, \
+                mock.patch.object(backend, 'incr') as incr:
+            self.assertEqual(self.client.get('/about/')['X-Page-Cache'], 'HIT')
+        self.assertFalse(set_.called or add.called or incr.called)
+        metrics = instrumentation.render_prometheus(instrumentation.collect())
+        self.assertRegex(metrics, r'bar_page_cache_hits_total\{view="about"\} [1-9]')
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.client.get('/about/')
+        self.assertNotIn('X-Page-Cache', self.client.get('/about/'))
+
+    def test_change_in_other_worker_invalidates_pages_and_etags(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(CACHES={'default': {**settings.CACHES['default'], 'LOCATION': directory}}):
+            first = self.client.get('/products/')
+            self.assertEqual(self.client.get('/products/')['X-Page-Cache'], 'HIT')
+            # update() не шле сигналів: версію збільшує інший процес, як збереження в іншому воркері
+            Product.objects.update(name="Змінено", updated_at=timezone.now())
+            loadtest.call_in_process(
+                {'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'], 'CACHE_LOCATION': directory},
+                bump_version, Product,
+            )
+            response = self.client.get('/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Page-Cache'], 'MISS')
+            self.assertNotEqual(response['ETag'], first['ETag'])
+            self.assertContains(response, "Змінено")
+
+
+
+# ------------------ singleton cache tests ------------------
+
+import shutil
+import tempfile
+
+from bar import loadtest, singletons
+from bar.cache import bump_version
+
+
+class SingletonCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        self.contact = ContactInfo.objects.create(address="Kyiv", phone="+380000000000", email="bar@example.com")
+        self.about = AboutPage.objects.create(title="Про нас", content="...")
+
+    def test_object_is_read_once_per_version(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(singletons.contact_info(), self.contact)
+        with self.assertNumQueries(0):
+            self.assertEqual(singletons.contact_info(), self.contact)
+
+    def test_save_invalidates(self):
+        singletons.contact_info()
+        self.contact.phone = "+380111111111"
+        self.contact.save()
+        self.assertEqual(singletons.contact_info().phone, "+380111111111")
+
+    def test_other_worker_change_is_seen_through_version(self):
+        """update() не шле сигналів — так виглядає зміна, зроблена іншим воркером"""
+        singletons.about_page()
+        AboutPage.objects.update(title="Новий заголовок")
+        self.assertEqual(singletons.about_page().title, "Про нас")
+        bump_version(AboutPage)
+        self.assertEqual(singletons.about_page().title, "Новий заголовок")
+
+    def test_tests_do_not_touch_working_tree_cache(self):
+        # settings у цьому модулі — сам djangoProject2.settings, без override_settings
+        from django.conf import settings as current
+        location = current.CACHES['default']['LOCATION']
+        self.assertFalse(os.path.abspath(location).startswith(str(settings.BASE_DIR)))
+
+    def test_default_cache_is_shared_between_processes(self):
+        self.assertTrue(settings.CACHES['default']['BACKEND'].endswith('FileBasedCache'))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        caches_setting = {'default': {**settings.CACHES['default'], 'LOCATION': directory}}
+        with override_settings(CACHES=caches_setting):
+            singletons.about_page()
+            AboutPage.objects.update(title="Змінено в іншому воркері")
+            loadtest.call_in_process(
+                {'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'], 'CACHE_LOCATION': directory},
+                bump_version, AboutPage,
+            )
+            self.assertEqual(singletons.about_page().title, "Змінено в іншому воркері")
+
+    def test_empty_table(self):
+        ContactInfo.objects.all().delete()
+        self.assertIsNone(singletons.contact_info())
+
+    @override_settings(PAGE_CACHE_TIMEOUT=0)
+    def test_footer_without_queries_when_warm(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertContains(response, "bar@example.com")
+
+    def test_contact_change_invalidates_cached_pages(self):
+        self.client.get('/')
+        self.contact.email = "new@example.com"
+        self.contact.save()
+        self.assertContains(self.client.get('/'), "new@example.com")
+
+
+# ------------------ conditional GET tests ------------------
+
+from django.utils.http import http_date
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        self.product = Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image=get_image())
+        self.other = Product.objects.create(name="Nalyvka", category="infusion", abv=20, volume="0.7", image=get_image())
+        self.cocktail = make_cocktail_with_ingredients("Mule", 2)
+
+    def test_updated_at_is_set(self):
+        before = self.product.updated_at
+        self.product.name = "Горілка"
+        self.product.save()
+        self.assertGreater(self.product.updated_at, before)
+
+    def test_fixture_loads_with_loaddata(self):
+        """Сирі збереження loaddata не викликають auto_now, тож updated_at має бути у фікстурі"""
+        call_command('loaddata', os.path.join(settings.BASE_DIR, 'Initial_Data.json'), verbosity=0)
+        self.assertTrue(AboutPage.objects.exists())
+        self.assertFalse(Product.objects.filter(updated_at__isnull=True).exists())
+        self.assertFalse(Product.objects.filter(volume_litres=0).exists())
+
+    def test_loaddata_indexes_in_bulk(self):
+        with mock.patch('bar.search.index_products') as index_products, \
+                mock.patch('bar.search.index_cocktails') as index_cocktails, \
+                mock.patch('bar.images.schedule') as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('loaddata', os.path.join(settings.BASE_DIR, 'Initial_Data.json'), verbosity=0)
+        self.assertFalse(index_products.called or index_cocktails.called or schedule.called)
+        found = search.filter_queryset(Product.objects.all(), 'product', 'настоянка медова')
+        self.assertEqual([product.name for product in found], ["Настоянка Медова"])
+
+    def test_etag_match_returns_304(self):
+        for url in ('/products/', f'/products/{self.product.pk}/', '/cocktails/', f'/cocktails/{self.cocktail.pk}/'):
+            with self.subTest(url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_if_modified_since(self):
+        response = self.client.get(f'/products/{self.product.pk}/')
+        response = self.client.get(f'/products/{self.product.pk}/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        self.product.save()
+        response = self.client.get(f'/products/{self.product.pk}/', HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_warm_validators_need_no_queries(self):
+        etag = self.client.get('/products/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_change_and_delete_change_etag(self):
+        etag = self.client.get('/products/')['ETag']
+        self.product.save()
+        changed = self.client.get('/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        # max(updated_at) після видалення старішого рядка не змінюється — допомагає count
+        self.other.delete()
+        self.assertEqual(self.client.get('/products/', HTTP_IF_NONE_MATCH=changed['ETag']).status_code, 200)
+
+    def test_detail_etag_ignores_other_objects(self):
+        etag = self.client.get(f'/products/{self.product.pk}/')['ETag']
+        self.other.save()
+        self.assertEqual(self.client.get(f'/products/{self.product.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_cocktail_detail_follows_ingredients(self):
+        url = f'/cocktails/{self.cocktail.pk}/'
+        etag = self.client.get(url)['ETag']
+        ingredient = self.cocktail.ingredients.first()
+        ingredient.name = "Лайм"
+        ingredient.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Лайм")
+
+    def test_contacts_validators_come_from_singleton(self):
+        ContactInfo.objects.create(address="Kyiv", phone="1", email="a@b.com")
+        etag = self.client.get('/contacts/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/contacts/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# ------------------ responsive image tests ------------------
+
+import hashlib
+import shutil
+import tempfile
+from PIL import Image
+from bar import images
+
+
+class ResponsiveImageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_WORKERS=0, IMAGE_WIDTHS=(320, 640, 960))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_file(self, name, size=(800, 600), mode='RGB'):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(path)
+        return name
+
+    def create_product(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image=image)
+
+    def test_render_skips_upscaling(self):
+        variants = images.render(self.media_root, self.make_file('product_images/a.png', mode='RGBA'), (320, 640, 960))
+        self.assertEqual(variants['width'], 800)
+        self.assertEqual([width for width, _ in variants['webp']], [320, 640, 800])
+        for width, name in variants['jpeg']:
+            with Image.open(os.path.join(self.media_root, name)) as derivative:
+                self.assertEqual(derivative.format, 'JPEG')
+                self.assertEqual(derivative.size, (width, round(600 * width / 800)))
+
+    def test_sources_with_same_stem_do_not_share_derivatives(self):
+        png = images.render(self.media_root, self.make_file('product_images/a.png'), (320,))
+        jpg = images.render(self.media_root, self.make_file('product_images/a.jpg'), (320,))
+        self.assertNotEqual(png['webp'], jpg['webp'])
+        self.assertNotEqual(png['jpeg'], jpg['jpeg'])
+
+    def test_derivatives_generated_after_save(self):
+        product = self.create_product(self.make_file('product_images/vodka.jpg'))
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants['source'], 'product_images/vodka.jpg')
+        self.assertEqual(product.image_variants['webp'][0], [320, 'derivatives/product_images/vodka.jpg-320w.webp'])
+
+        response = self.client.get('/products/')
+        self.assertRegex(
+            response.content.decode(),
+            r'<source type="image/webp" srcset="/media/derivatives/product_images/vodka\.jpg-320w\.[0-9a-f]{12}\.webp 320w',
+        )
+        self.assertContains(response, 'sizes="300px"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_new_image_ignores_stale_variants(self):
+        product = self.create_product(self.make_file('product_images/old.jpg'))
+        product.refresh_from_db()
+        product.image = 'product_images/missing.jpg'
+        with self.assertLogs('bar.images', 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants['source'], 'product_images/old.jpg')
+        response = self.client.get(f'/products/{product.pk}/')
+        self.assertContains(response, '<img src="/media/product_images/missing.jpg"')
+        self.assertNotContains(response, 'srcset')
+
+    def test_backfill_command(self):
+        name = self.make_file('cocktail_images/mule.jpg')
+        Cocktail.objects.bulk_create([Cocktail(name="Mule", image=name), Cocktail(name="Mule 2", image=name)])
+        out = StringIO()
+        call_command('generate_image_derivatives', 'cocktail', '--workers=1', stdout=out)
+        self.assertIn('Оброблено 1 файлів', out.getvalue())
+        self.assertEqual(
+            {c.image_variants['source'] for c in Cocktail.objects.all()}, {name},
+        )
+        out = StringIO()
+        call_command('generate_image_derivatives', stdout=out)
+        self.assertIn('Усі похідні актуальні', out.getvalue())
+
+
+# ------------------ admin thumbnail tests ------------------
+
+from django.contrib.auth.models import User
+from bar import thumbnails
+
+
+class AdminThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_SCALE=2)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, 'product_images'))
+        Image.new('RGB', (1200, 900), (10, 20, 30)).save(os.path.join(self.media_root, 'product_images/big.jpg'))
+        self.product = Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image='product_images/big.jpg')
+        self.admin = ProductAdmin(Product, site)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def test_thumbnail_generated_on_demand(self):
+        tag = self.admin.image_tag(self.product)
+        url = f'/admin/bar/product/{self.product.pk}/thumbnail/'
+        self.assertIn(url, tag)
+        self.assertIn('loading="lazy"', tag)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        with Image.open(os.path.join(self.media_root, thumbnails.thumbnail_name('product_images/big.jpg', 200))) as thumbnail:
+            self.assertEqual(thumbnail.size, (200, 150))
+        # Тепер мініатюра віддається напряму з медіа
+        self.assertRegex(self.admin.image_tag(self.product), r'/media/thumbnails/product_images/big\.jpg-200\.[0-9a-f]{12}\.webp"')
+
+    def test_sources_with_same_stem_have_own_thumbnails(self):
+        self.assertNotEqual(
+            thumbnails.thumbnail_name('product_images/big.jpg', 200),
+            thumbnails.thumbnail_name('product_images/big.png', 200),
+        )
+
+    def test_changed_source_invalidates_thumbnail(self):
+        thumbnails.generate('product_images/big.jpg', 200)
+        self.assertTrue(thumbnails.is_fresh('product_images/big.jpg', 200))
+        source = os.path.join(self.media_root, 'product_images/big.jpg')
+        later = os.stat(source).st_mtime + 10
+        os.utime(source, (later, later))
+        self.assertFalse(thumbnails.is_fresh('product_images/big.jpg', 200))
+        self.assertIn('/thumbnail/?v=', self.admin.image_tag(self.product))
+
+    def test_thumbnail_requires_staff(self):
+        response = self.client.get(f'/admin/bar/product/{self.product.pk}/thumbnail/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_missing_source_is_404(self):
+        Product.objects.filter(pk=self.product.pk).update(image='product_images/gone.jpg')
+        self.client.force_login(self.user)
+        response = self.client.get(f'/admin/bar/product/{self.product.pk}/thumbnail/')
+        self.assertEqual(response.status_code, 404)
+
+
+# ------------------ media serving tests ------------------
+
+from django.core.files.storage import default_storage
+from bar import mediafiles
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_ACCEL='')
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(self.media_root, 'product_images'))
+        self.content = bytes(range(256)) * 4
+        with open(os.path.join(self.media_root, 'product_images/a.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.url = default_storage.url('product_images/a.jpg')
+
+    def test_url_contains_content_hash(self):
+        content_hash = hashlib.md5(self.content).hexdigest()[:12]
+        self.assertEqual(self.url, f'/media/product_images/a.{content_hash}.jpg')
+
+    def test_hashed_url_is_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        plain = self.client.get('/media/product_images/a.jpg')
+        self.assertEqual(plain['Cache-Control'], 'public, max-age=3600')
+
+    def test_stale_hash_redirects_to_current_url(self):
+        with open(os.path.join(self.media_root, 'product_images/a.jpg'), 'ab') as f:
+            f.write(b'more')
+        response = self.client.get(self.url)
+        self.assertRedirects(response, default_storage.url('product_images/a.jpg'), fetch_redirect_response=False)
+
+    def test_range_requests(self):
+        cases = {
+            'bytes=0-9': (0, 10), 'bytes=1000-': (1000, 24), 'bytes=-5': (1019, 5), 'bytes=1020-5000': (1020, 4),
+        }
+        for header, (start, length) in cases.items():
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Length'], str(length))
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{start + length - 1}/1024')
+                self.assertEqual(b''.join(response.streaming_content), self.content[start:start + length])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=2000-').status_code, 416)
+        # Кілька діапазонів не підтримуємо — весь файл
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"').status_code, 200)
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_accel_offload(self):
+        with override_settings(MEDIA_ACCEL='nginx', MEDIA_ACCEL_PREFIX='/protected-media/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/product_images/a.jpg')
+        self.assertEqual(response.content, b'')
+        with override_settings(MEDIA_ACCEL='sendfile'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'product_images/a.jpg'))
+
+    def test_path_traversal(self):
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/product_images/').status_code, 404)
+
+
+# ------------------ static build tests ------------------
+
+import gzip
+from django.contrib.staticfiles.storage import staticfiles_storage
+from bar import assets
+
+
+class StaticBuildTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.override = override_settings(STATIC_ROOT=cls.static_root)
+        cls.override.enable()
+        call_command('collectstatic', '--noinput', verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.override.disable()
+        shutil.rmtree(cls.static_root)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_use_fingerprinted_local_assets(self):
+        for url in ('/', '/about/', '/products/', '/cocktails/', '/contacts/'):
+            with self.subTest(url):
+                html = self.client.get(url).content.decode()
+                self.assertNotIn('<style>', html)
+                self.assertNotIn('cdn.jsdelivr.net', html)
+                self.assertNotIn('fonts.googleapis.com', html)
+                self.assertRegex(html, r'/static/vendor/bootstrap/css/bootstrap\.min\.[0-9a-f]{12}\.css')
+
+    def test_css_references_are_rewritten(self):
+        with open(staticfiles_storage.path(staticfiles_storage.stored_name('vendor/roboto/roboto.css'))) as f:
+            self.assertRegex(f.read(), r"url\(\"roboto-300\.[0-9a-f]{12}\.woff2\"\)")
+
+    def test_precompressed_variants_are_served(self):
+        url = staticfiles_storage.url('bar/css/products.css')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        with open(staticfiles_storage.path('bar/css/products.css'), 'rb') as f:
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), f.read())
+
+        plain = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(self.client.get('/static/bar/css/products.css')['Cache-Control'], 'public, max-age=3600')
+
+    def test_binary_files_are_not_compressed(self):
+        self.assertFalse(os.path.exists(staticfiles_storage.path('vendor/roboto/roboto-300.woff2') + '.gz'))
+        self.assertEqual(assets.precompress(staticfiles_storage.path('vendor/roboto/roboto-300.woff2')), [])
+
+    def test_missing_static_file_is_404(self):
+        self.assertEqual(self.client.get('/static/bar/css/nope.css').status_code, 404)
+
+
+# ------------------ static site export tests ------------------
+
+import json
+import re
+from bar import export, singletons
+
+
+class StaticExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out_dir)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        os.makedirs(os.path.join(media_root, 'test_img'))
+        with open(os.path.join(media_root, 'test_img/test.jpg'), 'wb') as f:
+            f.write(b'jpeg')
+        self.product = Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image=get_image())
+        self.other = Product.objects.create(name="Nalyvka", category="nalyvka", abv=20, volume="0.7", image=get_image())
+        self.cocktail = Cocktail.objects.create(name="Mojito", description="Fresh", image=get_image())
+
+    def export(self, **kwargs):
+        return export.Exporter(self.out_dir, **kwargs).run()
+
+    def path(self, name):
+        return os.path.join(self.out_dir, name)
+
+    def test_page_file(self):
+        self.assertEqual(export.page_file('/'), 'index.html')
+        self.assertEqual(export.page_file('/products/5/'), 'products/5/index.html')
+        self.assertEqual(export.page_file('/products/?category=horilka'), 'products/category=horilka.html')
+        self.assertIsNone(export.page_file('/products/?q=a/b'))
+
+    def test_extract_links(self):
+        html = ('<a href="?category=horilka&amp;cursor=x">n</a><a href="/cocktails/?q=1">c</a>'
+                '<img src="/media/a.jpg" srcset="/media/a-320w.webp 320w, /media/a-640w.webp 640w">')
+        pages, assets = export.extract_links(html, '/products/')
+        self.assertEqual(pages, ['/products/?category=horilka&cursor=x'])
+        self.assertEqual(assets, ['/media/a-320w.webp', '/media/a-640w.webp', '/media/a.jpg'])
+
+    def test_full_export(self):
+        stats = self.export()
+        self.assertEqual(stats['failed'], 0)
+        for name in ('index.html', 'about/index.html', 'contacts/index.html', 'products/index.html',
+                     f'products/{self.product.pk}/index.html', f'cocktails/{self.cocktail.pk}/index.html',
+                     'products/category=horilka.html'):
+            with self.subTest(name):
+                self.assertTrue(os.path.isfile(self.path(name)))
+        self.assertTrue(os.path.isfile(self.path('products/index.html.gz')))
+        with open(self.path(f'products/{self.product.pk}/index.html'), encoding='utf-8') as f:
+            self.assertIn('Vodka', f.read())
+        media = os.listdir(self.path('media/test_img'))
+        self.assertTrue(any(re.match(r'test\.[0-9a-f]{12}\.jpg$', name) for name in media))
+
+    def test_incremental_export_renders_only_changed_pages(self):
+        first = self.export()
+        self.assertEqual(self.export()['rendered'], 0)
+
+        with open(self.path(export.MANIFEST), encoding='utf-8') as f:
+            pages = json.load(f)['pages']
+        product_lists = [url for url, page in pages.items() if page['family'] == 'products']
+        self.product.name = "Горілка"
+        self.product.save()
+        stats = self.export()
+        self.assertEqual(stats['rendered'], len(product_lists) + 1)
+        self.assertEqual(stats['kept'], first['rendered'] - stats['rendered'])
+        with open(self.path(f'products/{self.product.pk}/index.html'), encoding='utf-8') as f:
+            self.assertIn('Горілка', f.read())
+
+    def test_deleted_object_page_is_removed(self):
+        self.export()
+        name = f'products/{self.other.pk}/index.html'
+        self.assertTrue(os.path.isfile(self.path(name)))
+        self.other.delete()
+        stats = self.export()
+        self.assertGreaterEqual(stats['removed'], 1)
+        self.assertFalse(os.path.exists(self.path(name)))
+        self.assertFalse(os.path.exists(self.path(name + '.gz')))
+
+    def test_ingredient_change_rerenders_cocktail(self):
+        ingredient = Ingredient.objects.create(name="Mint")
+        CocktailIngredient.objects.create(cocktail=self.cocktail, ingredient=ingredient, quantity="5 g")
+        self.export()
+        ingredient.name = "М'ята"
+        ingredient.save()
+        self.export()
+        with open(self.path(f'cocktails/{self.cocktail.pk}/index.html'), encoding='utf-8') as f:
+            self.assertIn("М&#x27;ята", f.read())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_site', self.out_dir, '--workers', '0', stdout=out, stderr=StringIO())
+        self.assertIn('відрендерено', out.getvalue())
+        self.assertTrue(os.path.isfile(self.path(export.MANIFEST)))
+
+
+# ------------------ JSON API tests ------------------
+
+from bar import api
+
+
+class CatalogApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        self.vodka = Product.objects.create(name="Vodka", category="horilka", abv=40, volume="0.5", image=get_image())
+        self.cherry = Product.objects.create(name="Cherry", category="infusion", abv=20, volume="0.7", image=get_image(), is_kosher=True)
+        self.lime = Ingredient.objects.create(name="Лайм")
+        self.cocktails = []
+        for i in range(5):
+            cocktail = Cocktail.objects.create(name=f"Cocktail {i}", description="d", image=get_image())
+            CocktailIngredient.objects.create(cocktail=cocktail, ingredient=self.lime, quantity=f"{i} шт")
+            self.cocktails.append(cocktail)
+
+    def get_json(self, url, **extra):
+        response = self.client.get(url, **extra)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, json.loads(content)
+
+    def test_product_list_streams_all_fields(self):
+        response, data = self.get_json('/api/products/')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual([row['name'] for row in data['results']], ["Cherry", "Vodka"])
+        self.assertEqual(set(data['results'][0]), set(api.PRODUCT_FIELDS))
+        self.assertEqual(data['results'][1]['abv'], '40.00')
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields(self):
+        _, data = self.get_json('/api/products/?fields=name,is_kosher')
+        self.assertEqual(data['results'][0], {'name': "Cherry", 'is_kosher': True})
+        response, data = self.get_json('/api/products/?fields=name,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('secret', data['error'])
+
+    def test_filters_match_catalog(self):
+        for query in ('category=horilka', 'is_kosher=true', 'abv_min=30', 'sort=-abv', 'q=Vodka'):
+            with self.subTest(query):
+                html = self.client.get(f'/products/?{query}').context['products']
+                _, data = self.get_json(f'/api/products/?{query}&fields=id')
+                self.assertEqual([row['id'] for row in data['results']], [product.pk for product in html])
+
+    def test_cursor_pagination(self):
+        names = []
+        url = '/api/cocktails/?limit=2&fields=name'
+        pages = 0
+        while url:
+            _, data = self.get_json(url)
+            names += [row['name'] for row in data['results']]
+            url = data['next']
+            pages += 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, [f"Cocktail {i}" for i in range(5)])
+        response, _ = self.get_json('/api/cocktails/?cursor=forged')
+        self.assertEqual(response.status_code, 400)
+
+    def test_embedded_ingredients_in_constant_queries(self):
+        # ETag-агрегат + коктейлі + prefetch інгредієнтів — незалежно від кількості коктейлів
+        with self.assertNumQueries(3):
+            _, data = self.get_json('/api/cocktails/?fields=id,ingredients')
+        self.assertEqual(data['results'][2]['ingredients'], [{'id': self.lime.pk, 'name': "Лайм", 'quantity': "2 шт"}])
+
+    def test_ingredient_name_filter_uses_full_text_index(self):
+        Ingredient.objects.create(name="Лимон")
+        for name in ('лайм', 'ЛАЙМ', 'laim'):
+            with CaptureQueriesContext(connection) as queries:
+                _, data = self.get_json(f'/api/ingredients/?name={name}&fields=name')
+            self.assertEqual(data['results'], [{'name': "Лайм"}])
+            self.assertTrue(any('bar_ingredient_fts' in query['sql'] for query in queries))
+
+    def test_detail(self):
+        _, data = self.get_json(f'/api/cocktails/{self.cocktails[0].pk}/?fields=name,ingredients')
+        self.assertEqual(data, {'name': "Cocktail 0", 'ingredients': [{'id': self.lime.pk, 'name': "Лайм", 'quantity': "0 шт"}]})
+        _, data = self.get_json(f'/api/ingredients/{self.lime.pk}/')
+        self.assertEqual(data['name'], "Лайм")
+        response, _ = self.get_json('/api/products/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_etag(self):
+        response, _ = self.get_json('/api/products/')
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.vodka.abv = 41
+        self.vodka.save()
+        self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+        url = f'/api/products/{self.cherry.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+# ------------------ catalog import tests ------------------
+
+from bar import importer, makeable
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        makeable.reset()
+
+    def run_import(self, content, fmt='jsonl', kind=None, batch_size=1000):
+        return importer.CatalogImporter(batch_size=batch_size).run(importer.records(StringIO(content), fmt, kind))
+
+    def jsonl(self, *records):
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+
+    def test_creates_and_upserts_by_name(self):
+        product = {'type': 'product', 'name': "Vodka", 'description': "d", 'category': 'horilka',
+                   'abv': '40', 'volume': '500 мл', 'image': 'test_img/test.jpg'}
+        stats = self.run_import(self.jsonl(product))
+        self.assertEqual(stats['created']['product'], 1)
+        vodka = Product.objects.get(name="Vodka")
+        self.assertEqual(vodka.volume_litres, Decimal('0.500'))
+        updated_at = vodka.updated_at
+
+        stats = self.run_import(self.jsonl(product))
+        self.assertEqual(stats['unchanged']['product'], 1)
+        vodka.refresh_from_db()
+        self.assertEqual(vodka.updated_at, updated_at)
+
+        stats = self.run_import(self.jsonl({'type': 'product', 'name': "Vodka", 'abv': '41.5'}))
+        self.assertEqual(stats['updated']['product'], 1)
+        vodka.refresh_from_db()
+        self.assertEqual(vodka.abv, Decimal('41.5'))
+        self.assertEqual(vodka.description, "d")
+        self.assertGreater(vodka.updated_at, updated_at)
+        self.assertEqual(Product.objects.count(), 1)
+
+    def test_invalid_rows_are_reported(self):
+        stats = self.run_import(self.jsonl(
+            {'type': 'product', 'name': "Bad", 'description': "d", 'category': 'wine', 'abv': '40', 'volume': '0.5', 'image': 'a.jpg'},
+            {'type': 'product', 'name': "Bad abv", 'description': "d", 'category': 'horilka', 'abv': 'strong', 'volume': '0.5', 'image': 'a.jpg'},
+            {'type': 'unknown', 'name': "x"},
+        ) + '{broken\n')
+        self.assertEqual(stats['errors'], 4)
+        messages = sorted(stats['error_messages'])
+        self.assertEqual([message.split(':')[0] for message in messages], ['1', '2', '3', '4'])
+        self.assertIn('category', messages[0])
+        self.assertFalse(Product.objects.exists())
+
+    def test_cocktail_recipe_is_replaced(self):
+        Ingredient.objects.create(name="Лайм")
+        cocktail = {'type': 'cocktail', 'name': "Mojito", 'description': "d", 'image': 'a.jpg',
+                    'ingredients': [{'name': "Лайм", 'quantity': "1 шт"}, {'name': "Ром", 'quantity': "50 мл"}]}
+        stats = self.run_import(self.jsonl(cocktail))
+        self.assertEqual(stats['created']['ingredient'], 1)
+        mojito = Cocktail.objects.get(name="Mojito")
+        self.assertEqual(
+            sorted(mojito.cocktailingredient_set.values_list('ingredient__name', 'quantity')),
+            [("Лайм", "1 шт"), ("Ром", "50 мл")],
+        )
+        self.assertEqual(Ingredient.objects.filter(name="Лайм").count(), 1)
+
+        cocktail['ingredients'] = "Лайм: 2 шт; М'ята: 5 г"
+        stats = self.run_import(self.jsonl(cocktail))
+        self.assertEqual(
+            sorted(mojito.cocktailingredient_set.values_list('ingredient__name', 'quantity')),
+            [("Лайм", "2 шт"), ("М'ята", "5 г")],
+        )
+        # Пошук і "що я можу приготувати" бачать новий рецепт без сигналів
+        self.assertEqual([c.pk for c in self.client.get('/cocktails/?q=мята').context['cocktails']], [mojito.pk])
+        mint = Ingredient.objects.get(name="М'ята")
+        data = self.client.get(f'/cocktails/makeable/?ingredients={mint.pk}&missing=1').json()
+        self.assertEqual([row['id'] for row in data['results']], [mojito.pk])
+
+    def test_django_fixture(self):
+        with open(os.path.join(settings.BASE_DIR, 'Initial_Data.json'), encoding='utf-8') as f:
+            stats = importer.CatalogImporter(batch_size=7).run(importer.records(f, 'json'))
+        self.assertEqual(stats['errors'], 0, stats['error_messages'])
+        self.assertGreater(stats['batches'], 1)
+        self.assertEqual(Product.objects.count(), stats['created']['product'])
+        self.assertTrue(CocktailIngredient.objects.exists())
+        self.assertFalse(AboutPage.objects.exists())
+        self.assertGreater(stats['skipped'], 0)
+
+    def test_csv_and_command(self):
+        path = os.path.join(tempfile.mkdtemp(), 'products.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write("name,description,category,abv,volume,image,is_kosher\n"
+                    "Vodka,d,horilka,40,0.5,a.jpg,true\n"
+                    "Cherry,d,infusion,20,0.7,b.jpg,false\n")
+        out = StringIO()
+        call_command('import_catalog', path, '--kind', 'product', '--batch-size', '1', stdout=out, stderr=StringIO())
+        self.assertIn('записів/с', out.getvalue())
+        self.assertEqual(sorted(Product.objects.values_list('name', 'is_kosher')), [("Cherry", False), ("Vodka", True)])
+
+    def test_streaming_json_reader(self):
+        content = '[' + ','.join(json.dumps({'type': 'ingredient', 'name': f"I{i}"}) for i in range(3000)) + ']'
+        stats = self.run_import(content, fmt='json', batch_size=500)
+        self.assertEqual(stats['created']['ingredient'], 3000)
+        with self.assertRaises(ValueError):
+            self.run_import('[{"type": "ingredient", "name": "x"}', fmt='json')
+
+
+# ------------------ catalog export tests ------------------
+
+import csv
+from bar import catalog_export
+
+
+class CatalogExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lime = Ingredient.objects.create(name="Лайм")
+        self.rum = Ingredient.objects.create(name="Ром")
+        for i in range(5):
+            cocktail = Cocktail.objects.create(name=f"Cocktail {i}", description="Опис, з комою", image='a.jpg')
+            CocktailIngredient.objects.create(cocktail=cocktail, ingredient=self.lime, quantity="1 шт")
+            CocktailIngredient.objects.create(cocktail=cocktail, ingredient=self.rum, quantity=f"{i}0 мл")
+        Product.objects.create(name="Vodka", description="d", category="horilka", abv=40, volume="0.5", image='p.jpg', is_kosher=True)
+
+    def test_csv_flattens_ingredients(self):
+        lines = list(catalog_export.stream('cocktail', 'csv'))
+        rows = list(csv.reader(lines))
+        self.assertEqual(rows[0], ['name', 'description', 'image', 'ingredients'])
+        self.assertEqual(rows[3], ["Cocktail 2", "Опис, з комою", 'a.jpg', "Лайм: 1 шт; Ром: 20 мл"])
+        self.assertEqual(len(rows), 6)
+
+    def test_ingredients_loaded_per_chunk(self):
+        # Коктейлі одним курсором + інгредієнти одним запитом на кожну частину
+        with self.assertNumQueries(4):
+            records = list(catalog_export.records('cocktail', chunk_size=2))
+        self.assertEqual(records[4]['ingredients'], [{'name': "Лайм", 'quantity': "1 шт"}, {'name': "Ром", 'quantity': "40 мл"}])
+
+    def test_export_round_trips_through_import(self):
+        content = ''.join(catalog_export.stream('product', 'jsonl')) + ''.join(catalog_export.stream('cocktail', 'jsonl'))
+        self.assertEqual(json.loads(content.splitlines()[0])['is_kosher'], True)
+        stats = importer.CatalogImporter().run(importer.records(StringIO(content), 'jsonl'))
+        self.assertEqual(stats['errors'], 0, stats['error_messages'])
+        self.assertEqual(stats['unchanged'], {'product': 1, 'ingredient': 0, 'cocktail': 5, 'cocktailingredient': 10})
+
+    def test_admin_action_streams_selected(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.login(username='admin', password='pass')
+        selected = Cocktail.objects.order_by('pk')[:2]
+        response = self.client.post('/admin/bar/cocktail/', {
+            'action': 'export_csv', '_selected_action': [cocktail.pk for cocktail in selected],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="cocktails.csv"')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual([row[0] for row in rows[1:]], [cocktail.name for cocktail in selected])
+
+        response = self.client.post('/admin/bar/product/', {
+            'action': 'export_jsonl', '_selected_action': list(Product.objects.values_list('pk', flat=True)),
+        })
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['name'], "Vodka")
+
+    def test_command(self):
+        out, err = StringIO(), StringIO()
+        call_command('export_catalog', 'cocktail', '--format', 'jsonl', stdout=out, stderr=err)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+        self.assertIn('5 рядків', err.getvalue())
+
+
+# ------------------ scalable admin tests ------------------
+
+import time
+from bar import admin as bar_admin
+
+
+class ScalableAdminTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        makeable.reset()
+        # bulk_create не шле сигналів — індексуємо, як generate_catalog
+        search.index_ingredients(Ingredient.objects.bulk_create(Ingredient(name=f"Інгредієнт {i:04d}") for i in range(300)))
+        self.lime = Ingredient.objects.create(name="Лайм")
+        self.cocktails = []
+        for i in range(30):
+            cocktail = Cocktail.objects.create(name=f"Mojito {i}", description="Ром і лайм", image='a.jpg')
+            CocktailIngredient.objects.create(cocktail=cocktail, ingredient=self.lime, quantity="1 шт")
+            self.cocktails.append(cocktail)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.user)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_change_form_does_not_render_all_ingredients(self):
+        cocktail = self.cocktails[0]
+        url = reverse('admin:bar_cocktail_change', args=[cocktail.pk])
+        self.client.get(url)  # прогрів кешів
+        queries_one, _ = self.count_queries(url)
+        for ingredient in Ingredient.objects.exclude(pk=self.lime.pk)[:10]:
+            CocktailIngredient.objects.create(cocktail=cocktail, ingredient=ingredient, quantity="1")
+        self.client.get(url)
+        queries_many, response = self.count_queries(url)
+        # Підписи вибраних інгредієнтів — з рядків inline (select_related), не запитом на рядок
+        self.assertEqual(queries_many, queries_one)
+        content = response.content.decode()
+        self.assertIn("Інгредієнт 0000", content)
+        self.assertNotIn("Інгредієнт 0299", content)
+        self.assertIn('admin-autocomplete', content)
+
+    def test_changelists_have_constant_query_count(self):
+        for url in ('/admin/bar/cocktail/', '/admin/bar/ingredient/', '/admin/bar/product/'):
+            self.client.get(url)
+            before, _ = self.count_queries(url)
+            self.assertLessEqual(before, 5, url)
+        queries, _ = self.count_queries('/admin/bar/cocktail/')
+        Cocktail.objects.create(name="Extra", description="d", image='a.jpg')
+        self.client.get('/admin/bar/cocktail/')
+        after, _ = self.count_queries('/admin/bar/cocktail/')
+        self.assertEqual(after, queries)
+
+    def test_unfiltered_count_is_cached_per_version(self):
+        self.client.get('/admin/bar/ingredient/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/bar/ingredient/')
+        self.assertEqual(response.context['cl'].result_count, 301)
+        self.assertFalse([query for query in queries.captured_queries if 'COUNT' in query['sql']])
+        Ingredient.objects.create(name="Новий")
+        _, response = self.count_queries('/admin/bar/ingredient/')
+        self.assertEqual(response.context['cl'].result_count, 302)
+
+    @override_settings(ADMIN_COUNT_CAP=5)
+    def test_filtered_count_is_capped(self):
+        _, response = self.count_queries('/admin/bar/ingredient/?q=інгредієнт')
+        self.assertEqual(response.context['cl'].result_count, 5)
+        _, response = self.count_queries('/admin/bar/ingredient/')
+        self.assertEqual(response.context['cl'].result_count, 301)
+
+    def test_cocktail_search_uses_full_text_index(self):
+        Cocktail.objects.create(name="Негроні", description="Джин", image='a.jpg')
+        _, response = self.count_queries('/admin/bar/cocktail/?q=негроні')
+        self.assertEqual([obj.name for obj in response.context['cl'].result_list], ["Негроні"])
+
+    def test_ingredient_search_uses_full_text_index(self):
+        _, response = self.count_queries('/admin/bar/ingredient/?q=laim')
+        self.assertEqual([obj.name for obj in response.context['cl'].result_list], ["Лайм"])
+        url = '/admin/autocomplete/?app_label=bar&model_name=cocktailingredient&field_name=ingredient&term=інгр'
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 20)
+        sql = ' '.join(query['sql'] for query in captured)
+        self.assertIn('bar_ingredient_fts', sql)
+        # Без списку всіх знайдених id у pk IN (...)
+        self.assertNotRegex(sql, r'IN \(\d+, \d+')
+
+    def test_ingredient_search_and_autocomplete_are_folded(self):
+        _, response = self.count_queries('/admin/bar/ingredient/?q=ЛАЙМ')
+        self.assertEqual([obj.name for obj in response.context['cl'].result_list], ["Лайм"])
+        url = '/admin/autocomplete/?app_label=bar&model_name=cocktailingredient&field_name=ingredient&term=лайм'
+        self.client.get(url)
+        queries, response = self.count_queries(url)
+        self.assertEqual([item['text'] for item in response.json()['results']], ["Лайм"])
+        self.assertLessEqual(queries, 5)
+
+    def test_changelist_response_time(self):
+        self.client.get('/admin/bar/cocktail/')
+        started = time.perf_counter()
+        self.client.get('/admin/bar/cocktail/')
+        # Щедра межа — ловить лише регресії на порядок (N+1, повний COUNT великих таблиць)
+        self.assertLess(time.perf_counter() - started, 2.0)
+
+    def test_widget_falls_back_to_empty_for_unknown_value(self):
+        widget = bar_admin.IngredientAutocompleteSelect(
+            CocktailIngredient._meta.get_field('ingredient'), site,
+        )
+        widget.choices = CocktailIngredient._meta.get_field('ingredient').formfield().choices
+        groups = widget.optgroups('ingredient', ['999999'])
+        self.assertEqual([option['value'] for option in groups[0][1]], [''])
+
+    def test_widget_fetches_only_selected_labels(self):
+        widget = bar_admin.IngredientAutocompleteSelect(
+            CocktailIngredient._meta.get_field('ingredient'), site,
+        )
+        widget.choices = CocktailIngredient._meta.get_field('ingredient').formfield().choices
+        makeable.reset()
+        with CaptureQueriesContext(connection) as queries:
+            groups = widget.optgroups('ingredient', [str(self.lime.pk)])
+        self.assertEqual([option['label'] for option in groups[0][1]], ['', "Лайм"])
+        self.assertEqual(len(queries), 1)
+        self.assertIn('IN', queries[0]['sql'])
+        self.assertIsNone(makeable._names)
+        widget.labels = {self.lime.pk: "Лайм"}
+        with CaptureQueriesContext(connection) as queries:
+            widget.optgroups('ingredient', [str(self.lime.pk)])
+        self.assertEqual(len(queries), 0)
+
+
+# ------------------ async views tests ------------------
+
+import asyncio
+from asgiref.sync import sync_to_async
+from django.core.management.base import CommandError
+from django.http import Http404, HttpResponse
+from django.test import AsyncRequestFactory
+from bar import async_views, loadtest
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True, PAGE_CACHE_TIMEOUT=0)
+class AsyncViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(30):
+            Product.objects.create(name=f"Горілка {i:02d}", category="horilka", abv=40, volume="0.5", image=get_image())
+        cls.cocktail = make_cocktail_with_ingredients("Мохіто", 3)
+        make_cocktail_with_ingredients("Негроні", 2)
+
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        # Курсори підписані з міткою часу: обидві версії мають рендеритись у ту саму секунду
+        clock = mock.patch('django.core.signing.time', mock.Mock(time=mock.Mock(return_value=1_700_000_000)))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    async def sync_content(self, view_class, path, **kwargs):
+        def get():
+            response = view_class.as_view()(RequestFactory().get(path), **kwargs)
+            response.render()
+            return response.content
+        return await sync_to_async(get)()
+
+    async def test_product_list_matches_sync_view(self):
+        for path in ('/products/', '/products/?sort=-abv&category=horilka'):
+            response = await async_views.product_list(AsyncRequestFactory().get(path))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, await self.sync_content(ProductListView, path))
+
+    async def test_cursor_pages_match_sync_view(self):
+        paginator = KeysetPaginator(Product.objects.all(), 'name', async_views.PAGE_SIZE)
+        cursor = (await sync_to_async(paginator.page)()).next_cursor
+        path = f'/products/?cursor={cursor}'
+        response = await async_views.product_list(AsyncRequestFactory().get(path))
+        self.assertContains(response, "Горілка 29")
+        self.assertNotContains(response, "Горілка 00")
+        self.assertEqual(response.content, await self.sync_content(ProductListView, path))
+
+    async def test_cocktail_pages_match_sync_views(self):
+        for path in ('/cocktails/', '/cocktails/?q=мохіто'):
+            response = await async_views.cocktail_list(AsyncRequestFactory().get(path))
+            self.assertEqual(response.content, await self.sync_content(CocktailListView, path))
+        path = f'/cocktails/{self.cocktail.pk}/'
+        response = await async_views.cocktail_detail(AsyncRequestFactory().get(path), pk=self.cocktail.pk)
+        self.assertContains(response, "Мохіто ingredient 2")
+        self.assertEqual(response.content, await self.sync_content(CocktailDetailView, path, pk=self.cocktail.pk))
+
+    async def test_missing_object_is_404(self):
+        with self.assertRaises(Http404):
+            await async_views.product_detail(AsyncRequestFactory().get('/products/999999/'), pk=999999)
+
+    @override_settings(PAGE_CACHE_TIMEOUT=600)
+    async def test_page_cache_and_conditional_get(self):
+        path = f'/cocktails/{self.cocktail.pk}/'
+        first = await async_views.cocktail_detail(AsyncRequestFactory().get(path), pk=self.cocktail.pk)
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        second = await async_views.cocktail_detail(AsyncRequestFactory().get(path), pk=self.cocktail.pk)
+        self.assertEqual(second['X-Page-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        request = AsyncRequestFactory().get(path, headers={'if-none-match': first['ETag']})
+        response = await async_views.cocktail_detail(request, pk=self.cocktail.pk)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_budget_is_enforced_for_coroutines(self):
+        @query_budget(1)
+        async def greedy(request):
+            await Product.objects.acount()
+            await Cocktail.objects.acount()
+            return HttpResponse()
+
+        self.assertEqual(async_views.product_list.query_budget, 3)
+        with self.assertRaises(QueryBudgetExceeded):
+            await greedy(AsyncRequestFactory().get('/greedy/'))
+
+
+class LoadTestTests(TestCase):
+    def test_percentiles(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(loadtest.percentile(values, 50), 0.05)
+        self.assertEqual(loadtest.percentile(values, 99), 0.099)
+        self.assertIsNone(loadtest.percentile([], 50))
+        summary = loadtest.summarize(values, 2, 2.0)
+        self.assertEqual((summary['requests'], summary['errors'], summary['rps'], summary['p95']), (102, 2, 50.0, 95.0))
+
+    def test_drive_counts_requests_and_errors(self):
+        async def scenario():
+            async def handle(reader, writer):
+                line = await reader.readline()
+                while (await reader.readline()).strip():
+                    pass
+                status = b'404 Not Found' if b'/missing' in line else b'200 OK'
+                writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok')
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(handle, loadtest.HOST, 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await loadtest.drive(port, ['/a/', '/b/', '/missing/'], concurrency=4, requests=30)
+
+        summary = asyncio.run(scenario())
+        self.assertEqual((summary['requests'], summary['errors']), (30, 10))
+        self.assertGreater(summary['rps'], 0)
+
+    def test_bench_command_validates_arguments(self):
+        with self.assertRaisesMessage(CommandError, 'Невідомі профілі'):
+            call_command('bench_asgi', '--profiles', 'fcgi', stdout=StringIO(), stderr=StringIO())
+
+
+# ------------------ database routing tests ------------------
+
+import shutil
+import tempfile
+from django.contrib.sessions.models import Session
+from django.test import SimpleTestCase
+from bar import loadtest, routers
+from bar.cache import LAST_WRITE_KEY
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'], REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def read_alias_in_view(self, request):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+        response = routers.ReplicaRoutingMiddleware(view)(request)
+        return seen[0], response
+
+    def test_catalog_reads_go_to_replicas(self):
+        self.assertIn(self.router.db_for_read(Product), ('replica1', 'replica2'))
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_write(Product), 'default')
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_recent_write_keeps_reads_on_primary(self):
+        bump_version(Product)
+        self.assertEqual(self.router.db_for_read(Product), 'default')
+        cache.set(LAST_WRITE_KEY, time.time() - 10)
+        self.assertNotEqual(self.router.db_for_read(Product), 'default')
+
+    def test_one_replica_per_request(self):
+        factory = RequestFactory()
+        for _ in range(5):
+            seen = set()
+
+            def view(request):
+                seen.update(self.router.db_for_read(model) for model in (Product, Cocktail, Ingredient) * 3)
+                return HttpResponse()
+            routers.ReplicaRoutingMiddleware(view)(factory.get('/products/'))
+            self.assertEqual(len(seen), 1)
+
+    def test_read_your_writes_cookie(self):
+        factory = RequestFactory()
+        alias, response = self.read_alias_in_view(factory.post('/admin/bar/product/1/change/'))
+        self.assertEqual(alias, 'default')
+        cookie = response.cookies[routers.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        request = factory.get('/products/')
+        request.COOKIES[routers.PIN_COOKIE] = cookie.value
+        self.assertEqual(self.read_alias_in_view(request)[0], 'default')
+        # Підроблена cookie не закріплює читання за primary
+        request = factory.get('/products/')
+        request.COOKIES[routers.PIN_COOKIE] = '1'
+        alias, response = self.read_alias_in_view(request)
+        self.assertNotEqual(alias, 'default')
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_async_middleware(self):
+        seen = []
+
+        async def view(request):
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+        middleware = routers.ReplicaRoutingMiddleware(view)
+        response = asyncio.run(middleware(RequestFactory().post('/admin/')))
+        self.assertEqual(seen, ['default'])
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_admin_reads_from_primary(self):
+        cache.set(LAST_WRITE_KEY, time.time() - 10)
+        factory = RequestFactory()
+        for path in ('/admin/bar/product/', '/admin/bar/product/1/change/', '/admin/'):
+            self.assertEqual(self.read_alias_in_view(factory.get(path))[0], 'default')
+        self.assertNotEqual(self.read_alias_in_view(factory.get('/products/'))[0], 'default')
+
+    def test_async_admin_reads_from_primary(self):
+        cache.set(LAST_WRITE_KEY, time.time() - 10)
+        seen = []
+
+        async def view(request):
+            seen.append(self.router.db_for_read(Product))
+            return HttpResponse()
+        response = asyncio.run(routers.ReplicaRoutingMiddleware(view)(RequestFactory().get('/admin/bar/product/')))
+        self.assertEqual(seen, ['default'])
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_write_in_other_worker_pins_reads(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        caches_setting = {'default': {**settings.CACHES['default'], 'LOCATION': directory}}
+        with override_settings(CACHES=caches_setting):
+            self.assertIsNone(cache.get(LAST_WRITE_KEY))
+            self.assertNotEqual(self.router.db_for_read(Product), 'default')
+            loadtest.call_in_process(
+                {'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE'], 'CACHE_LOCATION': directory},
+                bump_version, Product,
+            )
+            self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_process_local_cache_is_rejected(self):
+        self.assertEqual(routers.check_shared_cache(), [])
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=locmem):
+            self.assertEqual([error.id for error in routers.check_shared_cache()], ['bar.E001'])
+            with override_settings(DATABASE_REPLICAS=[]):
+                self.assertEqual(routers.check_shared_cache(), [])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'bar'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'bar'))
+
+    def test_sync_replicas_requires_replicas(self):
+        with override_settings(DATABASE_REPLICAS=[]):
+            with self.assertRaisesMessage(CommandError, 'DATABASE_REPLICAS'):
+                call_command('sync_replicas', stdout=StringIO())
+
+
+# ------------------ SQLite concurrency tests ------------------
+from django.db import connection
+
+
+class SqliteConcurrencyTests(TestCase):
+    def test_pragmas_applied_to_connection(self):
+        if not (settings.DATABASE_SQLITE and settings.SQLITE_CONCURRENCY):
+            self.skipTest('SQLITE_CONCURRENCY вимкнено')
+        options = settings.DATABASES['default']['OPTIONS']
+        self.assertEqual(options['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(options['timeout'], settings.SQLITE_BUSY_TIMEOUT)
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['cache_size'])
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], int(settings.SQLITE_BUSY_TIMEOUT * 1000))
+
+    def test_bench_sqlite_rejects_unknown_profile(self):
+        with self.assertRaisesMessage(CommandError, 'Невідомі профілі: wal2'):
+            call_command('bench_sqlite', profiles='tuned,wal2', stdout=StringIO())
+
+    def test_bench_sqlite_requires_reader(self):
+        with self.assertRaisesMessage(CommandError, 'читач'):
+            call_command('bench_sqlite', readers=0, stdout=StringIO())
+
+
+# ------------------ benchmark tests ------------------
+from collections import Counter
+from bar import benchmark
+from bar.generator import CatalogGenerator
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        CatalogGenerator(seed=3, batch_size=10).generate(products=30, cocktails=8, ingredients=12)
+        ContactInfo.objects.create(address='вул. Хрещатик, 1', phone='+380000000000', email='bar@example.com')
+        AboutPage.objects.create(title='Про нас', content='Текст')
+
+    def test_bench_covers_every_route(self):
+        routes = {scenario['route'] for scenario in benchmark.scenarios()}
+        expected = {f'bar:{pattern.name}' for pattern in bar_urls.urlpatterns} | {'index'}
+        self.assertEqual(routes, expected)
+        self.assertEqual(benchmark.scenarios(seed=1), benchmark.scenarios(seed=1))
+
+    def test_mix_keeps_weights(self):
+        scenario_list = [
+            {'name': 'list', 'route': 'bar:product_list', 'paths': ['/products/'], 'weight': 3},
+            {'name': 'detail', 'route': 'bar:product_detail', 'paths': ['/products/1/', '/products/2/'], 'weight': 1},
+        ]
+        counts = Counter(benchmark.mix(scenario_list))
+        self.assertEqual(counts, {'/products/': 6, '/products/1/': 1, '/products/2/': 1})
+
+    def test_measure_counts_queries_for_every_scenario(self):
+        with override_settings(PAGE_CACHE_TIMEOUT=0):
+            results = benchmark.measure(benchmark.scenarios(), repeat=2)
+        self.assertEqual([row['errors'] for row in results], [0] * len(results))
+        by_name = {row['name']: row for row in results}
+        # Потокові відповіді API дочитуються, тож їхні запити теж пораховано
+        self.assertGreater(by_name['api_product_list']['queries'], 0)
+        self.assertGreater(by_name['product_detail']['queries'], 0)
+
+    def test_compare_reports_regressions(self):
+        baseline = {
+            'levels': [{'concurrency': 10, 'rps': 100.0, 'p95': 50.0, 'errors': 0}],
+            'scenarios': [{'name': 'product_list', 'queries': 2}, {'name': 'about', 'queries': 0}],
+        }
+        same = {
+            'levels': [{'concurrency': 10, 'rps': 95.0, 'p95': 54.0, 'errors': 0}],
+            'scenarios': [{'name': 'product_list', 'queries': 2}, {'name': 'about', 'queries': 0}],
+        }
+        self.assertEqual(benchmark.compare(baseline, same, threshold=0.1), [])
+        worse = {
+            'levels': [{'concurrency': 10, 'rps': 80.0, 'p95': 70.0, 'errors': 3}],
+            'scenarios': [{'name': 'product_list', 'queries': 3}, {'name': 'about', 'queries': 0}],
+        }
+        regressions = benchmark.compare(baseline, worse, threshold=0.1)
+        self.assertEqual(len(regressions), 4)
+        self.assertIn('product_list: SQL-запитів 2 → 3', regressions)
+
+    def test_bench_rejects_missing_baseline(self):
+        with self.assertRaisesMessage(CommandError, 'базову лінію'):
+            call_command('bench', compare='/nonexistent/baseline.json', stdout=StringIO(), stderr=StringIO())
+
+
+# ------------------ catalog generator tests ------------------
+from django.db.models import Count
+from bar import generator
+
+
+class CatalogGeneratorTests(TestCase):
+    def generate(self, seed=0, **sizes):
+        sizes = {'products': 200, 'cocktails': 40, 'ingredients': 60, **sizes}
+        return generator.CatalogGenerator(seed=seed, batch_size=50).generate(**sizes)
+
+    def snapshot(self):
+        return (
+            list(Product.objects.order_by('pk').values_list('name', 'category', 'abv', 'volume', 'image')),
+            list(CocktailIngredient.objects.order_by('pk').values_list('cocktail__name', 'ingredient__name', 'quantity')),
+        )
+
+    def clear(self):
+        for model in (CocktailIngredient, Cocktail, Product, Ingredient):
+            model.objects.all().delete()
+
+    def test_same_seed_same_catalog(self):
+        self.generate(seed=5)
+        first = self.snapshot()
+        self.clear()
+        self.generate(seed=5)
+        self.assertEqual(self.snapshot(), first)
+        self.clear()
+        self.generate(seed=6)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_counts_and_distributions(self):
+        created = self.generate()
+        self.assertEqual(
+            (created['product'], created['cocktail'], created['ingredient']), (200, 40, 60),
+        )
+        self.assertEqual(created['cocktailingredient'], CocktailIngredient.objects.count())
+        categories = Counter(Product.objects.values_list('category', flat=True))
+        self.assertGreater(categories['horilka'], categories['infusion'] * 2)
+        sizes = Cocktail.objects.annotate(n=Count('cocktailingredient')).values_list('n', flat=True)
+        self.assertTrue(all(2 <= size <= 9 for size in sizes))
+        self.assertEqual(Ingredient.objects.values('name').distinct().count(), 60)
+        media = set(generator.media_images())
+        self.assertTrue(set(Product.objects.values_list('image', flat=True)) <= media)
+        for name in Product.objects.values_list('name', flat=True)[:20]:
+            self.assertRegex(name, '[А-ЯІЇЄҐа-яіїєґ]')
+
+    def test_appends_with_search_index_and_versions(self):
+        self.generate(products=10, cocktails=0, ingredients=0)
+        version = model_version(Product)
+        self.generate(seed=1, products=10, cocktails=5, ingredients=10)
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertNotEqual(model_version(Product), version)
+        name = Product.objects.order_by('-pk').first().name
+        self.assertTrue(Product.objects.filter(name__endswith='№20').exists())
+        found = search.filter_queryset(Product.objects.all(), 'product', name.split()[0])
+        self.assertIn(name, found.values_list('name', flat=True))
+
+    def test_cocktails_require_ingredients(self):
+        with self.assertRaises(ValueError):
+            self.generate(products=0, cocktails=1, ingredients=0)
+
+    def test_media_images_skip_generated_files(self):
+        for name in generator.media_images():
+            self.assertFalse(name.startswith((images.DERIVATIVES_DIR + '/', thumbnails.THUMBNAILS_DIR + '/')))
+
+
+# ------------------ instrumentation tests ------------------
+from bar import instrumentation
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Product.objects.create(name=f"Горілка {i}", category="horilka", abv=40, volume="0.5", image=get_image())
+        ContactInfo.objects.create(address='вул. Хрещатик, 1', phone='+380000000000', email='bar@example.com')
+        cls.staff = User.objects.create_user('timing', 'timing@example.com', 'pass', is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        instrumentation.registry.reset()
+
+    def get_metrics(self):
+        return self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+
+    def server_timing(self, response):
+        return dict(
+            (part.split(';')[0].strip(), part) for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing_counts_sql_and_templates(self):
+        self.client.force_login(self.staff)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('bar:product_list'))
+        timing = self.server_timing(response)
+        self.assertIn(f'desc="{len(captured)} queries"', timing['sql'])
+        template_ms = float(timing['tpl'].split('dur=')[1])
+        total_ms = float(timing['app'].split('dur=')[1])
+        self.assertGreater(template_ms, 0)
+        self.assertGreaterEqual(total_ms, template_ms)
+
+    def test_metrics_per_route(self):
+        self.client.get(reverse('bar:product_list'))
+        self.client.get(reverse('bar:product_list'))
+        self.client.get('/no-such-page/')
+        body = self.get_metrics().content.decode()
+        self.assertIn('bar_request_duration_seconds_count{route="bar:product_list"} 2', body)
+        self.assertIn('bar_request_duration_seconds_bucket{route="bar:product_list",le="+Inf"} 2', body)
+        self.assertIn('bar_responses_total{route="bar:product_list",status="200"} 2', body)
+        self.assertIn(f'bar_responses_total{{route="{instrumentation.UNMATCHED}",status="404"}} 1', body)
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in body.splitlines()
+            if line.startswith('bar_request_duration_seconds_bucket{route="bar:product_list"')
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_streaming_response_sql_is_recorded(self):
+        response = self.client.get(reverse('bar:api_product_list'))
+        self.assertNotIn('bar:api_product_list', instrumentation.registry.snapshot()['routes'])
+        b''.join(response.streaming_content)
+        row = instrumentation.registry.snapshot()['routes']['bar:api_product_list']
+        self.assertEqual(row['count'], 1)
+        self.assertGreater(row['sql_queries'], 0)
+
+    async def test_async_view_sql_is_counted(self):
+        async def view(request):
+            await Product.objects.acount()
+            return HttpResponse()
+        middleware = instrumentation.InstrumentationMiddleware(view)
+        request = RequestFactory().get('/products/')
+
+        async def auser():
+            return self.staff
+        request.auser = auser
+        response = await middleware(request)
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_metrics_are_merged_across_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with override_settings(METRICS_DIR=directory):
+            self.client.get(reverse('bar:product_list'))
+            other = instrumentation.registry.snapshot()
+            other['routes']['bar:product_list']['count'] = 5
+            with open(os.path.join(directory, '999999-other.json'), 'w', encoding='utf-8') as f:
+                json.dump(other, f)
+            merged = instrumentation.collect()
+            self.assertEqual(merged['routes']['bar:product_list']['count'], 6)
+            self.assertEqual(len([name for name in os.listdir(directory) if name.endswith('.json')]), 2)
+
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        response = self.get_metrics()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_metrics_are_private_by_default(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.get_metrics().status_code, 404)
+        # Без токена — лише в DEBUG
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_server_timing_only_for_staff_or_debug(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('bar:product_list')))
+        with override_settings(DEBUG=True):
+            self.assertIn('Server-Timing', self.client.get(reverse('bar:product_list')))
+        self.client.force_login(self.staff)
+        self.assertIn('Server-Timing', self.client.get(reverse('bar:product_list')))
+
+    def test_server_timing_can_be_disabled(self):
+        self.client.force_login(self.staff)
+        with override_settings(SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('bar:product_list')))
+
+
+# ------------------ request profiling tests ------------------
+import threading
+from datetime import timedelta
+
+from bar import profiling
+from bar.models import RequestProfile
+
+
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            Product.objects.create(name=f"Горілка {i}", category="horilka", abv=40, volume="0.5", image=get_image())
+        ContactInfo.objects.create(address='вул. Хрещатик, 1', phone='+380000000000', email='bar@example.com')
+        cls.staff = User.objects.create_superuser('profiler', 'profiler@example.com', 'pass')
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pass')
+
+    def setUp(self):
+        cache.clear()
+        singletons.reset()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        override = override_settings(PROFILE_DIR=directory, PROFILE_INTERVAL=0.001, PROFILE_SAMPLE_RATE=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.directory = directory
+
+    def test_sampler_records_stacks(self):
+        def busy_loop():
+            while not done.is_set():
+                sum(range(100))
+        done = threading.Event()
+        worker = threading.Thread(target=busy_loop)
+        worker.start()
+        sampler = profiling.Sampler([worker.ident], 0.001).start()
+        for _ in range(5):
+            sampler.sample()
+        sampler.stop()
+        done.set()
+        worker.join()
+        self.assertGreaterEqual(sampler.samples, 5)
+        self.assertTrue(any('busy_loop' in stack[-1] for stack in sampler.stacks))
+
+        lines = profiling.collapsed(sampler.stacks).splitlines()
+        stack, count = lines[0].rsplit(' ', 1)
+        self.assertIn(';', stack)
+        self.assertGreater(int(count), 0)
+        data = profiling.speedscope(sampler.stacks, sampler.interval, 'test', sampler.duration)
+        profile = data['profiles'][0]
+        self.assertEqual(profile['type'], 'sampled')
+        self.assertEqual(len(profile['samples']), len(profile['weights']))
+        self.assertTrue(all(0 <= i < len(data['shared']['frames']) for ids in profile['samples'] for i in ids))
+
+    def test_staff_header_profiles_request(self):
+        self.client.force_login(self.staff)
+        url = reverse('bar:product_list')
+        self.client.get(url)  # у кеші сторінок
+        response = self.client.get(url, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.get('X-Page-Cache'), 'HIT')
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.route, 'bar:product_list')
+        self.assertEqual(profile.trigger, 'header')
+        self.assertEqual(profile.user, self.staff)
+        self.assertGreater(profile.sql_queries, 0)
+        with open(os.path.join(self.directory, profile.file), encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['profiles'][0]['type'], 'sampled')
+
+    def test_staff_query_flag_and_collapsed_format(self):
+        self.client.force_login(self.staff)
+        with override_settings(PROFILE_FORMAT='collapsed'):
+            response = self.client.get(reverse('bar:product_list'), {'_profile': '1', 'category': 'horilka'})
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, 'query')
+        self.assertEqual(profile.format, 'collapsed')
+        self.assertTrue(profile.file.endswith('.collapsed.txt'))
+        self.assertIn('category=horilka', profile.path)
+        self.assertEqual(response['X-Profile-Id'], str(profile.pk))
+
+    def test_non_staff_cannot_profile(self):
+        self.client.get(reverse('bar:product_list'), HTTP_X_PROFILE='1')
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse('bar:product_list'), {'_profile': '1'})
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_random_sampling(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            response = self.client.get(reverse('bar:product_list'))
+        self.assertNotIn('X-Profile-Id', response)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, 'sample')
+        self.assertIsNone(profile.user)
+        with override_settings(PROFILE_SAMPLE_RATE=1000000):
+            with mock.patch('bar.profiling.random.randrange', return_value=1):
+                self.client.get(reverse('bar:product_list'))
+        self.assertEqual(RequestProfile.objects.count(), 1)
+
+    def test_streaming_response_is_profiled_to_the_end(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('bar:api_product_list'), HTTP_X_PROFILE='1')
+        self.assertFalse(RequestProfile.objects.exists())
+        b''.join(response.streaming_content)
+        self.assertEqual(RequestProfile.objects.get().route, 'bar:api_product_list')
+
+    async def test_async_middleware(self):
+        async def view(request):
+            await Product.objects.acount()
+            return HttpResponse()
+        request = RequestFactory().get('/products/', HTTP_X_PROFILE='1')
+
+        async def auser():
+            return self.staff
+        request.auser = auser
+        response = await profiling.ProfilingMiddleware(view)(request)
+        profile = await RequestProfile.objects.aget(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.trigger, 'header')
+
+    def test_sampled_profiles_are_capped(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1, PROFILE_MAX_COUNT=2):
+            for _ in range(4):
+                self.client.get(reverse('bar:product_list'))
+        kept = list(RequestProfile.objects.order_by('pk'))
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted(profile.file for profile in kept))
+        self.assertEqual(kept[-1].pk, RequestProfile.objects.latest('created_at').pk)
+
+    def test_prune_command_removes_old_profiles(self):
+        with override_settings(PROFILE_SAMPLE_RATE=1):
+            for _ in range(2):
+                self.client.get(reverse('bar:product_list'))
+        old, new = RequestProfile.objects.order_by('pk')
+        RequestProfile.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=8))
+        out = StringIO()
+        with override_settings(PROFILE_MAX_AGE_DAYS=7):
+            call_command('prune_profiles', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(list(RequestProfile.objects.all()), [new])
+        self.assertEqual(os.listdir(self.directory), [new.file])
+        with override_settings(PROFILE_MAX_AGE_DAYS=0, PROFILE_MAX_COUNT=0):
+            self.assertEqual(profiling.prune(), 0)
+
+    def test_admin_lists_downloads_and_deletes(self):
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(reverse('bar:product_list'), HTTP_X_PROFILE='1')['X-Profile-Id']
+        profile = RequestProfile.objects.get(pk=profile_id)
+        changelist = self.client.get(reverse('admin:bar_requestprofile_changelist'))
+        self.assertContains(changelist, profile.file)
+
+        download = self.client.get(reverse('admin:bar_requestprofile_download', args=[profile.pk]))
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+        self.assertEqual(json.loads(b''.join(download.streaming_content))['name'], f'GET {profile.path}')
+
+        self.client.post(reverse('admin:bar_requestprofile_delete', args=[profile.pk]), {'post': 'yes'})
+        self.assertFalse(RequestProfile.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.directory, profile.file)))
+        self.assertEqual(self.client.get(reverse('admin:bar_requestprofile_download', args=[profile.pk])).status_code, 404)
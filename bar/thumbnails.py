@@ -0,0 +1,77 @@
+"""
+Мініатюри для колонок image_tag в адмінці.
+
+Мініатюра лежить поруч з медіа: media/thumbnails/<шлях оригіналу>-<ширина>.webp.
+Вона вважається актуальною, якщо існує і не старша за оригінал, тож заміна
+файлу (нове ім'я або перезапис на місці) її інвалідує. Changelist лише
+перевіряє це двома stat-викликами на рядок: актуальна мініатюра віддається
+напряму з /media/, а для решти <img> вказує на view адмінки, яка генерує
+мініатюру при першому зверненні (браузер робить це ліниво, loading="lazy").
+"""
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+THUMBNAILS_DIR = 'thumbnails'
+
+
+def get_scale():
+    """У скільки разів мініатюра більша за ширину показу (для HiDPI-екранів)."""
+    return getattr(settings, 'THUMBNAIL_SCALE', 2)
+
+
+def thumbnail_name(name, width):
+    # Розширення оригіналу лишається в імені: a.png і a.jpg мають різні мініатюри
+    return f'{THUMBNAILS_DIR}/{name}-{width}.webp'
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def is_fresh(name, width):
+    source = _mtime(default_storage.path(name))
+    thumbnail = _mtime(default_storage.path(thumbnail_name(name, width)))
+    return source is not None and thumbnail is not None and thumbnail >= source
+
+
+def source_version(name):
+    """Змінюється разом з файлом оригіналу — для ?v= в URL, щоб браузер не тримав стару мініатюру."""
+    return int(_mtime(default_storage.path(name)) or 0)
+
+
+def url(name, width):
+    """URL актуальної мініатюри або None, якщо її треба (пере)генерувати."""
+    if not is_fresh(name, width):
+        return None
+    # URL сховища вже містить хеш вмісту (bar/mediafiles.py)
+    return default_storage.url(thumbnail_name(name, width))
+
+
+def generate(name, width):
+    """Створює мініатюру, якщо вона неактуальна; повертає шлях до файлу."""
+    from PIL import Image, ImageOps
+
+    target = default_storage.path(thumbnail_name(name, width))
+    if is_fresh(name, width):
+        return target
+    with Image.open(default_storage.path(name)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail((width, width * 4))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or image.mode == 'LA' else 'RGB')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Пишемо у тимчасовий файл і атомарно підміняємо: паралельний запит не побачить половину файлу
+        temporary = f'{target}.{uuid.uuid4().hex}.tmp'
+        try:
+            image.save(temporary, 'WEBP', quality=75, method=4)
+            os.replace(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+    return target
@@ -1,26 +1,50 @@
+from django.conf import settings
 from django.urls import path
+from . import api
 from .views import (
     AboutPageView,
     ProductListView, ProductDetailView,
     CocktailListView, CocktailDetailView,
-    ContactPageView
+    ContactPageView, makeable_cocktails
 )
 
 app_name = 'bar'
 
+if settings.ASYNC_VIEWS:
+    # Під ASGI (djangoProject2/asgi.py) списки й деталі — async-версії, див. bar/async_views.py
+    from . import async_views
+    product_list = async_views.product_list
+    product_detail = async_views.product_detail
+    cocktail_list = async_views.cocktail_list
+    cocktail_detail = async_views.cocktail_detail
+else:
+    product_list = ProductListView.as_view()
+    product_detail = ProductDetailView.as_view()
+    cocktail_list = CocktailListView.as_view()
+    cocktail_detail = CocktailDetailView.as_view()
+
 urlpatterns = [
 
     # Головна сторінка "Про нас"
     path('about/', AboutPageView.as_view(), name='about'),
 
     # Продукти
-    path('products/', ProductListView.as_view(), name='product_list'),
-    path('products/<int:pk>/', ProductDetailView.as_view(), name='product_detail'),
+    path('products/', product_list, name='product_list'),
+    path('products/<int:pk>/', product_detail, name='product_detail'),
 
     # Коктейлі
-    path('cocktails/', CocktailListView.as_view(), name='cocktail_list'),
-    path('cocktails/<int:pk>/', CocktailDetailView.as_view(), name='cocktail_detail'),
+    path('cocktails/', cocktail_list, name='cocktail_list'),
+    path('cocktails/<int:pk>/', cocktail_detail, name='cocktail_detail'),
+    path('cocktails/makeable/', makeable_cocktails, name='cocktail_makeable'),
 
     # Контакти
     path('contacts/', ContactPageView.as_view(), name='contacts'),
+
+    # JSON API лише для читання (bar/api.py)
+    path('api/products/', api.product_list, name='api_product_list'),
+    path('api/products/<int:pk>/', api.product_detail, name='api_product_detail'),
+    path('api/cocktails/', api.cocktail_list, name='api_cocktail_list'),
+    path('api/cocktails/<int:pk>/', api.cocktail_detail, name='api_cocktail_detail'),
+    path('api/ingredients/', api.ingredient_list, name='api_ingredient_list'),
+    path('api/ingredients/<int:pk>/', api.ingredient_detail, name='api_ingredient_detail'),
 ]
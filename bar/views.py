@@ -1,59 +1,78 @@
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views.generic import ListView, DetailView
 
 from .models import (
     AboutPage, Product, Cocktail,
     Ingredient, CocktailIngredient, ContactInfo
 )
-
+from . import facets, makeable, search, singletons
+from .conditional import conditional_page, object_validators, singleton_validators, table_validators
+from .filters import ProductFilter
+from .pagecache import cache_page_versioned
+from .pagination import KeysetPaginationMixin
+from .querybudget import query_budget
+
+@query_budget(1)  # ContactInfo у футері, лише поки кеш процесу холодний
+@cache_page_versioned(name='index')
 def index(request):
     return render(request, 'іndex.html')
 
 
 # --- AboutPage ---
+@query_budget(2)  # AboutPage + ContactInfo у футері; з теплим кешем процесу — 0
+@method_decorator(conditional_page(singleton_validators(AboutPage, ContactInfo)), name='dispatch')
+@method_decorator(cache_page_versioned(AboutPage, name='about', query_params=()), name='dispatch')
 class AboutPageView(DetailView):
     model = AboutPage
     template_name = 'bar/about.html'
     context_object_name = 'about'
 
     def get_object(self):
-        # Завжди віддаємо AboutPage з pk=1
-        return AboutPage.objects.first()
+        # Єдиний рядок AboutPage — з кешу процесу, див. bar/singletons.py
+        return singletons.about_page()
 
 
 # --- Product ---
-class ProductListView(ListView):
+SORT_OPTIONS = [
+    ('name', 'Назва (А-Я)'), ('-name', 'Назва (Я-А)'),
+    ('abv', 'Міцність ↑'), ('-abv', 'Міцність ↓'),
+    ('volume', "Об'єм ↑"), ('-volume', "Об'єм ↓"),
+]
+
+
+@query_budget(3)  # +1 — агрегат для ETag, кешується до зміни даних
+@method_decorator(conditional_page(table_validators(Product)), name='dispatch')
+@method_decorator(cache_page_versioned(Product, name='product_list', query_params=ProductFilter.PARAMS + ('cursor',)), name='dispatch')
+class ProductListView(KeysetPaginationMixin, ListView):
     model = Product
     template_name = 'bar/products.html'
     context_object_name = 'products'
 
+    def get_filter(self):
+        if not hasattr(self, '_filter'):
+            self._filter = ProductFilter(self.request.GET)
+        return self._filter
+
+    def get_keyset_ordering(self):
+        return self.get_filter().ordering
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        name = self.request.GET.get('name', '')
-        category = self.request.GET.get('category', '')
-        volume = self.request.GET.get('volume', '')
-        is_kosher = self.request.GET.get('is_kosher', '')
-        is_limited = self.request.GET.get('is_limited', '')
-
-        # Фільтрація за кожним полем
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        if category:
-            queryset = queryset.filter(category__icontains=category)
-        if volume:
-            try:
-                volume_value = float(volume)
-                queryset = queryset.filter(volume=volume_value)
-            except ValueError:
-                pass  # Якщо введено некоректне значення, просто ігноруємо
-        if is_kosher:
-            queryset = queryset.filter(is_kosher=is_kosher.lower() == 'true')
-        if is_limited:
-            queryset = queryset.filter(is_limited=is_limited.lower() == 'true')
+        # Фільтрація за кожним полем — див. bar/filters.py
+        return self.get_filter().apply(super().get_queryset())
 
-        return queryset
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['facets'] = facets.build(self.get_filter(), self.request.GET)
+        context['sort_options'] = SORT_OPTIONS
+        return context
 
 
+@query_budget(2)
+@method_decorator(conditional_page(object_validators(Product)), name='dispatch')
+@method_decorator(cache_page_versioned(Product, name='product_detail', query_params=()), name='dispatch')
 class ProductDetailView(DetailView):
     model = Product
     template_name = 'bar/product_detail.html'
@@ -61,35 +80,86 @@ class ProductDetailView(DetailView):
 
 
 # --- Cocktail ---
-from django.views.generic import ListView
-from .models import Cocktail
-from django.db.models import Q
-
-class CocktailListView(ListView):
+@query_budget(3)
+@method_decorator(conditional_page(table_validators(Cocktail, CocktailIngredient, Ingredient)), name='dispatch')
+@method_decorator(cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='cocktail_list', query_params=('q', 'cursor')), name='dispatch')
+class CocktailListView(KeysetPaginationMixin, ListView):
     model = Cocktail
+    keyset_ordering = 'name'
     template_name = 'bar/cocktails.html'
     context_object_name = 'cocktails'
 
+    def get_keyset_ordering(self):
+        if self.request.GET.get('q'):
+            return 'search_rank'
+        return self.keyset_ordering
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().with_ingredients()
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(name__icontains=query)
+            queryset = search.filter_queryset(queryset, 'cocktail', query)
         return queryset
 
 
-
+@query_budget(3)
+@method_decorator(conditional_page(object_validators(Cocktail, 'cocktailingredient', 'cocktailingredient__ingredient')), name='dispatch')
+@method_decorator(cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='cocktail_detail', query_params=()), name='dispatch')
 class CocktailDetailView(DetailView):
     model = Cocktail
     template_name = 'bar/cocktail_detail.html'
     context_object_name = 'cocktail'
 
+    def get_queryset(self):
+        return super().get_queryset().with_ingredients()
+
+@query_budget(3)
+@cache_page_versioned(Cocktail, Ingredient, CocktailIngredient, name='cocktail_makeable', query_params=('ingredients', 'missing', 'limit'), multi_params=('ingredients',))
+def makeable_cocktails(request):
+    """
+    Коктейлі, які можна приготувати з наявних інгредієнтів.
+    ?ingredients=1,2,Лайм&missing=1 — id або назви; missing — скільки інгредієнтів може бракувати.
+    """
+    tokens = [token for value in request.GET.getlist('ingredients') for token in value.split(',') if token.strip()]
+    try:
+        max_missing = max(0, int(request.GET.get('missing', 0)))
+        limit = min(max(1, int(request.GET.get('limit', 50))), 500)
+    except ValueError:
+        return JsonResponse({'error': 'missing і limit мають бути цілими числами'}, status=400)
+
+    ingredient_ids = makeable.resolve_ingredients(tokens)
+    index = makeable.get_index()
+    matches = index.query(ingredient_ids, max_missing=max_missing, limit=limit)
+    names, _ = makeable.ingredient_names()
+    cocktail_names = dict(Cocktail.objects.filter(pk__in=[row[0] for row in matches]).values_list('pk', 'name'))
+    results = [
+        {
+            'id': cocktail_id,
+            'name': cocktail_names.get(cocktail_id, ''),
+            'matched': matched,
+            'total': total,
+            'coverage': round(matched / total, 3),
+            'missing': sorted(names.get(pk, '') for pk in index.ingredients_of[cocktail_id] - ingredient_ids),
+            'url': reverse('bar:cocktail_detail', args=[cocktail_id]),
+        }
+        for cocktail_id, matched, total in matches
+    ]
+    return JsonResponse({
+        'ingredients': sorted(ingredient_ids),
+        'missing': max_missing,
+        'results': results,
+    }, json_dumps_params={'ensure_ascii': False})
+
+
 # --- ContactInfo ---
+@query_budget(1)
+@method_decorator(conditional_page(singleton_validators(ContactInfo)), name='dispatch')
+@method_decorator(cache_page_versioned(ContactInfo, name='contacts', query_params=()), name='dispatch')
 class ContactPageView(DetailView):
     model = ContactInfo
     template_name = 'bar/contacts.html'
     context_object_name = 'contact'
 
     def get_object(self):
-        return ContactInfo.objects.first()
+        return singletons.contact_info()
 
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangoProject2.settings')
+# Під ASGI каталог обслуговують async-view (bar/async_views.py)
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
@@ -0,0 +1,44 @@
+"""
+Налаштування gunicorn для Procfile і Dockerfile:
+
+    gunicorn -c djangoProject2/gunicorn.conf.py
+
+SERVER=wsgi (за замовчуванням) — синхронні воркери й djangoProject2.wsgi.
+SERVER=asgi — uvicorn-воркери (пакет uvicorn-worker) і djangoProject2.asgi з
+async-версіями списків і деталей каталогу (bar/async_views.py).
+Кількість воркерів — WEB_CONCURRENCY (gunicorn читає її сам), порт — PORT.
+Порівняти профілі на своєму залізі: python manage.py bench_asgi.
+
+Метрики /metrics/ (bar/instrumentation.py) збираються з файлів воркерів у
+METRICS_DIR; якщо її не задано, майстер створює тимчасову теку на час роботи.
+"""
+import os
+import shutil
+import tempfile
+
+PROFILES = {
+    'wsgi': ('djangoProject2.wsgi:application', 'sync'),
+    'asgi': ('djangoProject2.asgi:application', 'uvicorn_worker.UvicornWorker'),
+}
+
+server = os.getenv('SERVER', 'wsgi')
+if server not in PROFILES:
+    raise RuntimeError(f"SERVER={server!r}: очікується одне з {', '.join(PROFILES)}")
+
+wsgi_app, worker_class = PROFILES[server]
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+
+_metrics_dir = None
+
+
+def on_starting(arbiter):
+    global _metrics_dir
+    # Воркери успадковують оточення майстра
+    if not os.getenv('METRICS_DIR'):
+        _metrics_dir = os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='moonshine-metrics-')
+
+
+def on_exit(arbiter):
+    if _metrics_dir:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
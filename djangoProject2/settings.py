@@ -17,6 +17,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# URL медіафайлів містять хеш вмісту, див. bar/mediafiles.py
+STORAGES = {
+    'default': {'BACKEND': 'bar.mediafiles.HashedMediaStorage'},
+    # Хешовані імена + .gz/.br при collectstatic, див. bar/assets.py
+    'staticfiles': {'BACKEND': 'bar.assets.BuildStaticStorage'},
+}
+# Хто віддає байти медіафайлів: '' — сам Django (sendfile через gunicorn),
+# 'nginx' — X-Accel-Redirect на internal location MEDIA_ACCEL_PREFIX, 'sendfile' — X-Sendfile
+MEDIA_SERVE = os.getenv('MEDIA_SERVE', 'true').lower() == 'true'
+MEDIA_ACCEL = os.getenv('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_MAX_AGE = 3600  # для URL без хешу
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -42,11 +54,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Першим, щоб міряти весь запит: Server-Timing і метрики /metrics/ (bar/instrumentation.py)
+    'bar.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # База для читань каталогу на час запиту, read-your-writes (bar/routers.py)
+    'bar.routers.ReplicaRoutingMiddleware',
+    # Профіль запиту для staff (X-Profile: 1 / ?_profile=1) і 1 з PROFILE_SAMPLE_RATE (bar/profiling.py)
+    'bar.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -55,7 +73,8 @@ ROOT_URLCONF = 'djangoProject2.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, що міряє час рендеру для Server-Timing (bar/instrumentation.py)
+        'BACKEND': 'bar.instrumentation.InstrumentedTemplates',
         'DIRS': [BASE_DIR / 'templates']
         ,
         'APP_DIRS': True,
@@ -64,6 +83,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'bar.context_processors.site',
             ],
         },
     },
@@ -75,12 +95,108 @@ WSGI_APPLICATION = 'djangoProject2.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Primary — 'default'. Репліки для читань каталогу (bar/routers.py) — DATABASE_REPLICAS через
+# кому: для SQLite — шляхи до копій файлу (наповнює manage.py sync_replicas), для
+# PostgreSQL — host[:port] з тими самими NAME/USER/PASSWORD.
+# DATABASE_CONN_MAX_AGE — скільки секунд тримати з'єднання між запитами ('none' — без
+# обмеження); DATABASE_POOL=true — пул з'єднань psycopg замість нього (лише PostgreSQL).
+DATABASE_ENGINE = os.getenv('DATABASE_ENGINE', 'django.db.backends.sqlite3')
+DATABASE_SQLITE = DATABASE_ENGINE == 'django.db.backends.sqlite3'
+DATABASE_POOL = not DATABASE_SQLITE and os.getenv('DATABASE_POOL', 'false').lower() == 'true'
+
+# SQLite під кількома воркерами gunicorn (SQLITE_CONCURRENCY=false — стандартні налаштування):
+# WAL — читачі не чекають на запис і навпаки; synchronous=NORMAL у WAL не втрачає узгодженість;
+# busy timeout — скільки секунд чекати на блокування замість "database is locked";
+# BEGIN IMMEDIATE — запис бере блокування одразу, тож чекання на нього покриває busy timeout;
+# з'єднання живуть між запитами (DATABASE_CONN_MAX_AGE), тож прагми й кеш сторінок SQLite
+# не втрачаються з кожним запитом. Порівняти профілі: python manage.py bench_sqlite.
+SQLITE_CONCURRENCY = os.getenv('SQLITE_CONCURRENCY', 'true').lower() == 'true'
+SQLITE_BUSY_TIMEOUT = float(os.getenv('SQLITE_BUSY_TIMEOUT', 20))
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_KIB', 64 * 1024)),  # від'ємне — у КіБ
+    'temp_store': 'MEMORY',
+}
+
+_conn_max_age = os.getenv('DATABASE_CONN_MAX_AGE', '600' if DATABASE_SQLITE and SQLITE_CONCURRENCY else '0')
+DATABASE_CONN_MAX_AGE = None if _conn_max_age.lower() == 'none' else int(_conn_max_age)
+
+
+def _database(**overrides):
+    database = {
+        'ENGINE': DATABASE_ENGINE,
+        'NAME': os.getenv('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+        # Пул і постійні з'єднання в Django взаємовиключні
+        'CONN_MAX_AGE': 0 if DATABASE_POOL else DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_MAX_AGE != 0,
+    }
+    if not DATABASE_SQLITE:
+        database.update({
+            'USER': os.getenv('DATABASE_USER', ''),
+            'PASSWORD': os.getenv('DATABASE_PASSWORD', ''),
+            'HOST': os.getenv('DATABASE_HOST', ''),
+            'PORT': os.getenv('DATABASE_PORT', ''),
+        })
+    if DATABASE_SQLITE and SQLITE_CONCURRENCY:
+        database['OPTIONS'] = {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        }
+    if DATABASE_POOL:
+        database['OPTIONS'] = {'pool': {
+            'min_size': int(os.getenv('DATABASE_POOL_MIN', 2)),
+            'max_size': int(os.getenv('DATABASE_POOL_MAX', 10)),
+        }}
+    database.update(overrides)
+    return database
+
+
+DATABASES = {'default': _database()}
+for _index, _replica in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    if DATABASE_SQLITE:
+        _location = {'NAME': _replica.strip()}
+    else:
+        _host, _, _port = _replica.strip().partition(':')
+        _location = {'HOST': _host, 'PORT': _port or DATABASES['default']['PORT']}
+    # У тестах репліка — те саме з'єднання, що й primary
+    DATABASES[f'replica{_index}'] = _database(**_location, TEST={'MIRROR': 'default'})
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['bar.routers.PrimaryReplicaRouter']
+# Скільки секунд після запису читання лишаються на primary (read-your-writes і кеші сторінок)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# Версії моделей (bar/cache.py), кеш сторінок, ETag-и й вікно read-your-writes живуть
+# у кеші, тож він має бути спільним для всіх воркерів gunicorn (WEB_CONCURRENCY).
+# У продакшені з кількома воркерами — Redis або Memcached, напр.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://127.0.0.1:6379/1
+# (потрібен пакет redis). За замовчуванням — файли в BASE_DIR/cache: спільні для воркерів
+# однієї машини без окремого сервісу, але кожен set() FileBasedCache перелічує всю теку
+# (_cull) — до CACHE_MAX_ENTRIES файлів на запис; це варіант для розробки й невеликих
+# інсталяцій. LocMemCache — лише для одного процесу. manage.py test бере тимчасову теку
+# (bar/testrunner.py), а не BASE_DIR/cache.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION',
+            os.path.join(BASE_DIR, 'cache') if CACHE_BACKEND.endswith('FileBasedCache') else 'moonshine-factory',
+        ),
     }
 }
+if CACHE_BACKEND.endswith(('FileBasedCache', 'LocMemCache')):
+    # FileBasedCache за замовчуванням тримає лише 300 записів, а сторінок із фільтрами значно більше;
+    # Redis і Memcached обмежують пам'ять самі й MAX_ENTRIES не приймають
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 20000))}
+
+TEST_RUNNER = 'bar.testrunner.TestRunner'
 
 
 # Password validation
@@ -118,8 +234,67 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Django віддає STATIC_ROOT сам (bar/assets.py), якщо перед ним немає nginx
+STATIC_SERVE = os.getenv('STATIC_SERVE', 'true').lower() == 'true'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Бюджети SQL-запитів для bar.views (див. bar/querybudget.py); у тестах вмикається override_settings
+QUERY_BUDGET_ENFORCE = False
+
+# Кеш сторінок bar.views (bar/pagecache.py), секунди; 0 вимикає
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 600))
+
+# Домішується до ETag сторінок; змініть при деплої зміненої верстки,
+# щоб клієнти не отримали 304 на старий HTML.
+ETAG_SALT = os.getenv('ETAG_SALT', '')
+
+# Адаптивні похідні зображень (bar/images.py): ширини в px, якість, процеси пулу (0 — одразу в запиті)
+IMAGE_WIDTHS = (320, 640, 960, 1280)
+IMAGE_QUALITY = 80
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+# Мініатюри в адмінці (bar/thumbnails.py) генеруються з запасом для HiDPI-екранів
+THUMBNAIL_SCALE = 2
+
+# JSON API (bar/api.py): розмір сторінки за замовчуванням і максимальний ?limit=
+API_DEFAULT_LIMIT = 100
+API_MAX_LIMIT = 1000
+
+# Async-версії списків і деталей каталогу (bar/async_views.py); djangoProject2/asgi.py вмикає їх сам
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'false').lower() == 'true'
+
+# Адмінка (bar/admin.py): відфільтровані changelist-и рахують рядки не далі цієї межі
+ADMIN_COUNT_CAP = 10000
+
+# Інструментування запитів (bar/instrumentation.py): заголовок Server-Timing (лише в DEBUG
+# або для staff) і метрики Prometheus на /metrics/. METRICS_DIR — спільна тека, куди кожен
+# процес скидає свої лічильники (gunicorn.conf.py задає її сам); без неї /metrics/ показує
+# лише свій процес. /metrics/ вимкнено за замовчуванням; увімкнений вимагає
+# Authorization: Bearer <METRICS_TOKEN>, а без токена відповідає лише в DEBUG.
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_FLUSH_SECONDS = 1
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Семплювальний профайлер запитів (bar/profiling.py): staff вмикає його заголовком
+# PROFILE_HEADER: 1 або параметром ?PROFILE_QUERY_PARAM=1; PROFILE_SAMPLE_RATE=N профілює
+# ще й випадковий 1 з N запитів (0 — вимкнено). Файли — у PROFILE_DIR, список — в адмінці.
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_FORMAT = os.getenv('PROFILE_FORMAT', 'speedscope')  # speedscope | collapsed
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))  # секунд між семплами
+PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', 0))
+# Скільки профілів тримати: найновіші PROFILE_MAX_COUNT, не старші за PROFILE_MAX_AGE_DAYS
+# (0 — без обмеження); зайві видаляються після кожного нового профілю і manage.py prune_profiles
+PROFILE_MAX_COUNT = int(os.getenv('PROFILE_MAX_COUNT', 500))
+PROFILE_MAX_AGE_DAYS = float(os.getenv('PROFILE_MAX_AGE_DAYS', 7))
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_PARAM = '_profile'
+
+# Куди manage.py export_site пише статичну копію каталогу (bar/export.py)
+EXPORT_ROOT = os.getenv('EXPORT_ROOT', os.path.join(BASE_DIR, 'site'))
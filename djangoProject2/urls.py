@@ -14,19 +14,31 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.conf.urls.static import static
+import re
+
 from django.contrib import admin
 
-from django.urls import path, include
+from django.urls import path, include, re_path
 
+from bar import assets, instrumentation, mediafiles
 from bar.views import index
 from djangoProject2 import settings
 
 urlpatterns = [
     path('', index, name='index'),
     path('admin/', admin.site.urls),
+    # Метрики Prometheus усіх воркерів (bar/instrumentation.py)
+    path('metrics/', instrumentation.metrics, name='metrics'),
     path('', include('bar.urls'))
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Медіа віддаються і в продакшені: через X-Accel-Redirect/X-Sendfile або sendfile (bar/mediafiles.py)
+if settings.MEDIA_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), mediafiles.serve, name='media'),
+    ]
+
+if settings.STATIC_SERVE:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), assets.serve, name='static'),
+    ]